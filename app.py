@@ -1,25 +1,67 @@
 import os
-import sys
-import logging
-import pandas as pd
-from flask import Flask, render_template, request, jsonify, redirect, url_for
-from mlProject.pipeline.prediction_pipeline import PredictionPipeline
-from mlProject import logger
+import time
+from flask import Flask, render_template, request, jsonify, redirect, url_for, g
+from mlProject.pipeline.model_registry import model_registry
+from mlProject.pipeline.training_jobs import TrainingJobRunner
+from mlProject.pipeline.micro_batcher import BatcherFull
+from mlProject.pipeline.serving import (MAX_BATCH_ROWS, make_micro_batcher, make_prediction_cache, parse_record,
+                                        get_results_context, request_logger, register_serving_metrics)
+from mlProject.pipeline.metrics import (metrics_registry, http_requests, http_request_seconds, prediction_errors,
+                                        stage_seconds, StageTimer)
+from mlProject.utils.lazy import LazyModule
+from mlProject.utils.profiling import begin_request_profile, end_request_profile
+from mlProject import logger, setup_logging
+
+# serving imports only: training runs in a subprocess, pandas is needed by /predict/batch alone
+pd = LazyModule('pandas')
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('app.log')
-    ]
-)
+setup_logging()
 
 app = Flask(__name__, static_folder="assets", template_folder="templates")
 app.config['TEMPLATES_AUTO_RELOAD'] = True
 app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
 
+# optional micro-batching of concurrent /predict calls
+micro_batcher = make_micro_batcher(model_registry.get)
+
+# background training, serving switches to the new model only on success
+training_runner = TrainingJobRunner(on_success=lambda: model_registry.reload().version)
+
+# LRU cache of single predictions, keyed on the inputs and the model version
+prediction_cache = make_prediction_cache()
+
+# served model, micro batcher and cache stats in /metrics
+register_serving_metrics(micro_batcher, prediction_cache)
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    # the route pattern, not the path, keeps the label set bounded
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    http_request_seconds.observe(time.perf_counter() - g.request_start, (endpoint,))
+    http_requests.inc((endpoint, request.method, str(response.status_code)))
+    return response
+
+# PredictionPipeline calls of the request are profiled into logs/profiles/ with PROFILE=requests,
+# or with PROFILE_HEADER=1 and an X-Profile: 1 header
+@app.before_request
+def start_request_profile():
+    g.profile_id = begin_request_profile(request.headers.get('X-Profile'), request.headers.get('X-Request-ID'))
+
+@app.after_request
+def add_profile_header(response):
+    if g.get('profile_id') is not None:
+        response.headers['X-Profile-Id'] = g.profile_id
+    return response
+
+@app.teardown_request
+def stop_request_profile(error=None):
+    end_request_profile()
+
 @app.after_request
 def add_no_cache_headers(response):
     try:
@@ -40,36 +82,42 @@ def homepage():
         return "Error loading page. Please try again later.", 500
 
 # Route for training pipeline
-@app.route('/train', methods=['GET'])
+@app.route('/train', methods=['GET', 'POST'])
 def training():
     try:
-        logger.info("Starting model training...")
-        # Using subprocess instead of os.system for better control
-        import subprocess
-        result = subprocess.run(
-            [sys.executable, "main.py"],
-            capture_output=True,
-            text=True
-        )
-        
-        if result.returncode != 0:
-            error_msg = f"Training failed: {result.stderr}"
-            logger.error(error_msg)
-            return jsonify({"status": "error", "message": error_msg}), 500
-            
-        logger.info("Training completed successfully")
-        return jsonify({"status": "success", "message": "Training completed successfully"})
+        job, created = training_runner.submit()
+        if created:
+            logger.info(f"Started training job {job.id}")
+        else:
+            logger.info(f"Training job {job.id} already in progress")
+
+        return jsonify({
+            "status": "accepted",
+            "job_id": job.id,
+            "already_running": not created,
+            "status_url": url_for('training_status', job_id=job.id)
+        }), 202
         
     except Exception as e:
         error_msg = f"Error during training: {str(e)}"
         logger.error(error_msg)
         return jsonify({"status": "error", "message": error_msg}), 500
 
+# Route for training job progress
+@app.route('/train/<job_id>', methods=['GET'])
+def training_status(job_id):
+    job = training_runner.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": f"Unknown training job: {job_id}"}), 404
+    return jsonify(job.to_dict())
+
 # Route for prediction
 @app.route('/predict', methods=['POST'])
 def predict():
     try:
-        logger.info("Received prediction request")
+        log = request_logger()
+        log.info("Received prediction request")
+        timer = StageTimer(stage_seconds)
         
         # Get data from form or JSON
         if request.is_json:
@@ -80,87 +128,87 @@ def predict():
             data = request.form
             get_value = lambda key: data.get(key, '')
             is_ajax = False
+        timer.mark("parse")
         
-        # Validate required fields
-        required_fields = ['carat', 'cut', 'color', 'clarity', 'depth', 'table', 'x', 'y', 'z']
-        missing_fields = [field for field in required_fields if not get_value(field)]
-        
-        if missing_fields:
-            error_msg = f"Missing required fields: {', '.join(missing_fields)}"
-            logger.warning(error_msg)
-            if is_ajax:
-                return jsonify({"status": "error", "message": error_msg}), 400
-            else:
-                return render_template('index.html', error=error_msg)
-        
-        # Parse and validate numerical inputs
-        try:
-            carat = float(get_value('carat'))
-            depth = float(get_value('depth'))
-            table = float(get_value('table'))
-            x = float(get_value('x'))
-            y = float(get_value('y'))
-            z = float(get_value('z'))
-            
-            # Basic validation
-            if any(val <= 0 for val in [carat, depth, table, x, y, z]):
-                raise ValueError("All numerical values must be positive")
-                
-        except ValueError as e:
-            error_msg = f"Invalid input: {str(e)}"
+        # Validate required fields and parse the numbers
+        record, error_msg = parse_record(get_value)
+        timer.mark("validate")
+        if error_msg is not None:
+            prediction_errors.inc(("validation",))
             logger.warning(error_msg)
             if is_ajax:
                 return jsonify({"status": "error", "message": error_msg}), 400
             else:
                 return render_template('index.html', error=error_msg)
         
-        # Get categorical inputs
-        cut = get_value('cut').strip()
-        color = get_value('color').strip()
-        clarity = get_value('clarity').strip()
-        
-        # Create input DataFrame
-        input_data = pd.DataFrame([[
-            carat, cut, color, clarity, depth, table, x, y, z
-        ]], columns=required_fields)
-        
-        logger.info(f"Input data: {input_data.to_dict(orient='records')[0]}")
+        log.info("Input data: %s", record)
         
         try:
-            # Initialize pipeline and make prediction
-            pipeline = PredictionPipeline()
-            transformed_data = pipeline.data_transform(input_data)
-            prediction = pipeline.predict(transformed_data)
+            # Get the shared pipeline; its version is part of the cache key
+            pipeline = model_registry.get()
+            cache_key = prediction_cache.make_key(record, pipeline.version) if prediction_cache is not None else None
+            cached = prediction_cache.get(cache_key) if cache_key is not None else None
+
+            # callers may accept an interpolated price from the quote grid
+            approximate = str(get_value('approximate')).strip().lower() in ('1', 'true', 'yes', 'on')
+            quoted = pipeline.quote(record) if approximate and cached is None else None
+
+            if cached is not None:
+                prediction = [cached]
+            elif quoted is not None:
+                prediction = [quoted[0]]
+            elif micro_batcher is not None:
+                # queued with concurrent requests and scored as one matrix
+                try:
+                    prediction = [micro_batcher.predict(record, timeout=30)]
+                except ValueError as e:
+                    prediction_errors.inc(("invalid_input",))
+                    error_msg = f"Invalid input: {str(e)}"
+                    logger.warning(error_msg)
+                    if is_ajax:
+                        return jsonify({"status": "error", "message": error_msg}), 400
+                    else:
+                        return render_template('index.html', error=error_msg)
+            else:
+                # Make prediction with the shared pipeline
+                prediction = pipeline.predict_records([record])
             
             # Format the prediction
             prediction_value = float(prediction[0])
+            if cache_key is not None and cached is None and quoted is None:
+                prediction_cache.put(cache_key, prediction_value)
             formatted_pred = "{:,.2f}".format(prediction_value)
-            logger.info(f"Prediction successful: ${formatted_pred}")
+            log.info("Prediction successful: $%s", formatted_pred)
             
+            # transform and predict are timed by the pipeline itself
+            timer.restart()
             if is_ajax:
-                return jsonify({
+                response = {
                     "status": "success",
                     "prediction": prediction_value,
                     "formatted_prediction": formatted_pred
-                })
+                }
+                if quoted is not None:
+                    response.update({"approximate": True, "max_error": quoted[1]})
+                response = jsonify(response)
             else:
                 # Redirect to results page with parameters
                 from urllib.parse import urlencode
-                params = {
-                    'carat': carat,
-                    'cut': cut,
-                    'color': color,
-                    'clarity': clarity,
-                    'depth': depth,
-                    'table': table,
-                    'x': x,
-                    'y': y,
-                    'z': z,
-                    'prediction': prediction_value
-                }
-                return redirect(f"/results?{urlencode(params)}")
+                params = {**record, 'prediction': prediction_value}
+                response = redirect(f"/results?{urlencode(params)}")
+            timer.mark("render")
+            return response
+
+        except BatcherFull as e:
+            # the batcher queue is bounded, an overloaded worker sheds load
+            prediction_errors.inc(("busy",))
+            logger.warning(str(e))
+            response = jsonify({"status": "error", "message": "Server is busy, please retry shortly"})
+            response.headers['Retry-After'] = '1'
+            return response, 503
                 
         except Exception as e:
+            prediction_errors.inc(("prediction",))
             error_msg = f"Error during prediction: {str(e)}"
             logger.error(error_msg, exc_info=True)
             if is_ajax:
@@ -169,6 +217,7 @@ def predict():
                 return render_template('index.html', error=error_msg)
         
     except Exception as e:
+        prediction_errors.inc(("unexpected",))
         error_msg = f"Unexpected error: {str(e)}"
         logger.error(error_msg, exc_info=True)
         if is_ajax:
@@ -179,50 +228,100 @@ def predict():
         else:
             return render_template('index.html', error=error_msg)
 
+# Route for batch prediction
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    try:
+        timer = StageTimer(stage_seconds)
+
+        # Accept a JSON array (or {"diamonds": [...]}) or an uploaded CSV file
+        if request.is_json:
+            data = request.get_json()
+            if isinstance(data, dict):
+                data = data.get('diamonds')
+            if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+                prediction_errors.inc(("validation",))
+                return jsonify({"status": "error", "message": "Expected a JSON array of diamonds"}), 400
+            input_data = pd.DataFrame.from_records(data)
+        elif 'file' in request.files:
+            input_data = pd.read_csv(request.files['file'], dtype=str, skipinitialspace=True)
+        else:
+            prediction_errors.inc(("validation",))
+            return jsonify({"status": "error", "message": "Send a JSON array or upload a CSV file as 'file'"}), 400
+        timer.mark("parse")
+
+        request_logger().info("Received batch prediction request with %d rows", len(input_data))
+
+        if input_data.empty:
+            prediction_errors.inc(("validation",))
+            return jsonify({"status": "error", "message": "No diamonds to price"}), 400
+
+        if len(input_data) > MAX_BATCH_ROWS:
+            prediction_errors.inc(("batch_too_large",))
+            error_msg = f"Batch too large: {len(input_data)} rows (max {MAX_BATCH_ROWS})"
+            logger.warning(error_msg)
+            return jsonify({"status": "error", "message": error_msg}), 413
+
+        pipeline = model_registry.get()
+        try:
+            # validate, transform and predict are timed by the pipeline itself
+            predictions, errors = pipeline.predict_batch(input_data)
+        except ValueError as e:
+            prediction_errors.inc(("invalid_input",))
+            error_msg = f"Invalid input: {str(e)}"
+            logger.warning(error_msg)
+            return jsonify({"status": "error", "message": error_msg}), 400
+
+        timer.restart()
+        response = jsonify({
+            "status": "success",
+            "count": len(predictions),
+            "failed": len(errors),
+            "predictions": predictions,
+            "errors": errors
+        })
+        timer.mark("render")
+        return response
+
+    except Exception as e:
+        prediction_errors.inc(("prediction",))
+        error_msg = f"Error during batch prediction: {str(e)}"
+        logger.error(error_msg, exc_info=True)
+        return jsonify({"status": "error", "message": error_msg}), 500
+
+# Route for Prometheus metrics
+@app.route('/metrics')
+def metrics():
+    return metrics_registry.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+# Route for micro-batching metrics
+@app.route('/metrics/batching')
+def batching_metrics():
+    if micro_batcher is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **micro_batcher.stats()})
+
+# Route for prediction cache metrics
+@app.route('/metrics/cache')
+def cache_metrics():
+    if prediction_cache is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **prediction_cache.stats()})
+
 # Route to display results
 @app.route('/results')
 def results():
     try:
-        logger.info("Rendering results page with args: %s", dict(request.args))
-        
-        # Get all parameters from the URL with proper defaults
-        carat = request.args.get('carat', '0')
-        cut = request.args.get('cut', 'N/A')
-        color = request.args.get('color', 'N/A')
-        clarity = request.args.get('clarity', 'N/A')
-        depth = request.args.get('depth', '0')
-        table = request.args.get('table', '0')
-        x = request.args.get('x', '0')
-        y = request.args.get('y', '0')
-        z = request.args.get('z', '0')
-        prediction = request.args.get('prediction', '0')
-        
-        # Format the prediction with 2 decimal places
-        try:
-            prediction_float = float(prediction)
-            formatted_pred = "${:,.2f}".format(prediction_float)
-        except (ValueError, TypeError) as e:
-            logger.error(f"Error formatting prediction value '{prediction}': {str(e)}")
-            prediction_float = 0.0
-            formatted_pred = "N/A"
+        log = request_logger()
+        log.info("Rendering results page with args: %s", dict(request.args))
         
         # Prepare context for the template
-        context = {
-            'carat': carat,
-            'cut': cut.title(),
-            'color': color.upper(),
-            'clarity': clarity.upper(),
-            'depth': depth,
-            'table': table,
-            'x': x,
-            'y': y,
-            'z': z,
-            'prediction': prediction_float,
-            'formatted_prediction': formatted_pred
-        }
+        context = get_results_context(request.args)
         
-        logger.info(f"Rendering template with context: {context}")
+        log.info("Rendering template with context: %s", context)
+        timer = StageTimer(stage_seconds)
         response = render_template('results.html', **context)
+        timer.mark("render")
         # Add cache-busting headers to prevent browser caching
         from flask import make_response
         resp = make_response(response)
@@ -0,0 +1,394 @@
+"""Async entry point: the routes of app.py served over ASGI.
+
+    hypercorn asgi:app --bind 0.0.0.0:8080 --workers 4
+
+The event loop only parses requests and renders responses. Model inference,
+which is CPU bound, runs in a bounded thread pool (INFERENCE_THREADS threads,
+at most INFERENCE_MAX_PENDING queued or running calls), so slow predictions
+never stall the loop and requests beyond the bound get a 503 instead of
+waiting. Parallelism across cores comes from hypercorn's worker processes,
+as with gunicorn.
+"""
+import os
+import time
+import asyncio
+from concurrent.futures import Future
+from quart import Quart, render_template, request, jsonify, redirect, url_for, make_response, g
+from mlProject.pipeline.model_registry import model_registry
+from mlProject.pipeline.training_jobs import TrainingJobRunner
+from mlProject.pipeline.inference_pool import InferencePool, PoolSaturated
+from mlProject.pipeline.micro_batcher import BatcherFull
+from mlProject.pipeline.serving import (MAX_BATCH_ROWS, make_micro_batcher, make_prediction_cache, parse_record,
+                                        get_results_context, request_logger, register_serving_metrics)
+from mlProject.pipeline.metrics import (metrics_registry, http_requests, http_request_seconds, prediction_errors,
+                                        stage_seconds, StageTimer)
+from mlProject.utils.lazy import LazyModule
+from mlProject.utils.profiling import begin_request_profile, end_request_profile
+from mlProject import logger, setup_logging
+
+pd = LazyModule('pandas')
+
+# Configure logging
+setup_logging()
+
+app = Quart(__name__, static_folder="assets", template_folder="templates")
+app.config['TEMPLATES_AUTO_RELOAD'] = True
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
+
+# bounded pool for model inference, with backpressure
+inference_pool = InferencePool(
+    max_workers=int(os.environ.get('INFERENCE_THREADS', min(4, os.cpu_count() or 1))),
+    max_pending=int(os.environ.get('INFERENCE_MAX_PENDING', 64))
+)
+
+# optional micro-batching of concurrent /predict calls
+micro_batcher = make_micro_batcher(model_registry.get)
+
+# background training, serving switches to the new model only on success
+training_runner = TrainingJobRunner(on_success=lambda: model_registry.reload().version)
+
+# LRU cache of single predictions, keyed on the inputs and the model version
+prediction_cache = make_prediction_cache()
+
+# served model, micro batcher, cache and pool stats in /metrics
+register_serving_metrics(micro_batcher, prediction_cache, inference_pool)
+
+# method to answer a request the inference pool has no room for
+def busy_response(error):
+    prediction_errors.inc(("busy",))
+    logger.warning(str(error))
+    response = jsonify({"status": "error", "message": "Server is busy, please retry shortly"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+@app.before_serving
+async def load_model():
+    # the model is loaded before the first request, off the event loop
+    await asyncio.get_running_loop().run_in_executor(None, model_registry.get)
+
+@app.after_serving
+async def stop_pool():
+    inference_pool.shutdown()
+
+@app.before_request
+async def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+async def record_request_metrics(response):
+    # the route pattern, not the path, keeps the label set bounded
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    http_request_seconds.observe(time.perf_counter() - g.request_start, (endpoint,))
+    http_requests.inc((endpoint, request.method, str(response.status_code)))
+    return response
+
+# PredictionPipeline calls of the request are profiled into logs/profiles/ with PROFILE=requests,
+# or with PROFILE_HEADER=1 and an X-Profile: 1 header
+@app.before_request
+async def start_request_profile():
+    g.profile_id = begin_request_profile(request.headers.get('X-Profile'), request.headers.get('X-Request-ID'))
+
+@app.after_request
+async def add_profile_header(response):
+    if g.get('profile_id') is not None:
+        response.headers['X-Profile-Id'] = g.profile_id
+    return response
+
+@app.teardown_request
+async def stop_request_profile(error=None):
+    end_request_profile()
+
+@app.after_request
+async def add_no_cache_headers(response):
+    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate, max-age=0'
+    response.headers['Pragma'] = 'no-cache'
+    response.headers['Expires'] = '0'
+    return response
+
+# Route for homepage
+@app.route('/')
+async def homepage():
+    try:
+        return await render_template("ai_index.html")
+    except Exception as e:
+        logger.error(f"Error loading homepage: {str(e)}")
+        return "Error loading page. Please try again later.", 500
+
+# Route for training pipeline
+@app.route('/train', methods=['GET', 'POST'])
+async def training():
+    try:
+        # starts a background subprocess and returns, training never runs on the loop
+        job, created = training_runner.submit()
+        if created:
+            logger.info(f"Started training job {job.id}")
+        else:
+            logger.info(f"Training job {job.id} already in progress")
+
+        return jsonify({
+            "status": "accepted",
+            "job_id": job.id,
+            "already_running": not created,
+            "status_url": url_for('training_status', job_id=job.id)
+        }), 202
+
+    except Exception as e:
+        error_msg = f"Error during training: {str(e)}"
+        logger.error(error_msg)
+        return jsonify({"status": "error", "message": error_msg}), 500
+
+# Route for training job progress
+@app.route('/train/<job_id>', methods=['GET'])
+async def training_status(job_id):
+    job = training_runner.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": f"Unknown training job: {job_id}"}), 404
+    return jsonify(job.to_dict())
+
+# method to price one diamond in a single inference pool task: registry lookup, cache, quote grid and the
+# prediction, or with micro-batching the submission to the batcher, whose future the loop then awaits
+def price_record(record, approximate):
+    # the shared pipeline; a due version check or reload must not block the loop, its version is part of the cache key
+    pipeline = model_registry.get()
+    cache_key = prediction_cache.make_key(record, pipeline.version) if prediction_cache is not None else None
+    cached = prediction_cache.get(cache_key) if cache_key is not None else None
+    if cached is not None:
+        return cached, None, None
+
+    quoted = pipeline.quote(record) if approximate else None
+    if quoted is not None:
+        return quoted[0], quoted, None
+
+    if micro_batcher is not None:
+        # a full batcher queue raises BatcherFull, answered with a 503 like a full pool
+        return micro_batcher.submit(record), None, cache_key
+    return float(pipeline.predict_records([record])[0]), None, cache_key
+
+# Route for prediction
+@app.route('/predict', methods=['POST'])
+async def predict():
+    is_ajax = request.is_json
+    try:
+        log = request_logger()
+        log.info("Received prediction request")
+        timer = StageTimer(stage_seconds)
+
+        # Get data from form or JSON
+        data = await request.get_json() if is_ajax else await request.form
+        get_value = lambda key: data.get(key, '')
+        timer.mark("parse")
+
+        # Validate required fields and parse the numbers
+        record, error_msg = parse_record(get_value)
+        timer.mark("validate")
+        if error_msg is not None:
+            prediction_errors.inc(("validation",))
+            logger.warning(error_msg)
+            if is_ajax:
+                return jsonify({"status": "error", "message": error_msg}), 400
+            else:
+                return await render_template('index.html', error=error_msg)
+
+        log.info("Input data: %s", record)
+
+        try:
+            # callers may accept an interpolated price from the quote grid
+            approximate = str(get_value('approximate')).strip().lower() in ('1', 'true', 'yes', 'on')
+            prediction_value, quoted, cache_key = await inference_pool.run(price_record, record, approximate)
+
+            if isinstance(prediction_value, Future):
+                # the batcher's own thread scores the batch, the loop only waits for the future
+                try:
+                    prediction_value = await asyncio.wait_for(asyncio.wrap_future(prediction_value), 30)
+                except ValueError as e:
+                    prediction_errors.inc(("invalid_input",))
+                    error_msg = f"Invalid input: {str(e)}"
+                    logger.warning(error_msg)
+                    if is_ajax:
+                        return jsonify({"status": "error", "message": error_msg}), 400
+                    else:
+                        return await render_template('index.html', error=error_msg)
+
+            # Format the prediction
+            prediction_value = float(prediction_value)
+            if cache_key is not None:
+                prediction_cache.put(cache_key, prediction_value)
+            formatted_pred = "{:,.2f}".format(prediction_value)
+            log.info("Prediction successful: $%s", formatted_pred)
+
+            # transform and predict are timed by the pipeline itself
+            timer.restart()
+            if is_ajax:
+                response = {
+                    "status": "success",
+                    "prediction": prediction_value,
+                    "formatted_prediction": formatted_pred
+                }
+                if quoted is not None:
+                    response.update({"approximate": True, "max_error": quoted[1]})
+                response = jsonify(response)
+            else:
+                # Redirect to results page with parameters
+                from urllib.parse import urlencode
+                params = {**record, 'prediction': prediction_value}
+                response = redirect(f"/results?{urlencode(params)}")
+            timer.mark("render")
+            return response
+
+        except (PoolSaturated, BatcherFull) as e:
+            return busy_response(e)
+
+        except Exception as e:
+            prediction_errors.inc(("prediction",))
+            error_msg = f"Error during prediction: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            if is_ajax:
+                return jsonify({"status": "error", "message": error_msg}), 500
+            else:
+                return await render_template('index.html', error=error_msg)
+
+    except Exception as e:
+        prediction_errors.inc(("unexpected",))
+        error_msg = f"Unexpected error: {str(e)}"
+        logger.error(error_msg, exc_info=True)
+        if is_ajax:
+            return jsonify({
+                "status": "error",
+                "message": "An unexpected error occurred. Please try again."
+            }), 500
+        else:
+            return await render_template('index.html', error=error_msg)
+
+# method to parse and price a batch, run in the inference pool: both steps are CPU bound
+def price_batch(read_batch):
+    timer = StageTimer(stage_seconds)
+    input_data = read_batch()
+    timer.mark("parse")
+    request_logger().info("Received batch prediction request with %d rows", len(input_data))
+
+    if input_data.empty:
+        prediction_errors.inc(("validation",))
+        return {"status": "error", "message": "No diamonds to price"}, 400
+
+    if len(input_data) > MAX_BATCH_ROWS:
+        prediction_errors.inc(("batch_too_large",))
+        error_msg = f"Batch too large: {len(input_data)} rows (max {MAX_BATCH_ROWS})"
+        logger.warning(error_msg)
+        return {"status": "error", "message": error_msg}, 413
+
+    pipeline = model_registry.get()
+    try:
+        # validate, transform and predict are timed by the pipeline itself
+        predictions, errors = pipeline.predict_batch(input_data)
+    except ValueError as e:
+        prediction_errors.inc(("invalid_input",))
+        error_msg = f"Invalid input: {str(e)}"
+        logger.warning(error_msg)
+        return {"status": "error", "message": error_msg}, 400
+
+    return {
+        "status": "success",
+        "count": len(predictions),
+        "failed": len(errors),
+        "predictions": predictions,
+        "errors": errors
+    }, 200
+
+# Route for batch prediction
+@app.route('/predict/batch', methods=['POST'])
+async def predict_batch():
+    try:
+        # Accept a JSON array (or {"diamonds": [...]}) or an uploaded CSV file
+        if request.is_json:
+            data = await request.get_json()
+            if isinstance(data, dict):
+                data = data.get('diamonds')
+            if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+                prediction_errors.inc(("validation",))
+                return jsonify({"status": "error", "message": "Expected a JSON array of diamonds"}), 400
+            read_batch = lambda: pd.DataFrame.from_records(data)
+        else:
+            files = await request.files
+            if 'file' not in files:
+                prediction_errors.inc(("validation",))
+                return jsonify({"status": "error", "message": "Send a JSON array or upload a CSV file as 'file'"}), 400
+            upload = files['file']
+            read_batch = lambda: pd.read_csv(upload, dtype=str, skipinitialspace=True)
+
+        body, status = await inference_pool.run(price_batch, read_batch)
+        timer = StageTimer(stage_seconds)
+        response = jsonify(body)
+        if status == 200:
+            timer.mark("render")
+        return response, status
+
+    except PoolSaturated as e:
+        return busy_response(e)
+
+    except Exception as e:
+        prediction_errors.inc(("prediction",))
+        error_msg = f"Error during batch prediction: {str(e)}"
+        logger.error(error_msg, exc_info=True)
+        return jsonify({"status": "error", "message": error_msg}), 500
+
+# Route for Prometheus metrics
+@app.route('/metrics')
+async def metrics():
+    return metrics_registry.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+# Route for micro-batching metrics
+@app.route('/metrics/batching')
+async def batching_metrics():
+    if micro_batcher is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **micro_batcher.stats()})
+
+# Route for prediction cache metrics
+@app.route('/metrics/cache')
+async def cache_metrics():
+    if prediction_cache is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **prediction_cache.stats()})
+
+# Route for inference pool metrics
+@app.route('/metrics/pool')
+async def pool_metrics():
+    return jsonify(inference_pool.stats())
+
+# Route to display results
+@app.route('/results')
+async def results():
+    try:
+        log = request_logger()
+        log.info("Rendering results page with args: %s", dict(request.args))
+
+        # Prepare context for the template
+        context = get_results_context(request.args)
+
+        log.info("Rendering template with context: %s", context)
+        timer = StageTimer(stage_seconds)
+        response = await make_response(await render_template('results.html', **context))
+        timer.mark("render")
+        # Add cache-busting headers to prevent browser caching
+        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+        response.headers['Pragma'] = 'no-cache'
+        response.headers['Expires'] = '0'
+        return response
+
+    except Exception as e:
+        logger.error(f"Error in results page: {str(e)}", exc_info=True)
+        return redirect('/')
+
+# Error handlers
+@app.errorhandler(404)
+async def not_found_error(error):
+    return await render_template('error.html', error="Page not found"), 404
+
+@app.errorhandler(500)
+async def internal_error(error):
+    logger.error(f"Server error: {str(error)}")
+    return await render_template('error.html', error="Internal server error"), 500
+
+if __name__ == "__main__":
+    port = int(os.environ.get('PORT', 8080))
+    app.run(host="0.0.0.0", port=port, debug=False)
@@ -0,0 +1,84 @@
+"""Peak memory of the out-of-core (chunked) validation, transformation and training stages.
+
+Every dataset runs in a fresh process. With a fixed chunk size the peak
+resident set size should stay flat while the input grows:
+
+    python -m benchmarks.chunked_training --rows 1000000 10000000
+"""
+import sys
+import json
+import time
+import logging
+import argparse
+import resource
+import tempfile
+import subprocess
+from mlProject import logger
+from mlProject.constants import ORDINAL_CATEGORIES, OUTLIER_BOUNDS
+from benchmarks.synthetic import SOURCE_PATH, synthetic_dataset
+
+SCHEMA = {"carat": "float64", "cut": "object", "color": "object", "clarity": "object", "depth": "float64",
+          "table": "float64", "price": "int64", "x": "float64", "y": "float64", "z": "float64"}
+
+def run_worker(data_path, args):
+    from mlProject.entity.config_entity import DataValidationConfig, DataTransformationConfig, ModelTrainerConfig
+    from mlProject.components.data_validation import DataValiadtion
+    from mlProject.components.data_transformation import DataTransformation
+    from mlProject.components.model_trainer import ModelTrainer
+
+    logger.setLevel(logging.WARNING)
+    result = {"baseline_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        stages = [
+            ("validation", lambda: DataValiadtion(DataValidationConfig(
+                root_dir=root_dir, unzip_data_dir=data_path, STATUS_FILE=f"{root_dir}/status.txt",
+                report_file=f"{root_dir}/report.json", all_schema=SCHEMA, ranges=OUTLIER_BOUNDS,
+                categories=ORDINAL_CATEGORIES, nullable=[], sample_rows=5,
+                chunked=True, chunk_rows=args.chunk_rows)).validate_all_columns()),
+            ("transformation", lambda: DataTransformation(DataTransformationConfig(
+                root_dir=root_dir, data_path=data_path, target_column="price", export_csv=False,
+                chunk_rows=args.chunk_rows, chunked=True, test_fraction=0.25)).get_transformed()),
+            ("training", lambda: ModelTrainer(ModelTrainerConfig(
+                root_dir=root_dir, X_train_transformed_path=f"{root_dir}/X_train_transformed.npy",
+                y_train_path=f"{root_dir}/y_train.npy", model_name="model.joblib", n_estimators=args.n_estimators,
+                random_state=42, n_jobs=-1, backend="threading", max_samples=None, max_features=1.0,
+                chunked=True, chunk_rows=args.chunk_rows, max_leaf_nodes=args.max_leaf_nodes,
+                best_params_file=None)).train()),
+        ]
+        for name, run in stages:
+            start = time.perf_counter()
+            run()
+            result[f"{name}_seconds"] = time.perf_counter() - start
+            # ru_maxrss is in KiB on Linux
+            result[f"{name}_peak_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="*", default=[1_000_000, 10_000_000], help="synthetic dataset sizes")
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000, help="rows per chunk")
+    parser.add_argument("--n-estimators", type=int, default=8, help="trees in the forest")
+    parser.add_argument("--max-leaf-nodes", type=int, default=4096, help="leaves per tree")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return run_worker(args.worker, args)
+
+    datasets = [("diamonds.csv", SOURCE_PATH)] + [(f"synthetic {n}", synthetic_dataset(n)) for n in args.rows]
+
+    # peaks are cumulative: each column is the process maximum once that stage has finished
+    print(f"{'dataset':<20}" + "".join(f"{name + ' s / peak MB':>28}" for name in ["validation", "transformation", "training"]))
+    for name, path in datasets:
+        command = [sys.executable, "-m", "benchmarks.chunked_training", "--worker", path, "--chunk-rows", str(args.chunk_rows),
+                   "--n-estimators", str(args.n_estimators), "--max-leaf-nodes", str(args.max_leaf_nodes)]
+        result = json.loads(subprocess.run(command, check=True, capture_output=True, text=True).stdout.strip().splitlines()[-1])
+        print(f"{name:<20}" + "".join(f"{result[f'{stage}_seconds']:>17.1f} / {result[f'{stage}_peak_mb']:>7.0f}"
+                                      for stage in ["validation", "transformation", "training"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Wall time and peak memory of the DataTransformation stage.
+
+Every dataset is transformed in a fresh process, so the peak resident set
+size belongs to that run alone. Synthetic datasets are generated once and
+reused from artifacts/benchmarks/:
+
+    python -m benchmarks.data_transformation --rows 10000000
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import resource
+import tempfile
+import subprocess
+from mlProject import logger
+from benchmarks.synthetic import SOURCE_PATH, synthetic_dataset
+
+def run_worker(data_path, chunk_rows):
+    from mlProject.entity.config_entity import DataTransformationConfig
+    from mlProject.components.data_transformation import DataTransformation
+
+    logger.setLevel(logging.WARNING)
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        config = DataTransformationConfig(root_dir=root_dir, data_path=data_path, target_column="price",
+                                          export_csv=False, chunk_rows=chunk_rows, chunked=False, test_fraction=0.25)
+        start = time.perf_counter()
+        DataTransformation(config=config).get_transformed()
+        seconds = time.perf_counter() - start
+
+    # ru_maxrss is in KiB on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": seconds, "baseline_mb": baseline_rss / 1024, "peak_mb": peak_rss / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="*", default=[10_000_000], help="synthetic dataset sizes")
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000, help="rows read per CSV chunk")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return run_worker(args.worker, args.chunk_rows)
+
+    datasets = [("diamonds.csv", SOURCE_PATH)]
+    for n_rows in args.rows:
+        datasets.append((f"synthetic {n_rows}", synthetic_dataset(n_rows)))
+
+    print(f"{'dataset':<22}{'csv (MB)':>10}{'seconds':>10}{'peak RSS (MB)':>15}{'over baseline':>15}")
+    for name, path in datasets:
+        output = subprocess.run([sys.executable, "-m", "benchmarks.data_transformation", "--worker", path,
+                                 "--chunk-rows", str(args.chunk_rows)],
+                                check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{name:<22}{os.path.getsize(path) / 2**20:>10.1f}{result['seconds']:>10.2f}"
+              f"{result['peak_mb']:>15.1f}{result['peak_mb'] - result['baseline_mb']:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Time of the DataValidation stage next to a plain pandas parse of the same CSV.
+
+    python -m benchmarks.data_validation --rows 10000000
+"""
+import json
+import time
+import logging
+import argparse
+import tempfile
+import pandas as pd
+from mlProject import logger
+from mlProject.constants import ORDINAL_CATEGORIES, OUTLIER_BOUNDS
+from mlProject.entity.config_entity import DataValidationConfig
+from mlProject.components.data_validation import DataValiadtion
+from benchmarks.synthetic import SOURCE_PATH, synthetic_dataset
+from benchmarks.chunked_training import SCHEMA
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="*", default=[10_000_000], help="synthetic dataset sizes")
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000, help="rows per chunk in chunked mode")
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    datasets = [("diamonds.csv", SOURCE_PATH)] + [(f"synthetic {n}", synthetic_dataset(n)) for n in args.rows]
+
+    print(f"{'dataset':<20}{'read_csv s':>12}{'validate s':>12}{'chunked s':>12}{'ratio':>8}  violations")
+    for name, path in datasets:
+        start = time.perf_counter()
+        pd.read_csv(path)
+        parse_seconds = time.perf_counter() - start
+
+        seconds = {}
+        with tempfile.TemporaryDirectory() as root_dir:
+            for chunked in [False, True]:
+                config = DataValidationConfig(
+                    root_dir=root_dir, unzip_data_dir=path, STATUS_FILE=f"{root_dir}/status.txt",
+                    report_file=f"{root_dir}/report.json", all_schema=SCHEMA, ranges=OUTLIER_BOUNDS,
+                    categories=ORDINAL_CATEGORIES, nullable=[], sample_rows=5, chunked=chunked, chunk_rows=args.chunk_rows)
+                start = time.perf_counter()
+                DataValiadtion(config).validate_all_columns()
+                seconds[chunked] = time.perf_counter() - start
+
+            with open(f"{root_dir}/report.json") as f:
+                report = json.load(f)
+
+        counts = ", ".join(f"{v['check']} {v['column'] or ''}: {v['count']}".replace(" :", ":") for v in report["violations"])
+        print(f"{name:<20}{parse_seconds:>12.2f}{seconds[False]:>12.2f}{seconds[True]:>12.2f}"
+              f"{seconds[False] / parse_seconds:>7.2f}x  {counts}")
+
+
+if __name__ == "__main__":
+    main()
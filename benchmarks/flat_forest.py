@@ -0,0 +1,57 @@
+"""Compares sklearn's RandomForestRegressor.predict with the FlatForest engine.
+
+Run from the repository root after training:
+
+    python -m benchmarks.flat_forest
+"""
+import time
+import argparse
+import joblib
+import numpy as np
+import pandas as pd
+from mlProject.components.flat_forest import FlatForest
+from mlProject.pipeline.prediction_pipeline import PredictionPipeline, get_artifact_paths
+
+def time_call(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return np.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000, help="rows in the large batch")
+    parser.add_argument("--repeats", type=int, default=20, help="timed repetitions per case")
+    args = parser.parse_args()
+
+    paths = get_artifact_paths()
+    model = joblib.load(paths['model'])
+    pipeline = PredictionPipeline()
+
+    X_test = pd.read_csv("artifacts/data_transformation/X_test.csv")
+    X = pipeline.data_transform(X_test)
+    X_large = X[np.arange(args.rows) % len(X)]
+
+    start = time.perf_counter()
+    flat_forest = FlatForest.from_sklearn(model)
+    export_seconds = time.perf_counter() - start
+
+    identical = np.array_equal(model.predict(X), flat_forest.predict(X))
+    print(f"trees: {flat_forest.n_trees}, nodes: {flat_forest.n_nodes}, max depth: {flat_forest.max_depth}")
+    print(f"export: {export_seconds * 1000:.1f} ms, bit-identical on {len(X)} test rows: {identical}")
+
+    print(f"{'case':<12}{'sklearn (ms)':>15}{'flat (ms)':>15}{'speedup':>10}")
+    for name, batch, repeats in [("1 row", X[:1], args.repeats), (f"{args.rows} rows", X_large, max(3, args.repeats // 5))]:
+        sklearn_seconds = time_call(lambda: model.predict(batch), repeats)
+        flat_seconds = time_call(lambda: flat_forest.predict(batch), repeats)
+        print(f"{name:<12}{sklearn_seconds * 1000:>15.3f}{flat_seconds * 1000:>15.3f}{sklearn_seconds / flat_seconds:>9.1f}x")
+
+    if not identical:
+        raise SystemExit("FlatForest predictions differ from sklearn")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Cost of recording a serving metric, with one and several threads.
+
+Each thread records --observations histogram observations and counter
+increments. The per-thread sharded metrics of mlProject.pipeline.metrics are
+compared with the same histogram behind a single lock. Also reports the
+time to render a /metrics scrape:
+
+    python -m benchmarks.metrics_overhead --threads 1 4 16
+"""
+import os
+import json
+import time
+import bisect
+import argparse
+import threading
+from mlProject.pipeline.metrics import MetricsRegistry, LATENCY_BUCKETS
+
+class LockedHistogram:
+    """The straightforward alternative: one set of counts behind a lock."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        with self.lock:
+            entry = self.counts.get(labels)
+            if entry is None:
+                entry = self.counts[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            entry[bisect.bisect_left(self.buckets, value)] += 1
+            entry[-1] += value
+
+
+def run_threads(n_threads, n_observations, record):
+    barrier = threading.Barrier(n_threads + 1)
+
+    def work():
+        barrier.wait()
+        for i in range(n_observations):
+            record(i)
+
+    threads = [threading.Thread(target=work) for _ in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return (time.perf_counter() - start) / (n_threads * n_observations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16], help="recording threads")
+    parser.add_argument("--observations", type=int, default=200000, help="observations per thread")
+    parser.add_argument("--output", default=os.path.join("artifacts", "benchmarks", "metrics_overhead.json"),
+                        help="JSON file for the results")
+    args = parser.parse_args()
+
+    stages = ("parse", "validate", "transform", "predict", "render")
+    results = []
+    print(f"{'threads':>7}{'sharded histogram ns':>22}{'locked histogram ns':>21}{'sharded counter ns':>20}")
+    for n_threads in args.threads:
+        registry = MetricsRegistry()
+        histogram = registry.histogram("stage_seconds", "stage latency", ("stage",))
+        counter = registry.counter("requests_total", "requests", ("endpoint", "status"))
+        locked = LockedHistogram()
+
+        result = {
+            "threads": n_threads,
+            "sharded_histogram_ns": 1e9 * run_threads(
+                n_threads, args.observations, lambda i: histogram.observe(i * 1e-6, (stages[i % 5],))),
+            "locked_histogram_ns": 1e9 * run_threads(
+                n_threads, args.observations, lambda i: locked.observe(i * 1e-6, (stages[i % 5],))),
+            "sharded_counter_ns": 1e9 * run_threads(
+                n_threads, args.observations, lambda i: counter.inc(("/predict", "200"))),
+        }
+
+        # every observation is accounted for after the threads are gone
+        assert sum(sum(entry[:-1]) for entry in histogram.collect().values()) == n_threads * args.observations
+        start = time.perf_counter()
+        registry.render()
+        result["render_ms"] = 1e3 * (time.perf_counter() - start)
+
+        results.append(result)
+        print(f"{n_threads:>7}{result['sharded_histogram_ns']:>22.0f}{result['locked_histogram_ns']:>21.0f}"
+              f"{result['sharded_counter_ns']:>20.0f}")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump({"observations": args.observations, "cpu_count": os.cpu_count(), "results": results}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
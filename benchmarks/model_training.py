@@ -0,0 +1,138 @@
+"""Fit time, CPU time and peak memory of ModelTrainer for each parallelism setting.
+
+The training matrices are prepared once from diamonds.csv (or from a
+synthetic dataset with --rows), then every setting is trained in a fresh
+process. The baseline is the current model: one core, every sample and
+every feature. The fastest setting whose test R² stays within
+--r2-tolerance of the baseline is recommended:
+
+    python -m benchmarks.model_training --n-jobs 1 4 -1 --backends threading loky --max-samples none 0.5
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import itertools
+import resource
+import tempfile
+import subprocess
+from mlProject import logger
+from benchmarks.synthetic import SOURCE_PATH, synthetic_dataset
+
+BASELINE = {"n_jobs": 1, "backend": "threading", "max_samples": None, "max_features": 1.0}
+
+def fraction_or_none(value):
+    return None if value.lower() == "none" else float(value)
+
+
+def cpu_seconds(who):
+    usage = resource.getrusage(who)
+    return usage.ru_utime + usage.ru_stime
+
+
+def prepare_data(data_path, root_dir):
+    from mlProject.entity.config_entity import DataTransformationConfig
+    from mlProject.components.data_transformation import DataTransformation
+
+    config = DataTransformationConfig(root_dir=root_dir, data_path=data_path, target_column="price", export_csv=False,
+                                      chunk_rows=1_000_000, chunked=False, test_fraction=0.25)
+    DataTransformation(config=config).get_transformed()
+
+
+def run_worker(setting, data_dir, n_estimators):
+    import joblib
+    import numpy as np
+    from joblib.externals.loky import get_reusable_executor
+    from mlProject.entity.config_entity import ModelTrainerConfig
+    from mlProject.components.model_trainer import ModelTrainer
+
+    logger.setLevel(logging.WARNING)
+    X_test = np.load(os.path.join(data_dir, "X_test_transformed.npy"), mmap_mode="r")
+    y_test = np.load(os.path.join(data_dir, "y_test.npy"), mmap_mode="r")
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        config = ModelTrainerConfig(
+            root_dir=root_dir, X_train_transformed_path=os.path.join(data_dir, "X_train_transformed.npy"),
+            y_train_path=os.path.join(data_dir, "y_train.npy"), model_name="model.joblib", n_estimators=n_estimators,
+            random_state=42, **setting, chunked=False, chunk_rows=1_000_000, max_leaf_nodes=65536, best_params_file=None)
+
+        cpu_start = cpu_seconds(resource.RUSAGE_SELF) + cpu_seconds(resource.RUSAGE_CHILDREN)
+        start = time.perf_counter()
+        ModelTrainer(config).train()
+        seconds = time.perf_counter() - start
+
+        # loky workers are children of this process, they count once they have exited
+        get_reusable_executor().shutdown(wait=True)
+        cpu = cpu_seconds(resource.RUSAGE_SELF) + cpu_seconds(resource.RUSAGE_CHILDREN) - cpu_start
+
+        model = joblib.load(os.path.join(root_dir, "model.joblib"))
+        r2 = model.score(X_test, y_test)
+
+    # ru_maxrss is in KiB on Linux; for children it is the largest single worker
+    print(json.dumps({**setting, "seconds": seconds, "cpu_seconds": cpu, "r2": r2,
+                      "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                      "worker_peak_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, help="train on a synthetic dataset of this size instead of diamonds.csv")
+    parser.add_argument("--n-estimators", type=int, default=100, help="trees in the forest")
+    parser.add_argument("--n-jobs", type=int, nargs="+", default=[1, -1], help="worker counts, -1 for every core")
+    parser.add_argument("--backends", nargs="+", default=["threading", "loky"], help="joblib backends")
+    parser.add_argument("--max-samples", type=fraction_or_none, nargs="+", default=[None, 0.5],
+                        help="bootstrap sample fractions, none for every row")
+    parser.add_argument("--max-features", type=float, nargs="+", default=[1.0, 0.5], help="feature fractions per split")
+    parser.add_argument("--r2-tolerance", type=float, default=0.002, help="largest accepted R² drop from the baseline")
+    parser.add_argument("--output", default=os.path.join("artifacts", "benchmarks", "model_training.json"),
+                        help="JSON file for the results")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return run_worker(json.loads(args.worker), args.data_dir, args.n_estimators)
+
+    # one backend is enough for a single worker
+    settings = [BASELINE]
+    for n_jobs, backend, max_samples, max_features in itertools.product(args.n_jobs, args.backends, args.max_samples,
+                                                                         args.max_features):
+        setting = {"n_jobs": n_jobs, "backend": backend if n_jobs != 1 else "threading",
+                   "max_samples": max_samples, "max_features": max_features}
+        if setting not in settings:
+            settings.append(setting)
+
+    logger.setLevel(logging.WARNING)
+    results = []
+    with tempfile.TemporaryDirectory() as data_dir:
+        prepare_data(synthetic_dataset(args.rows) if args.rows else SOURCE_PATH, data_dir)
+
+        print(f"{'n_jobs':>6} {'backend':<10}{'max_samples':>12}{'max_features':>13}{'wall s':>9}{'cpu s':>9}"
+              f"{'peak MB':>9}{'worker MB':>10}{'r2':>9}")
+        for setting in settings:
+            command = [sys.executable, "-m", "benchmarks.model_training", "--worker", json.dumps(setting),
+                       "--data-dir", data_dir, "--n-estimators", str(args.n_estimators)]
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            results.append(result)
+            print(f"{result['n_jobs']:>6} {result['backend']:<10}{str(result['max_samples']):>12}{result['max_features']:>13}"
+                  f"{result['seconds']:>9.2f}{result['cpu_seconds']:>9.2f}{result['peak_mb']:>9.0f}"
+                  f"{result['worker_peak_mb']:>10.0f}{result['r2']:>9.4f}")
+
+    baseline = results[0]
+    accepted = [result for result in results if result["r2"] >= baseline["r2"] - args.r2_tolerance]
+    fastest = min(accepted, key=lambda result: result["seconds"])
+    print(f"\nfastest within {args.r2_tolerance} R² of the baseline: "
+          f"{ {key: fastest[key] for key in BASELINE} } ({baseline['seconds'] / fastest['seconds']:.1f}x faster)")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump({"rows": args.rows, "n_estimators": args.n_estimators, "cpu_count": os.cpu_count(),
+                   "r2_tolerance": args.r2_tolerance, "baseline": baseline, "recommended": fastest,
+                   "results": results}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Saturation curve of /predict: open-loop load at increasing arrival rates, per server profile.
+
+Unlike benchmarks.serving_load, where each client waits for its answer
+before sending again, requests here arrive on a fixed schedule (--rate per
+second, evenly spaced or --arrivals poisson) whether or not earlier ones
+have been answered. Latency is measured from the scheduled arrival, so the
+time a request waits for a free connection or worker counts, as it would
+for a real user. Each payload is a diamond sampled from X_test.csv, and every
+answer is checked against the prediction of the same artifacts offline.
+
+For every server profile and rate, reports p50/p90/p99/p99.9 latency, the
+achieved throughput, errors and the latency histogram, and the highest rate
+whose p99 stays under --slo-ms. Run from the repository root after
+training:
+
+    python -m benchmarks.open_loop_load --servers flask gunicorn-sync gunicorn-threads --rates 25 50 100 200 400
+
+The load generator shares the machine with the server; with --target it
+drives a server that is already running, e.g. on another box.
+"""
+import os
+import sys
+import json
+import math
+import time
+import queue
+import argparse
+import threading
+import subprocess
+import numpy as np
+import pandas as pd
+from benchmarks.serving_load import Client, free_port, wait_until_ready
+
+# command line of each server profile, given the parsed arguments
+SERVERS = {
+    "flask": lambda args: [sys.executable, "app.py"],
+    "gunicorn-sync": lambda args: [sys.executable, "-m", "gunicorn", "app:app", "-c", "gunicorn.conf.py",
+                                   "--worker-class", "sync"],
+    "gunicorn-threads": lambda args: [sys.executable, "-m", "gunicorn", "app:app", "-c", "gunicorn.conf.py",
+                                      "--worker-class", "gthread", "--threads", str(args.threads)],
+}
+
+# upper edges of the latency histogram buckets, in ms
+HISTOGRAM_EDGES_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, math.inf]
+
+def load_payloads(n_payloads, seed):
+    """samples diamonds from X_test.csv and predicts them offline with the served artifacts
+
+    Returns:
+        tuple: (list of JSON request bodies, np.ndarray of the expected predictions)
+    """
+    from mlProject.pipeline.prediction_pipeline import PredictionPipeline
+
+    X_test = pd.read_csv(os.path.join("artifacts", "data_transformation", "X_test.csv"))
+    X_test = X_test.sample(min(n_payloads, len(X_test)), random_state=seed).reset_index(drop=True)
+
+    # the batch path validates and transforms with pandas, independently of the single-record path the server uses
+    expected, errors = PredictionPipeline().predict_batch(X_test)
+    if errors:
+        raise ValueError(f"{len(errors)} X_test rows failed offline validation: {errors[:3]}")
+    return [json.dumps(record) for record in X_test.to_dict(orient="records")], np.array(expected, dtype=np.float64)
+
+
+def run_rate(host, port, bodies, rate, args, rng):
+    """sends /predict requests on an open-loop schedule for --duration seconds
+
+    Returns:
+        tuple: (list of (payload index, scheduled, sent, done, status, content), seconds from start to last answer)
+    """
+    n_requests = max(1, int(rate * args.duration))
+    if args.arrivals == "poisson":
+        offsets = np.cumsum(rng.exponential(1.0 / rate, n_requests))
+    else:
+        offsets = np.arange(n_requests) / rate
+    payloads = rng.integers(0, len(bodies), n_requests)
+
+    pending = queue.Queue()
+    results = [None] * n_requests
+
+    def sender():
+        client = Client(port, host)
+        while True:
+            item = pending.get()
+            if item is None:
+                break
+            i, scheduled = item
+            sent = time.perf_counter()
+            if sent - scheduled > args.give_up:
+                # hopelessly late, counted as dropped so an overloaded run still ends
+                results[i] = (payloads[i], scheduled, sent, sent, -1, b"")
+                continue
+            try:
+                status, content = client.post_read("/predict", bodies[payloads[i]])
+            except OSError:
+                status, content = 0, b""
+            results[i] = (payloads[i], scheduled, sent, time.perf_counter(), status, content)
+        client.close()
+
+    threads = [threading.Thread(target=sender, daemon=True) for _ in range(args.connections)]
+    for thread in threads:
+        thread.start()
+
+    start = time.perf_counter() + 0.1
+    for i, offset in enumerate(offsets):
+        delay = start + offset - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        pending.put((i, start + offset))
+    for _ in threads:
+        pending.put(None)
+    for thread in threads:
+        thread.join()
+
+    return results, max(done for _, _, _, done, _, _ in results) - start
+
+
+def summarize(results, elapsed, rate, expected, args):
+    ok = [result for result in results if result[4] == 200]
+    latencies = np.array([done - scheduled for _, scheduled, _, done, _, _ in ok]) * 1000
+    service = np.array([done - sent for _, _, sent, done, _, _ in ok]) * 1000
+    lag = np.array([sent - scheduled for _, scheduled, sent, _, _, _ in results]) * 1000
+
+    # every answer against the offline prediction of the same diamond
+    mismatches, max_abs_error = 0, 0.0
+    for payload, _, _, _, _, content in ok:
+        prediction = json.loads(content).get("prediction")
+        if prediction is None or not math.isclose(prediction, expected[payload], rel_tol=args.tolerance, abs_tol=1e-6):
+            mismatches += 1
+        if prediction is not None:
+            max_abs_error = max(max_abs_error, abs(prediction - expected[payload]))
+
+    percentile = lambda values, q: float(np.percentile(values, q)) if values.size else None
+    statuses = {}
+    for result in results:
+        if result[4] != 200:
+            statuses[str(result[4])] = statuses.get(str(result[4]), 0) + 1
+
+    summary = {
+        "rate": rate, "requests": len(results), "ok": len(ok), "achieved_rps": len(ok) / elapsed,
+        "errors": statuses, "mismatches": mismatches, "max_abs_error": max_abs_error,
+        "p50_ms": percentile(latencies, 50), "p90_ms": percentile(latencies, 90),
+        "p99_ms": percentile(latencies, 99), "p999_ms": percentile(latencies, 99.9),
+        "max_ms": float(latencies.max()) if latencies.size else None,
+        # time spent answering alone, and the wait for a free connection of the load generator
+        "service_p99_ms": percentile(service, 99), "send_lag_p99_ms": percentile(lag, 99),
+        "histogram": {"le_ms": HISTOGRAM_EDGES_MS[:-1] + ["+Inf"],
+                      "counts": np.histogram(latencies, [0] + HISTOGRAM_EDGES_MS)[0].tolist()},
+    }
+    summary["within_slo"] = (summary["p99_ms"] is not None and summary["p99_ms"] <= args.slo_ms
+                             and len(ok) == len(results) and summary["achieved_rps"] >= 0.95 * rate)
+    return summary
+
+
+def sweep(name, host, port, bodies, expected, args):
+    rng = np.random.default_rng(args.seed)
+    client = Client(port, host)
+    for body in bodies[:args.warmup]:
+        client.post("/predict", body)
+    client.close()
+
+    results = []
+    for rate in args.rates:
+        summary = summarize(*run_rate(host, port, bodies, rate, args, rng), rate, expected, args)
+        results.append(summary)
+        fmt = lambda value: f"{value:.1f}" if value is not None else "-"
+        print(f"{name:<18}{rate:>7.0f}{summary['achieved_rps']:>10.1f}{fmt(summary['p50_ms']):>9}"
+              f"{fmt(summary['p90_ms']):>9}{fmt(summary['p99_ms']):>9}{fmt(summary['p999_ms']):>9}"
+              f"{sum(summary['errors'].values()):>8}{summary['mismatches']:>12}"
+              f"{'' if summary['within_slo'] else '  over SLO':<10}")
+        if not summary["within_slo"] and not args.full_sweep:
+            break
+
+    passing = [summary["rate"] for summary in results if summary["within_slo"]]
+    return {"server": name, "max_rate_within_slo": max(passing) if passing else None, "results": results}
+
+
+def measure(name, bodies, expected, args):
+    port = free_port()
+    env = {**os.environ, "PORT": str(port), "WEB_CONCURRENCY": str(args.workers), "MODEL_RELOAD_INTERVAL": "-1",
+           "PREDICTION_CACHE_SIZE": "0"}
+    server = subprocess.Popen(SERVERS[name](args), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_ready(server, port, bodies[0], args.timeout)
+        return sweep(name, "127.0.0.1", port, bodies, expected, args)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", nargs="+", default=list(SERVERS), choices=list(SERVERS), help="server profiles")
+    parser.add_argument("--target", help="host:port of a running server to load instead of starting the profiles")
+    parser.add_argument("--rates", type=float, nargs="+", default=[25, 50, 100, 200, 400, 800],
+                        help="arrival rates to step through, in requests per second")
+    parser.add_argument("--full-sweep", action="store_true", help="keep stepping after a rate misses the SLO")
+    parser.add_argument("--duration", type=float, default=15, help="seconds of arrivals per rate")
+    parser.add_argument("--arrivals", choices=["constant", "poisson"], default="constant",
+                        help="evenly spaced or exponentially distributed gaps between requests")
+    parser.add_argument("--slo-ms", type=float, default=100, help="p99 latency a rate must stay under")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn worker processes")
+    parser.add_argument("--threads", type=int, default=4, help="threads per gthread worker")
+    parser.add_argument("--connections", type=int, default=64,
+                        help="concurrent connections of the load generator, the most requests in flight")
+    parser.add_argument("--give-up", type=float, default=10,
+                        help="requests that could not be sent within this many seconds of schedule are dropped")
+    parser.add_argument("--payloads", type=int, default=2000, help="diamonds sampled from X_test.csv")
+    parser.add_argument("--tolerance", type=float, default=1e-6, help="relative difference from the offline prediction")
+    parser.add_argument("--warmup", type=int, default=50, help="requests sent before each sweep")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for a server to start")
+    parser.add_argument("--output", default=os.path.join("artifacts", "benchmarks", "open_loop_load.json"),
+                        help="JSON file for the results")
+    args = parser.parse_args()
+
+    bodies, expected = load_payloads(args.payloads, args.seed)
+
+    print(f"{'server':<18}{'rate':>7}{'achieved':>10}{'p50':>9}{'p90':>9}{'p99':>9}{'p99.9':>9}{'errors':>8}"
+          f"{'mismatches':>12}  (ms, req/s)")
+    if args.target:
+        host, port = args.target.rsplit(":", 1)
+        servers = [sweep(args.target, host, int(port), bodies, expected, args)]
+    else:
+        servers = [measure(name, bodies, expected, args) for name in args.servers]
+
+    print()
+    for server in servers:
+        print(f"{server['server']}: highest rate with p99 under {args.slo_ms:.0f} ms: "
+              f"{server['max_rate_within_slo'] if server['max_rate_within_slo'] is not None else 'none'} req/s")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump({"rates": args.rates, "duration": args.duration, "arrivals": args.arrivals, "slo_ms": args.slo_ms,
+                   "workers": args.workers, "threads": args.threads, "connections": args.connections,
+                   "cpu_count": os.cpu_count(), "servers": servers}, f, indent=4)
+
+    # answers that differ from the offline predictions fail the run
+    return 1 if any(summary["mismatches"] for server in servers for summary in server["results"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
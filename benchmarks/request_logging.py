@@ -0,0 +1,99 @@
+"""Logging cost per request on the prediction path, for each logging setup.
+
+Every setup runs in a fresh process that imports app (which configures
+logging from the environment) and times single /predict and /predict/batch
+requests through the Flask test client. Logs go to a temporary directory
+and stdout to a file, as in a deployment. The cost per request is the
+difference from a run with logging off. Run from the repository root after
+training:
+
+    python -m benchmarks.request_logging --requests 2000 --batch-rows 1000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+# environment of each logging setup; "sync, every line" is the old behaviour: every
+# request-level line, written by the request thread to the file and stdout
+SETUPS = {
+    "off": {"LOG_LEVEL": "ERROR"},
+    "sync, every line": {"LOG_QUEUE": "0", "REQUEST_LOG_SAMPLE_RATE": "1",
+                         "LOG_MODULE_LEVELS": "prediction_pipeline=DEBUG"},
+    "queue, every line": {"LOG_QUEUE": "1", "REQUEST_LOG_SAMPLE_RATE": "1",
+                          "LOG_MODULE_LEVELS": "prediction_pipeline=DEBUG"},
+    "queue, sampled": {"LOG_QUEUE": "1", "REQUEST_LOG_SAMPLE_RATE": "0.01"},
+}
+
+RECORD = {"carat": 0.7, "cut": "Ideal", "color": "G", "clarity": "VS2", "depth": 61.5, "table": 56.0,
+          "x": 5.7, "y": 5.72, "z": 3.51}
+
+
+def run_worker(n_requests, batch_rows, output):
+    import app
+    client = app.app.test_client()
+    batch = [RECORD] * batch_rows
+
+    timings = {}
+    for path, body, n in [("/predict", RECORD, n_requests), ("/predict/batch", batch, max(n_requests // 20, 10))]:
+        for _ in range(20):
+            client.post(path, json=body)
+
+        start = time.perf_counter()
+        for _ in range(n):
+            response = client.post(path, json=body)
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}")
+        timings[path] = (time.perf_counter() - start) / n
+
+    with open(output, "w") as f:
+        json.dump(timings, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="single predictions per setup")
+    parser.add_argument("--batch-rows", type=int, default=1000, help="diamonds per /predict/batch request")
+    parser.add_argument("--output", default=os.path.join("artifacts", "benchmarks", "request_logging.json"),
+                        help="JSON file for the results")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return run_worker(args.requests, args.batch_rows, args.worker)
+
+    results = []
+    print(f"{'setup':<20}{'/predict us':>13}{'logging us':>12}{'/predict/batch ms':>19}{'logging ms':>12}")
+    for name, setup in SETUPS.items():
+        with tempfile.TemporaryDirectory() as log_dir:
+            env = {**os.environ, **setup, "LOG_DIR": log_dir, "MODEL_RELOAD_INTERVAL": "-1",
+                   "PREDICTION_CACHE_SIZE": "0", "MICRO_BATCHING": "0"}
+            timings_path = os.path.join(log_dir, "timings.json")
+            with open(os.path.join(log_dir, "stdout.log"), "w") as stdout:
+                subprocess.run([sys.executable, "-m", "benchmarks.request_logging", "--worker", timings_path,
+                                "--requests", str(args.requests), "--batch-rows", str(args.batch_rows)],
+                               env=env, stdout=stdout, check=True)
+            with open(timings_path) as f:
+                timings = json.load(f)
+            log_bytes = sum(os.path.getsize(os.path.join(log_dir, log_name)) for log_name in ("running_logs.log", "stdout.log")
+                            if os.path.exists(os.path.join(log_dir, log_name)))
+
+        result = {"setup": name, "env": setup, "single_seconds": timings["/predict"],
+                  "batch_seconds": timings["/predict/batch"], "log_bytes": log_bytes}
+        off = results[0] if results else result
+        result["single_logging_seconds"] = result["single_seconds"] - off["single_seconds"]
+        result["batch_logging_seconds"] = result["batch_seconds"] - off["batch_seconds"]
+        results.append(result)
+        print(f"{name:<20}{result['single_seconds'] * 1e6:>13.1f}{result['single_logging_seconds'] * 1e6:>12.1f}"
+              f"{result['batch_seconds'] * 1e3:>19.2f}{result['batch_logging_seconds'] * 1e3:>12.2f}")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump({"requests": args.requests, "batch_rows": args.batch_rows, "results": results}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Latency and throughput of the Flask, gunicorn and ASGI deployments under load.
+
+Starts each server on a free port, then keeps --concurrency clients busy
+for --duration seconds. Each client sends its next request as soon as the
+previous one is answered. A --batch-fraction of the requests are
+/predict/batch calls of --batch-rows diamonds, the slow requests that hold a
+synchronous worker, and the rest are single /predict calls. Reports p50/p99
+latency per request kind, requests per second and rejected (503) requests.
+Run from the repository root after training:
+
+    python -m benchmarks.serving_load --servers flask gunicorn asgi --workers 2 --concurrency 32
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import subprocess
+import http.client
+import numpy as np
+import pandas as pd
+
+# command line of each deployment, given the port and worker count
+SERVERS = {
+    "flask": lambda port, workers: [sys.executable, "app.py"],
+    "gunicorn": lambda port, workers: [sys.executable, "-m", "gunicorn", "app:app", "-c", "gunicorn.conf.py"],
+    "asgi": lambda port, workers: [sys.executable, "-m", "hypercorn", "asgi:app", "--bind", f"127.0.0.1:{port}",
+                                   "--workers", str(workers)],
+}
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Client:
+    """One keep-alive connection, reopened whenever the server closes it."""
+
+    def __init__(self, port, host="127.0.0.1"):
+        self.port = port
+        self.host = host
+        self.connection = None
+
+    def post(self, path, body):
+        return self.post_read(path, body)[0]
+
+    # method to post a JSON body and return the status and the response body
+    def post_read(self, path, body):
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=120)
+            try:
+                self.connection.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+                response = self.connection.getresponse()
+                content = response.read()
+                if response.getheader("Connection", "").lower() == "close":
+                    self.close()
+                return response.status, content
+            except (http.client.HTTPException, ConnectionError):
+                self.close()
+                if attempt:
+                    raise
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+        self.connection = None
+
+
+def wait_until_ready(server, port, body, timeout):
+    deadline = time.monotonic() + timeout
+    client = Client(port)
+    while True:
+        try:
+            if client.post("/predict", body) == 200:
+                client.close()
+                return
+        except OSError:
+            client.close()
+        if server.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError(f"server did not start on port {port}")
+        time.sleep(0.5)
+
+
+def run_clients(port, single_body, batch_body, args):
+    samples = []
+    lock = threading.Lock()
+    stop_at = time.monotonic() + args.warmup + args.duration
+    measure_from = time.monotonic() + args.warmup
+
+    def client_loop(seed):
+        rng = np.random.default_rng(seed)
+        client = Client(port)
+        local = []
+        while True:
+            kind = "batch" if rng.random() < args.batch_fraction else "single"
+            start = time.monotonic()
+            if start >= stop_at:
+                break
+            try:
+                status = client.post("/predict/batch" if kind == "batch" else "/predict",
+                                     batch_body if kind == "batch" else single_body)
+            except OSError:
+                status = 0
+            if start >= measure_from:
+                local.append((kind, status, time.monotonic() - start))
+        client.close()
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=client_loop, args=(seed,)) for seed in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def summarize(samples, duration):
+    ok = [(kind, seconds) for kind, status, seconds in samples if status == 200]
+    result = {"requests": len(samples), "ok": len(ok), "rps": len(ok) / duration,
+              "rejected": sum(status == 503 for _, status, _ in samples),
+              "errors": sum(status not in (200, 503) for _, status, _ in samples)}
+    for kind in ("single", "batch"):
+        latencies = np.array([seconds for k, seconds in ok if k == kind]) * 1000
+        result[kind] = {"count": int(latencies.size),
+                        "p50_ms": float(np.percentile(latencies, 50)) if latencies.size else None,
+                        "p99_ms": float(np.percentile(latencies, 99)) if latencies.size else None}
+    return result
+
+
+def measure(name, args, single_body, batch_body):
+    port = free_port()
+    env = {**os.environ, "PORT": str(port), "WEB_CONCURRENCY": str(args.workers), "MODEL_RELOAD_INTERVAL": "-1",
+           "PREDICTION_CACHE_SIZE": "0"}
+    server = subprocess.Popen(SERVERS[name](port, args.workers), env=env, stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL)
+    try:
+        wait_until_ready(server, port, single_body, args.timeout)
+        samples = run_clients(port, single_body, batch_body, args)
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {"server": name, **summarize(samples, args.duration)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", nargs="+", default=list(SERVERS), choices=list(SERVERS), help="deployments")
+    parser.add_argument("--workers", type=int, default=2, help="worker processes for gunicorn and hypercorn")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=20, help="measured seconds per server")
+    parser.add_argument("--warmup", type=float, default=3, help="unmeasured seconds before each run")
+    parser.add_argument("--batch-fraction", type=float, default=0.05, help="share of /predict/batch requests")
+    parser.add_argument("--batch-rows", type=int, default=2000, help="diamonds per /predict/batch request")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for a server to start")
+    parser.add_argument("--output", default=os.path.join("artifacts", "benchmarks", "serving_load.json"),
+                        help="JSON file for the results")
+    args = parser.parse_args()
+
+    X_test = pd.read_csv(os.path.join("artifacts", "data_transformation", "X_test.csv"), nrows=args.batch_rows)
+    records = X_test.to_dict(orient="records")
+    single_body, batch_body = json.dumps(records[0]), json.dumps(records)
+
+    results = []
+    print(f"{'server':<10}{'req/s':>8}{'single p50':>12}{'single p99':>12}{'batch p50':>11}{'batch p99':>11}"
+          f"{'rejected':>10}{'errors':>8}  (ms)")
+    for name in args.servers:
+        result = measure(name, args, single_body, batch_body)
+        results.append(result)
+        fmt = lambda value: f"{value:.1f}" if value is not None else "-"
+        print(f"{name:<10}{result['rps']:>8.1f}{fmt(result['single']['p50_ms']):>12}{fmt(result['single']['p99_ms']):>12}"
+              f"{fmt(result['batch']['p50_ms']):>11}{fmt(result['batch']['p99_ms']):>11}{result['rejected']:>10}"
+              f"{result['errors']:>8}")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump({"workers": args.workers, "concurrency": args.concurrency, "duration": args.duration,
+                   "batch_fraction": args.batch_fraction, "batch_rows": args.batch_rows,
+                   "cpu_count": os.cpu_count(), "results": results}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Per-request latency of single predictions: separate scaler and encoder with pandas, and the fused model.
+
+The separate path is how a diamond used to be served: a one-row DataFrame
+through StandardScaler.transform and OrdinalEncoder.transform, stacked and
+scored. The fused path is PredictionPipeline.predict_records, which writes
+the features and the prediction into reused buffers. Run from the repository
+root after training:
+
+    python -m benchmarks.single_prediction
+"""
+import logging
+import argparse
+import joblib
+import numpy as np
+import pandas as pd
+from mlProject import logger
+from mlProject.pipeline.prediction_pipeline import PredictionPipeline, get_artifact_paths, INPUT_COLS
+from benchmarks.flat_forest import time_call
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=2000, help="timed requests per path")
+    args = parser.parse_args()
+
+    paths = get_artifact_paths()
+    scaler, encoder = joblib.load(paths['scaler']), joblib.load(paths['encoder'])
+    pipeline = PredictionPipeline()
+    X_test = pd.read_csv("artifacts/data_transformation/X_test.csv")
+    records = X_test[INPUT_COLS].to_dict(orient='records')
+
+    def separate_transform(data):
+        return np.hstack([scaler.transform(data[list(scaler.feature_names_in_)]),
+                          encoder.transform(data[list(encoder.feature_names_in_)])])
+
+    # every path must produce the same features and predictions for every held-out row
+    expected = separate_transform(X_test).astype(np.float32)
+    by_record = np.vstack([pipeline.transform_record(record).copy() for record in records])
+    by_column = pipeline.data_transform(X_test)
+    predictions = pipeline.predict(expected)
+    out = np.empty(len(records))
+    identical = (np.array_equal(expected, by_record) and np.array_equal(expected, by_column)
+                 and np.array_equal(predictions, pipeline.predict_records(records, out=out)))
+    print(f"identical features and predictions on {len(records)} test rows: {identical}")
+
+    # keep log I/O out of the comparison
+    logger.setLevel(logging.WARNING)
+
+    record = records[0]
+    prediction = np.empty(1)
+
+    def separate_record_transform():
+        return separate_transform(pd.DataFrame([[record[col] for col in INPUT_COLS]], columns=INPUT_COLS))
+
+    cases = [
+        ("transform", separate_record_transform, lambda: pipeline.transform_record(record)),
+        ("transform+predict", lambda: pipeline.predict(separate_record_transform()),
+         lambda: pipeline.predict_records([record], out=prediction)),
+    ]
+
+    print(f"{'case':<20}{'separate (us)':>16}{'fused (us)':>13}{'speedup':>10}")
+    for name, before, after in cases:
+        before_seconds = time_call(before, args.repeats)
+        after_seconds = time_call(after, args.repeats)
+        print(f"{name:<20}{before_seconds * 1e6:>16.1f}{after_seconds * 1e6:>13.1f}{before_seconds / after_seconds:>9.1f}x")
+
+    if not identical:
+        raise SystemExit("the fused model differs from the separate scaler and encoder")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Cold start of a serving worker: time from `import app` to the first prediction.
+
+Every run is a fresh interpreter, so nothing is cached in the process.
+It imports app, lists the heavy or training-only modules the import pulled
+in, then posts one diamond to /predict through the Flask test client, which
+loads the model. Run from the repository root after training:
+
+    python -m benchmarks.startup --repeats 5
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# model loading modes: PredictionPipeline settings
+MODES = {
+    "joblib": {"MODEL_MMAP": "0"},
+    "mmap": {"MODEL_MMAP": "1"},
+}
+
+# modules a serving worker should not import before its first request
+HEAVY_MODULES = ["pandas", "sklearn", "scipy", "joblib", "mlflow", "box", "ensure", "yaml",
+                 "mlProject.utils.common", "mlProject.config.configuration", "mlProject.components.model_trainer",
+                 "mlProject.components.model_evaluation", "mlProject.components.data_transformation"]
+
+RECORD = {"carat": 0.7, "cut": "Ideal", "color": "G", "clarity": "VS2", "depth": 61.5, "table": 56.0,
+          "x": 5.7, "y": 5.72, "z": 3.51}
+
+
+def run_worker():
+    import time
+    start = time.perf_counter()
+    import app
+    imported = time.perf_counter()
+    loaded_at_import = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    response = app.app.test_client().post("/predict", json=RECORD)
+    predicted = time.perf_counter()
+    if response.status_code != 200:
+        raise RuntimeError(f"/predict returned {response.status_code}: {response.get_data(as_text=True)}")
+
+    print(json.dumps({"import_seconds": imported - start, "first_prediction_seconds": predicted - imported,
+                      "total_seconds": predicted - start, "loaded_at_import": loaded_at_import,
+                      "prediction": response.get_json()["prediction"]}))
+
+
+def measure(mode, repeats):
+    env = {**os.environ, **MODES[mode], "MODEL_RELOAD_INTERVAL": "-1", "PREDICTION_CACHE_SIZE": "0",
+           "MICRO_BATCHING": "0"}
+    runs = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, "-m", "benchmarks.startup", "--worker"], env=env, check=True,
+                                capture_output=True, text=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    median = lambda key: statistics.median(run[key] for run in runs)
+    return {"mode": mode, "repeats": repeats, "import_seconds": median("import_seconds"),
+            "first_prediction_seconds": median("first_prediction_seconds"), "total_seconds": median("total_seconds"),
+            "loaded_at_import": runs[0]["loaded_at_import"], "prediction": runs[0]["prediction"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=5, help="fresh processes per mode, the median is reported")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES), help="model loading modes")
+    parser.add_argument("--output", default=os.path.join("artifacts", "benchmarks", "startup.json"),
+                        help="JSON file for the results")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return run_worker()
+
+    results = []
+    print(f"{'mode':<8}{'import s':>10}{'first prediction s':>20}{'total s':>10}  heavy modules after import")
+    for mode in args.modes:
+        result = measure(mode, args.repeats)
+        results.append(result)
+        print(f"{mode:<8}{result['import_seconds']:>10.3f}{result['first_prediction_seconds']:>20.3f}"
+              f"{result['total_seconds']:>10.3f}  {', '.join(result['loaded_at_import']) or 'none'}")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""Benchmark suite: every main.py stage and the prediction pipeline, on synthetic datasets of several sizes.
+
+For each --rows size a synthetic diamonds dataset (benchmarks.synthetic) is
+zipped and placed in a scratch workspace with a copy of config/config.yaml,
+params.yaml and schema.yaml. Then every main.py stage runs there in a fresh
+process, so wall time, peak RSS (the stage's process and, separately, any
+worker processes it started) and the size of the artifacts it wrote belong
+to that stage alone. The trained model is then timed on single diamonds and
+on 1k and 100k-row batches (p50/p99 latency and rows per second).
+
+Results are written to JSON and compared with a stored baseline. A metric
+that is worse than the baseline by more than its threshold is a regression
+and the command exits with status 1. Timings vary more from run to run than
+memory and artifact sizes, so they get the looser --time-threshold. Run
+from the repository root:
+
+    python -m benchmarks.suite --rows 54000 1000000 --save-baseline
+    python -m benchmarks.suite --rows 54000 1000000
+    python -m benchmarks.suite --compare artifacts/benchmarks/suite.json --baseline old_suite.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import zipfile
+import argparse
+import platform
+import resource
+import subprocess
+import numpy as np
+from pathlib import Path
+from benchmarks.synthetic import synthetic_dataset
+
+# diamonds per inference request kind; single diamonds go through predict_records, batches through predict_batch
+INFERENCE_SIZES = {"single": 1, "batch_1000": 1_000, "batch_100000": 100_000}
+
+# metrics where a larger value is better, every other metric is a cost
+HIGHER_IS_BETTER = ("rows_per_second",)
+
+# timing metrics, compared with the timing threshold
+TIMINGS = ("seconds", "_ms", "rows_per_second")
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def run_stage(stage_name, output):
+    """runs one main.py stage in the current directory and writes its wall time and peak RSS to output"""
+    from main import STAGES
+
+    pipeline = dict(STAGES)[stage_name]()
+    # what the interpreter and the imports take before the stage starts
+    start_rss_mb = peak_rss_mb()
+    start = time.perf_counter()
+    pipeline.main()
+    seconds = time.perf_counter() - start
+
+    with open(output, "w") as f:
+        json.dump({"seconds": seconds, "start_rss_mb": start_rss_mb, "peak_rss_mb": peak_rss_mb(),
+                   "children_peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN)}, f)
+
+
+def time_requests(fn, requests, repeats):
+    """calls fn on each request in turn until repeats calls are made, returns the per-call seconds"""
+    for request in requests[:5]:
+        fn(request)
+
+    seconds = np.empty(repeats)
+    for i in range(repeats):
+        request = requests[i % len(requests)]
+        start = time.perf_counter()
+        fn(request)
+        seconds[i] = time.perf_counter() - start
+    return seconds
+
+
+def run_inference(data_path, output, repeats):
+    """times the prediction pipeline of the current directory's artifacts and writes the results to output"""
+    import pandas as pd
+    from mlProject.pipeline.prediction_pipeline import PredictionPipeline, INPUT_COLS
+
+    start = time.perf_counter()
+    pipeline = PredictionPipeline()
+    result = {"load_seconds": time.perf_counter() - start}
+
+    rows = pd.read_csv(data_path, nrows=max(INFERENCE_SIZES.values()))[INPUT_COLS]
+    for name, size in INFERENCE_SIZES.items():
+        if size == 1:
+            records = rows.head(1000).to_dict('records')
+            seconds = time_requests(lambda record: pipeline.predict_records([record]),
+                                    records, repeats)
+        else:
+            # smaller datasets are resampled up to the batch size
+            batch = rows.sample(size, replace=len(rows) < size, random_state=0).reset_index(drop=True)
+            seconds = time_requests(pipeline.predict_batch, [batch], max(3, repeats * 10 // size))
+
+        result[name] = {"p50_ms": 1e3 * float(np.percentile(seconds, 50)),
+                        "p99_ms": 1e3 * float(np.percentile(seconds, 99)),
+                        "rows_per_second": size * len(seconds) / float(seconds.sum())}
+
+    result["peak_rss_mb"] = peak_rss_mb()
+    with open(output, "w") as f:
+        json.dump(result, f)
+
+
+# method to record the size and modification time of every file under a directory
+def file_state(root):
+    state = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            stat = os.stat(path)
+            state[path] = (stat.st_size, stat.st_mtime_ns)
+    return state
+
+
+def dataset_zip(n_rows):
+    """zipped synthetic dataset for the ingestion stage, cached next to the CSV"""
+    csv_path = synthetic_dataset(n_rows)
+    zip_path = os.path.splitext(csv_path)[0] + ".zip"
+    if not os.path.exists(zip_path):
+        with zipfile.ZipFile(f"{zip_path}.tmp", "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zip_file:
+            zip_file.write(csv_path, arcname="diamonds.csv")
+        os.replace(f"{zip_path}.tmp", zip_path)
+    return csv_path, zip_path
+
+
+def prepare_workspace(workdir, zip_path):
+    """fresh copy of the configuration, with the dataset zip where the ingestion stage looks for it"""
+    from mlProject.utils.common import read_yaml
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    os.makedirs(workdir)
+    shutil.copytree("config", os.path.join(workdir, "config"))
+    for filename in ["params.yaml", "schema.yaml"]:
+        shutil.copy(filename, workdir)
+
+    config = read_yaml(Path(workdir, "config", "config.yaml"))
+    local_data_file = os.path.join(workdir, config.data_ingestion.local_data_file)
+    os.makedirs(os.path.dirname(local_data_file), exist_ok=True)
+    try:
+        os.link(zip_path, local_data_file)
+    except OSError:
+        shutil.copy(zip_path, local_data_file)
+
+
+def run_worker(workdir, *args):
+    """runs this module with args in workdir and returns the JSON the worker wrote"""
+    output = os.path.join(os.path.abspath(workdir), "result.json")
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([os.getcwd(), os.environ.get("PYTHONPATH", "")])}
+    subprocess.run([sys.executable, "-m", "benchmarks.suite", *args, "--output", output], cwd=workdir, env=env, check=True)
+    with open(output) as f:
+        result = json.load(f)
+    os.remove(output)
+    return result
+
+
+def run_dataset(n_rows, stage_names, workdir, repeats):
+    csv_path, zip_path = dataset_zip(n_rows)
+    prepare_workspace(workdir, zip_path)
+    artifacts_dir = os.path.join(workdir, "artifacts")
+
+    result = {"rows": n_rows, "csv_mb": os.path.getsize(csv_path) / 2**20, "stages": {}}
+    for stage_name in stage_names:
+        before = file_state(artifacts_dir)
+        stage = run_worker(workdir, "--stage-worker", stage_name)
+        after = file_state(artifacts_dir)
+
+        # files the stage created or rewrote
+        stage["artifact_mb"] = sum(size for path, (size, mtime) in after.items() if before.get(path) != (size, mtime)) / 2**20
+        result["stages"][stage_name] = stage
+        print(f"{n_rows:>10}  {stage_name:<30}{stage['seconds']:>9.2f}s{stage['peak_rss_mb']:>9.0f} MB"
+              f"{stage['children_peak_rss_mb']:>9.0f} MB{stage['artifact_mb']:>10.1f} MB")
+
+    result["inference"] = run_worker(workdir, "--inference-worker", os.path.abspath(csv_path), "--repeats", str(repeats))
+    for name in INFERENCE_SIZES:
+        timing = result["inference"][name]
+        print(f"{n_rows:>10}  {'inference ' + name:<30}{timing['p50_ms']:>9.3f} ms p50{timing['p99_ms']:>9.3f} ms p99"
+              f"{timing['rows_per_second']:>12.0f} rows/s")
+    return result
+
+
+def flatten(suite):
+    """returns {"<rows> rows / <stage or request kind> / <metric>": value} for every metric of a suite run"""
+    metrics = {}
+    for dataset in suite["datasets"]:
+        for stage_name, stage in dataset["stages"].items():
+            for metric, value in stage.items():
+                metrics[f"{dataset['rows']} rows / {stage_name} / {metric}"] = value
+        for name, timing in dataset["inference"].items():
+            if isinstance(timing, dict):
+                for metric, value in timing.items():
+                    metrics[f"{dataset['rows']} rows / inference {name} / {metric}"] = value
+            else:
+                metrics[f"{dataset['rows']} rows / inference / {name}"] = timing
+    return metrics
+
+
+def compare(suite, baseline, threshold, time_threshold, min_seconds):
+    """prints every metric next to the baseline and returns the ones that regressed by more than their threshold"""
+    current, previous = flatten(suite), flatten(baseline)
+    regressions = []
+    print(f"\n{'metric':<72}{'baseline':>12}{'current':>12}{'change':>9}")
+    for key, value in current.items():
+        base = previous.get(key)
+        if base is None:
+            continue
+
+        change = (value - base) / base if base else 0.0
+        worse = -change if key.endswith(HIGHER_IS_BETTER) else change
+        # stages that take no time in either run are all noise
+        negligible = key.endswith("/ seconds") and max(value, base) < min_seconds
+        flag = ""
+        if worse > (time_threshold if key.endswith(TIMINGS) else threshold) and not negligible:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<72}{base:>12.4g}{value:>12.4g}{change:>+9.1%}{flag}")
+
+    missing = sorted(set(previous) - set(current))
+    if missing:
+        print(f"{len(missing)} baseline metrics were not measured in this run")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[54_000, 1_000_000],
+                        help="synthetic dataset sizes, up to 10000000")
+    parser.add_argument("--stages", nargs="+", help="main.py stages to run (default: all)")
+    parser.add_argument("--repeats", type=int, default=2000, help="single predictions timed per dataset")
+    parser.add_argument("--workdir", default=os.path.join("artifacts", "benchmarks", "suite_workspace"),
+                        help="scratch directory the stages run in, replaced for every dataset")
+    parser.add_argument("--output", default=os.path.join("artifacts", "benchmarks", "suite.json"),
+                        help="JSON file for the results")
+    parser.add_argument("--baseline", default=os.path.join("artifacts", "benchmarks", "suite_baseline.json"),
+                        help="results to compare against, when the file exists")
+    parser.add_argument("--save-baseline", action="store_true", help="also store the results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative change of memory or artifact size counted as a regression")
+    parser.add_argument("--time-threshold", type=float, default=0.25,
+                        help="relative change of a timing counted as a regression")
+    parser.add_argument("--min-seconds", type=float, default=0.5,
+                        help="stage times below this in both runs are not compared")
+    parser.add_argument("--compare", help="compare this results file with the baseline instead of running")
+    parser.add_argument("--stage-worker", help=argparse.SUPPRESS)
+    parser.add_argument("--inference-worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.stage_worker:
+        return run_stage(args.stage_worker, args.output)
+    if args.inference_worker:
+        return run_inference(args.inference_worker, args.output, args.repeats)
+
+    if args.compare:
+        with open(args.compare) as f:
+            suite = json.load(f)
+    else:
+        from main import STAGES
+        stage_names = args.stages or [name for name, _ in STAGES]
+
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+        suite = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": commit or None, "python": platform.python_version(),
+                 "platform": platform.platform(), "cpu_count": os.cpu_count(), "datasets": []}
+        print(f"{'rows':>10}  {'stage':<30}{'wall':>10}{'peak RSS':>12}{'workers':>12}{'artifacts':>13}")
+        for n_rows in args.rows:
+            suite["datasets"].append(run_dataset(n_rows, stage_names, args.workdir, args.repeats))
+        shutil.rmtree(args.workdir, ignore_errors=True)
+
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(suite, f, indent=4)
+        if args.save_baseline:
+            shutil.copy(args.output, args.baseline)
+            print(f"baseline saved to {args.baseline}")
+            return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}, run with --save-baseline to store one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(suite, baseline, args.threshold, args.time_threshold, args.min_seconds)
+    print(f"\n{len(regressions)} regressions against {args.baseline}"
+          f" (commit {baseline.get('commit')})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
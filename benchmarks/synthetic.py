@@ -0,0 +1,72 @@
+"""Synthetic diamonds datasets of any size, resampled from the real one.
+
+Rows are drawn with replacement from the ingested CSV and jittered, so the
+column distributions and the carat/size/price relationships are preserved:
+
+    python -m benchmarks.synthetic --rows 10000000 --out artifacts/benchmarks/diamonds_10000000.csv
+"""
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+SOURCE_PATH = os.path.join("artifacts", "data_ingestion", "diamonds.csv")
+
+def generate_diamonds(n_rows, path, source_path=SOURCE_PATH, seed=0, chunk_rows=1_000_000):
+    """writes a synthetic diamonds CSV
+
+    Args:
+        n_rows (int): rows to generate
+        path (str): output CSV path
+        source_path (str, optional): real dataset to resample. Defaults to SOURCE_PATH.
+        seed (int, optional): random seed. Defaults to 0.
+        chunk_rows (int, optional): rows generated and written at a time. Defaults to 1_000_000.
+
+    Returns:
+        str: path of the written CSV
+    """
+    source = pd.read_csv(source_path)
+    rng = np.random.default_rng(seed)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    for start in range(0, n_rows, chunk_rows):
+        size = min(chunk_rows, n_rows - start)
+        chunk = source.iloc[rng.integers(0, len(source), size)].reset_index(drop=True)
+
+        # one size factor per diamond: carat and price scale with it, dimensions with its cube root
+        factor = np.exp(rng.normal(0.0, 0.02, size))
+        chunk['carat'] = np.round(chunk['carat'] * factor, 2).clip(lower=0.2)
+        for col in ['x', 'y', 'z']:
+            chunk[col] = np.round(chunk[col] * np.cbrt(factor), 2)
+        chunk['price'] = np.round(chunk['price'] * factor).astype(np.int64)
+        chunk['depth'] = np.round(chunk['depth'] + rng.normal(0.0, 0.2, size), 1)
+        chunk['table'] = np.round(chunk['table'] + rng.normal(0.0, 0.5, size), 1)
+
+        chunk.to_csv(tmp_path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+
+    os.replace(tmp_path, path)
+    return path
+
+
+def synthetic_dataset(n_rows):
+    """path of a cached synthetic dataset under artifacts/benchmarks/, generated on first use"""
+    path = os.path.join("artifacts", "benchmarks", f"diamonds_{n_rows}.csv")
+    if not os.path.exists(path):
+        print(f"generating {n_rows} synthetic rows at {path}")
+        generate_diamonds(n_rows, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, required=True, help="rows to generate")
+    parser.add_argument("--out", required=True, help="output CSV path")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(generate_diamonds(args.rows, args.out, seed=args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Per-worker memory of gunicorn with private, preloaded and memory-mapped models.
+
+Starts `gunicorn app:app` with gunicorn.conf.py for every loading mode and
+worker count, sends batch predictions so each worker touches the model,
+then reads every worker's RSS, PSS (shared pages split between the
+processes sharing them) and private memory from /proc. Run from the
+repository root after training (Linux only):
+
+    python -m benchmarks.worker_memory --workers 1 4 16
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+# model loading modes: gunicorn.conf.py and PredictionPipeline settings
+MODES = {
+    "private": {"GUNICORN_PRELOAD": "0", "MODEL_MMAP": "0"},
+    "preload": {"GUNICORN_PRELOAD": "1", "MODEL_MMAP": "0"},
+    "mmap": {"GUNICORN_PRELOAD": "0", "MODEL_MMAP": "1"},
+    "preload+mmap": {"GUNICORN_PRELOAD": "1", "MODEL_MMAP": "1"},
+}
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def memory_mb(pid):
+    """RSS, PSS and private memory of a process, in MB"""
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        fields = {line.split(":")[0]: int(line.split()[1]) for line in f if line.split()[-1] == "kB"}
+
+    return {"rss_mb": fields["Rss"] / 1024, "pss_mb": fields["Pss"] / 1024,
+            "private_mb": (fields["Private_Clean"] + fields["Private_Dirty"]) / 1024}
+
+
+def post(url, payload):
+    request = urllib.request.Request(url, data=payload, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return response.status
+
+
+def measure(mode, n_workers, payload, requests_per_worker, timeout):
+    port = free_port()
+    env = {**os.environ, **MODES[mode], "WEB_CONCURRENCY": str(n_workers), "PORT": str(port),
+           "MODEL_RELOAD_INTERVAL": "-1", "PREDICTION_CACHE_SIZE": "0"}
+    server = subprocess.Popen([sys.executable, "-m", "gunicorn", "app:app", "-c", "gunicorn.conf.py"], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}/predict/batch"
+
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            with open(f"/proc/{server.pid}/task/{server.pid}/children") as f:
+                workers = [int(pid) for pid in f.read().split()]
+            try:
+                if len(workers) == n_workers and post(url, payload) == 200:
+                    break
+            except OSError:
+                pass
+            if server.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError(f"gunicorn did not start ({mode}, {n_workers} workers)")
+            time.sleep(0.5)
+
+        # concurrent requests spread over the workers, so every one of them walks the forest
+        with ThreadPoolExecutor(max_workers=2 * n_workers) as executor:
+            list(executor.map(lambda _: post(url, payload), range(requests_per_worker * n_workers)))
+
+        per_worker = [memory_mb(pid) for pid in workers]
+        master = memory_mb(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+    mean = lambda key: sum(w[key] for w in per_worker) / len(per_worker)
+    return {"mode": mode, "workers": n_workers, "worker_rss_mb": mean("rss_mb"), "worker_pss_mb": mean("pss_mb"),
+            "worker_private_mb": mean("private_mb"), "master_pss_mb": master["pss_mb"],
+            "total_pss_mb": master["pss_mb"] + sum(w["pss_mb"] for w in per_worker)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16], help="gunicorn worker counts")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES), help="model loading modes")
+    parser.add_argument("--rows", type=int, default=256, help="diamonds per warm-up request")
+    parser.add_argument("--requests-per-worker", type=int, default=8, help="warm-up requests per worker")
+    parser.add_argument("--timeout", type=float, default=300, help="seconds to wait for the workers to start")
+    parser.add_argument("--output", default=os.path.join("artifacts", "benchmarks", "worker_memory.json"),
+                        help="JSON file for the results")
+    args = parser.parse_args()
+
+    X_test = pd.read_csv(os.path.join("artifacts", "data_transformation", "X_test.csv"), nrows=args.rows)
+    payload = json.dumps(X_test.to_dict(orient="records")).encode()
+
+    results = []
+    print(f"{'mode':<14}{'workers':>8}{'RSS/worker':>12}{'PSS/worker':>12}{'private/worker':>16}{'total PSS':>11}  (MB)")
+    for mode in args.modes:
+        for n_workers in args.workers:
+            result = measure(mode, n_workers, payload, args.requests_per_worker, args.timeout)
+            results.append(result)
+            print(f"{mode:<14}{n_workers:>8}{result['worker_rss_mb']:>12.1f}{result['worker_pss_mb']:>12.1f}"
+                  f"{result['worker_private_mb']:>16.1f}{result['total_pss_mb']:>11.1f}")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
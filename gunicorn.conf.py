@@ -0,0 +1,30 @@
+"""gunicorn settings, picked up from the working directory by `gunicorn app:app`.
+
+With preload_app the app and its model registry are loaded once in the
+master, before the workers are forked, so every worker shares the model's
+pages copy-on-write. With MODEL_MMAP=1 the flat forest is memory mapped
+instead, so workers (and reloads after a retraining) share it through the
+page cache even without preloading.
+"""
+import os
+import gc
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8080)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1').lower() in ('1', 'true', 'yes')
+
+
+def when_ready(server):
+    # runs in the master once the app is imported, before any worker is forked
+    if preload_app:
+        from mlProject.pipeline.model_registry import model_registry
+        model_registry.get()
+
+        # the collector never visits the objects loaded so far, so it does not write to (and un-share) their pages
+        gc.freeze()
+
+
+def post_worker_init(worker):
+    # the model is loaded before the first request; a no-op when the master preloaded it
+    from mlProject.pipeline.model_registry import model_registry
+    model_registry.get()
@@ -1,68 +1,50 @@
-from mlProject import logger
+import sys
+from mlProject import logger, setup_logging
 from mlProject.pipeline.data_ingestion_pipeline import DataIngestionPipeline
 from mlProject.pipeline.data_validation_pipeline import DataValidationPipeline
 from mlProject.pipeline.data_transformation_pipeline import DataTransformationPipeline
+from mlProject.pipeline.hyperparameter_search_pipeline import HyperparameterSearchPipeline
 from mlProject.pipeline.model_trainer_pipeline import ModelTrainerPipeline
+from mlProject.pipeline.model_compaction_pipeline import ModelCompactionPipeline
+from mlProject.pipeline.model_packaging_pipeline import ModelPackagingPipeline
 from mlProject.pipeline.model_evaluation_pipeline import ModelEvaluationPipeline
-
-logger.info("Welcome to Diamond Price Prediction Project!")
-
-STAGE_NAME = "Data Ingestion Stage"
-
-try:
-    logger.info(f">>>>>> {STAGE_NAME} started <<<<<<")
-    data_ingestion = DataIngestionPipeline()
-    data_ingestion.main()
-    logger.info(f">>>>>> {STAGE_NAME} completed <<<<<<")
-
-except Exception as e:
-    logger.exception(e)
-    raise e
-
-STAGE_NAME = "Data Validation Stage"
-
-try:
-    logger.info(f">>>>>> {STAGE_NAME} started <<<<<<")
-    data_validation = DataValidationPipeline()
-    data_validation.main()
-    logger.info(f">>>>>> {STAGE_NAME} completed <<<<<<")
-
-except Exception as e:
-    logger.exception(e)
-    raise e
-
-STAGE_NAME = "Data Transformation Stage"
-
-try:
-    logger.info(f">>>>>> {STAGE_NAME} started <<<<<<")
-    data_transformation = DataTransformationPipeline()
-    data_transformation.main()
-    logger.info(f">>>>>> {STAGE_NAME} completed <<<<<<")
-
-except Exception as e:
-    logger.exception(e)
-    raise e
-
-STAGE_NAME = "Model Trainer Stage"
-
-try:
-    logger.info(f">>>>>> {STAGE_NAME} started <<<<<<")
-    model_trainer = ModelTrainerPipeline()
-    model_trainer.main()
-    logger.info(f">>>>>> {STAGE_NAME} completed <<<<<<")
-
-except Exception as e:
-    logger.exception(e)
-    raise e
-
-STAGE_NAME = "Model Evaluation Stage"
-
-try:
-    logger.info(f">>>>>> {STAGE_NAME} started <<<<<<")
-    model_evaluation = ModelEvaluationPipeline()
-    model_evaluation.main()
-    logger.info(f">>>>>> {STAGE_NAME} completed <<<<<<")
-
-except Exception as e:
-    logger.exception(e)
-    raise e
\ No newline at end of file
+from mlProject.pipeline.quote_grid_pipeline import QuoteGridPipeline
+from mlProject.pipeline.model_registry import publish_artifacts, read_version_stamp
+from mlProject.pipeline.training_jobs import training_lock
+from mlProject.pipeline.stage_cache import StageRunner
+
+STAGES = [
+    ("Data Ingestion Stage", DataIngestionPipeline),
+    ("Data Validation Stage", DataValidationPipeline),
+    ("Data Transformation Stage", DataTransformationPipeline),
+    ("Hyperparameter Search Stage", HyperparameterSearchPipeline),
+    ("Model Trainer Stage", ModelTrainerPipeline),
+    ("Model Compaction Stage", ModelCompactionPipeline),
+    ("Model Packaging Stage", ModelPackagingPipeline),
+    ("Model Evaluation Stage", ModelEvaluationPipeline),
+    ("Quote Grid Stage", QuoteGridPipeline),
+]
+
+# importable without side effects, so tools such as benchmarks.suite can reuse STAGES
+if __name__ == "__main__":
+    setup_logging()
+    logger.info("Welcome to Diamond Price Prediction Project!")
+
+    # stages write to artifacts/ under the training lock, serving only reads the snapshot published at the end
+    with training_lock():
+        # stages whose inputs and params are unchanged are skipped, pass --no-cache to rerun everything
+        stage_runner = StageRunner(use_cache="--no-cache" not in sys.argv)
+
+        for STAGE_NAME, stage_pipeline in STAGES:
+            try:
+                stage_runner.run(STAGE_NAME, stage_pipeline())
+
+            except Exception as e:
+                logger.exception(e)
+                raise e
+
+        stage_runner.log_summary()
+
+        # every stage succeeded, publish the new artifacts as the version to serve
+        if stage_runner.ran_any or read_version_stamp() is None:
+            publish_artifacts()
@@ -1,24 +1,65 @@
 # imports
 import os
 import sys
+import atexit
 import logging
 
 # logging for errors
 logging_str = "[%(asctime)s: %(levelname)s: %(module)s: %(message)s]"
 
-log_dir = "logs"
+log_dir = os.environ.get("LOG_DIR", "logs")
 log_filepath = os.path.join(log_dir,"running_logs.log")
-os.makedirs(log_dir, exist_ok=True)
 
-logging.basicConfig(
-    level= logging.INFO,
-    format= logging_str,
+# background writer of queued records, started by setup_logging
+log_writer = None
 
-    handlers=[
+# method to send logs to logs/running_logs.log and stdout, called by the entry points
+# (main.py, app.py) rather than on import, so importing the package has no side effects
+def setup_logging(level=None):
+    """configures the root logger from the environment
+
+    LOG_LEVEL sets the level (default INFO) and LOG_MODULE_LEVELS overrides it
+    per module, e.g. "prediction_pipeline=DEBUG,app=WARNING". Unless LOG_QUEUE=0,
+    records are queued and written by a background thread, so callers never
+    wait on the file or stdout.
+
+    Args:
+        level (int, optional): level of every module without an override. Defaults to LOG_LEVEL.
+    """
+    global log_writer
+    if logging.getLogger().handlers:
+        # already configured, like logging.basicConfig
+        return
+
+    from mlProject.utils.log_handlers import BackgroundLogWriter, ModuleLevelFilter, parse_module_levels
+
+    if level is None:
+        level = logging.getLevelName(os.environ.get("LOG_LEVEL", "INFO").upper())
+    module_levels = parse_module_levels(os.environ.get("LOG_MODULE_LEVELS", ""))
+
+    os.makedirs(log_dir, exist_ok=True)
+    handlers = [
         logging.FileHandler(log_filepath),
         logging.StreamHandler(sys.stdout)
     ]
-)
+    for handler in handlers:
+        handler.setFormatter(logging.Formatter(logging_str))
+
+    if os.environ.get("LOG_QUEUE", "1").lower() in ("1", "true", "yes"):
+        if log_writer is None:
+            log_writer = BackgroundLogWriter(handlers)
+            atexit.register(log_writer.stop)
+        # records are queued unformatted, the writer thread formats them
+        handlers = [log_writer.queue_handler]
+
+    # filtered before queueing, so records of muted modules cost nothing more
+    for handler in handlers:
+        handler.addFilter(ModuleLevelFilter(module_levels, level))
+
+    logging.basicConfig(level= level, handlers= handlers)
+
+    # the shared logger must let through the most verbose module level
+    logger.setLevel(min([level, *module_levels.values()]))
 
 # we can call logger anywhere by just importing it
-logger = logging.getLogger("mlProjectLogger")
\ No newline at end of file
+logger = logging.getLogger("mlProjectLogger")
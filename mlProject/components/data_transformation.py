@@ -1,106 +1,238 @@
 import os
 import joblib
+import numpy as np
+from pathlib import Path
 from mlProject import logger
+from mlProject.utils.common import save_array, ArrayAppender
 import pandas as pd
+from pandas.api.types import union_categoricals
 from sklearn.model_selection import train_test_split
 # for numerical data
 from sklearn.preprocessing import StandardScaler
 # for categorical data
 from sklearn.preprocessing import OrdinalEncoder
 from mlProject.entity.config_entity import DataTransformationConfig
+from mlProject.constants import ORDINAL_CATEGORIES as CATEGORIES, OUTLIER_BOUNDS, COMPARISONS
 
 class DataTransformation:
-    def __init__(self, config: DataTransformationConfig):
-        self.config = config
+    """Outlier removal, train/test split, scaling and encoding in one pass.
 
-    # outlier handling method
-    def remove_outliers(self):
-        df = pd.read_csv(self.config.data_path)
+    The CSV is read once, in chunks, with categories parsed as pandas
+    categoricals; outlier rows are dropped from each chunk with a single
+    boolean mask. The split shuffles row positions, so the train and test
+    matrices are gathered straight from the kept columns without
+    intermediate DataFrames.
 
-        # acc to experiments, these are the outliers
-        df = df.loc[df['x'] > 3]
-        df = df.loc[df['y'] < 15]
-        df = df.loc[df['z'] < 10]
-        df = df.loc[df['z'] > 2]
+    With `chunked` set (out-of-core mode) nothing is kept across chunks:
+    rows are split by a hash of their values, the scaler is fitted with
+    partial_fit and the matrices are appended to their .npy files.
+    """
 
-        return df
-    
-    # Segregate method
-    def data_segregation(self):
-        df = self.remove_outliers()
+    def __init__(self, config: DataTransformationConfig):
+        self.config = config
 
-        # inputs (x)
-        X = df.drop([self.config.target_column], axis=1)
+    # read method, returns the kept rows as one array (or Categorical) per column
+    def read_data(self):
+        numeric, categorical, n_rows = {}, {}, 0
+        for chunk in pd.read_csv(self.config.data_path, dtype={col: 'category' for col in CATEGORIES},
+                                 chunksize=self.config.chunk_rows):
+            mask = self.outlier_mask(chunk)
+            n_kept = int(mask.sum())
 
-        # output (y), squeezing it to ensure 1D Series
-        y = df[self.config.target_column].squeeze()
+            for col in chunk.columns:
+                if col in CATEGORIES:
+                    categorical.setdefault(col, []).append(chunk[col].array[mask])
+                    continue
 
-        return X, y
-    
-    # train test split method
-    def get_train_test_split(self):
-        X, y = self.data_segregation()
+                values = chunk[col].to_numpy()
+                buffer = numeric.get(col)
+                dtype = values.dtype if buffer is None else np.result_type(buffer, values)
 
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.25, random_state=0)
+                # grown geometrically; pages past n_rows are never written, so the slack costs no memory
+                if buffer is None or len(buffer) < n_rows + n_kept or buffer.dtype != dtype:
+                    grown = np.empty(max(n_rows + n_kept, 2 * n_rows), dtype=dtype)
+                    if buffer is not None:
+                        grown[:n_rows] = buffer[:n_rows]
+                    numeric[col] = buffer = grown
 
-        return X_train, X_test, y_train, y_test
-    
-    # Transformation method
-    def get_transformed(self):
-        X_train, X_test, y_train, y_test = self.get_train_test_split()
+                buffer[n_rows:n_rows + n_kept] = values[mask]
+            n_rows += n_kept
 
-        # diamond quality, low to high (ordinals)
-        cut_categories = ['Fair', 'Good', 'Very Good', 'Premium', 'Ideal']
-        color_categories = ['J', 'I', 'H', 'G', 'F', 'E', 'D']
-        clarity_categories = ['I1', 'SI2', 'SI1', 'VS2', 'VS1', 'VVS2', 'VVS1', 'IF']
-        
+        return {col: union_categoricals(categorical[col]) if col in CATEGORIES else numeric[col][:n_rows]
+                for col in chunk.columns}
+
+    # outlier handling method
+    def outlier_mask(self, df):
+        # acc to experiments, these are the outliers (x > 3, y < 15, 2 < z < 10 are kept)
+        mask = np.ones(len(df), dtype=bool)
+        for col, bounds in OUTLIER_BOUNDS.items():
+            values = df[col].to_numpy()
+            for op, bound in bounds.items():
+                mask &= COMPARISONS[op](values, bound)
+        return mask
+
+    # train test split method, on row positions
+    def get_train_test_split(self, n_rows):
+        train_rows, test_rows = train_test_split(np.arange(n_rows), test_size=0.25, random_state=0)
+
+        return train_rows, test_rows
+
+    # method to map a categorical column to the fitted encoder's codes
+    def encode_column(self, encoder, column: pd.Categorical, j, rows, out):
+        # run the encoder once on every category seen in the file, plus NaN for missing values (code -1)
+        levels = list(column.categories) + [np.nan]
+        probe = pd.DataFrame({col: [categories[0]] * len(levels)
+                              for col, categories in zip(encoder.feature_names_in_, encoder.categories_)})
+        probe[encoder.feature_names_in_[j]] = levels
+        lookup = encoder.transform(probe)[:, j]
+
+        np.take(lookup, column.codes[rows], out=out)
+
+    # method to gather the feature matrix of the given rows
+    def gather_features(self, columns, num_cols, encoder, rows):
+        cat_cols = list(encoder.feature_names_in_)
+
+        # column-major, so every column is filled and scaled contiguously
+        X = np.empty((len(rows), len(num_cols) + len(cat_cols)), dtype=np.float64, order='F')
+
+        for j, col in enumerate(num_cols):
+            values = columns[col]
+            if values.dtype == X.dtype:
+                # rows are always in range, 'clip' lets numpy write into X without a buffer
+                np.take(values, rows, out=X[:, j], mode='clip')
+            else:
+                X[:, j] = values[rows]
+
+        for j, col in enumerate(cat_cols, start=len(num_cols)):
+            self.encode_column(encoder, columns[col], j - len(num_cols), rows, out=X[:, j])
+
+        return X
+
+    # method to build the scaler and the fitted encoder
+    def get_scaler_and_encoder(self, cat_cols):
         # adjust Scaler and Encoder
         std_scaler = StandardScaler()
-        ordinal_encoder = OrdinalEncoder(categories=[cut_categories, color_categories, clarity_categories],  
+        ordinal_encoder = OrdinalEncoder(categories=[CATEGORIES[col] for col in cat_cols],
                                  handle_unknown="use_encoded_value",
-                                 unknown_value=-1, 
+                                 unknown_value=-1,
                                  encoded_missing_value=-5)
-        
-        # train transformation
-        X_train_num = X_train.select_dtypes(include=['int64', 'float64'])
-        X_train_cat = X_train.select_dtypes(include=['object'])
-
-        X_train_num_transformed = pd.DataFrame(std_scaler.fit_transform(X_train_num),
-                                      columns = std_scaler.get_feature_names_out(),
-                                      index = X_train_num.index)
-        
-        X_train_cat_transformed = pd.DataFrame(ordinal_encoder.fit_transform(X_train_cat),
-                                      columns = ordinal_encoder.get_feature_names_out(),
-                                      index = X_train_cat.index)
-        
-        # Concatenate
-        X_train_transformed = pd.concat([X_train_num_transformed, X_train_cat_transformed], axis=1)
-
-        # test transformation
-        X_test_num = X_test.select_dtypes(include=['int64', 'float64'])
-        X_test_cat = X_test.select_dtypes(include=['object'])
-
-        X_test_num_transformed = pd.DataFrame(std_scaler.transform(X_test_num), 
-                                   columns = std_scaler.get_feature_names_out(), 
-                                   index = X_test_num.index)
-
-        X_test_cat_transformed = pd.DataFrame(ordinal_encoder.transform(X_test_cat), 
-                                   columns = ordinal_encoder.get_feature_names_out(), 
-                                   index = X_test_cat.index)
-        
-        # Concatenate
-        X_test_transformed = pd.concat([X_test_num_transformed, X_test_cat_transformed], axis=1)
-
-        # save csv
-        X_train_transformed.to_csv(os.path.join(self.config.root_dir, "X_train_transformed.csv"), index=False)
-        y_train.to_csv(os.path.join(self.config.root_dir, "y_train.csv"), index=False)
-
-        X_test_transformed.to_csv(os.path.join(self.config.root_dir, "X_test_transformed.csv"), index=False)
-        y_test.to_csv(os.path.join(self.config.root_dir, "y_test.csv"), index=False)
+
+        # with fixed categories the fitted encoder only depends on the column names,
+        # so it is fitted on the category levels rather than on every row
+        longest = max(len(CATEGORIES[col]) for col in cat_cols)
+        ordinal_encoder.fit(pd.DataFrame({col: [CATEGORIES[col][i % len(CATEGORIES[col])] for i in range(longest)]
+                                          for col in cat_cols}))
+
+        return std_scaler, ordinal_encoder
+
+    # Transformation method
+    def get_transformed(self):
+        if self.config.chunked:
+            return self.get_transformed_chunked()
+
+        columns = self.read_data()
+
+        target = self.config.target_column
+        y = columns[target]
+        train_rows, test_rows = self.get_train_test_split(len(y))
+
+        num_cols = [col for col in columns if col != target and col not in CATEGORIES]
+        cat_cols = [col for col in columns if col in CATEGORIES]
+        n_num = len(num_cols)
+
+        std_scaler, ordinal_encoder = self.get_scaler_and_encoder(cat_cols)
+
+        X_train = self.gather_features(columns, num_cols, ordinal_encoder, train_rows)
+        X_test = self.gather_features(columns, num_cols, ordinal_encoder, test_rows)
+
+        # the scaler sees the numeric block of X_train through a DataFrame view, to record feature names
+        std_scaler.fit(pd.DataFrame(X_train[:, :n_num], columns=num_cols, copy=False))
+
+        # same arithmetic as StandardScaler.transform, applied in place
+        for X in (X_train, X_test):
+            X[:, :n_num] -= std_scaler.mean_
+            X[:, :n_num] /= std_scaler.scale_
+
+        feature_names = list(std_scaler.get_feature_names_out()) + list(ordinal_encoder.get_feature_names_out())
+
+        # save binary arrays for the next stages (CSV copies only on request)
+        save_array(Path(os.path.join(self.config.root_dir, "X_train_transformed.npy")), X_train, columns=feature_names, export_csv=self.config.export_csv)
+        save_array(Path(os.path.join(self.config.root_dir, "y_train.npy")), y[train_rows], columns=[target], export_csv=self.config.export_csv)
+
+        save_array(Path(os.path.join(self.config.root_dir, "X_test_transformed.npy")), X_test, columns=feature_names, export_csv=self.config.export_csv)
+        save_array(Path(os.path.join(self.config.root_dir, "y_test.npy")), y[test_rows], columns=[target], export_csv=self.config.export_csv)
+
+        # raw test rows stay CSV, they are mixed-type and read by people and benchmarks
+        X_test_raw = pd.DataFrame({col: values[test_rows] for col, values in columns.items() if col != target})
+        X_test_raw.to_csv(os.path.join(self.config.root_dir, "X_test.csv"), index=False)
 
         # Save the fitted scaler and encoder for future use (e.g., during prediction)
         joblib.dump(std_scaler, os.path.join(self.config.root_dir, 'scaler.pkl'))
         joblib.dump(ordinal_encoder, os.path.join(self.config.root_dir, 'encoder.pkl'))
 
-        logger.info(f"X train transformed size: {X_train_transformed.shape}, y train size:{y_train.shape}")
-        logger.info(f"X test transformed size: {X_test_transformed.shape}, y test size: {y_test.shape}")
\ No newline at end of file
+        logger.info(f"X train transformed size: {X_train.shape}, y train size:{train_rows.shape}")
+        logger.info(f"X test transformed size: {X_test.shape}, y test size: {test_rows.shape}")
+
+    # split method for out-of-core runs, a row's side depends only on its own values
+    def hash_split(self, chunk, kept):
+        # numbers are hashed as float64, so a value hashes the same whatever dtype its chunk was parsed as
+        numeric = {col: np.float64 for col in chunk.columns if col not in CATEGORIES}
+        hashes = pd.util.hash_pandas_object(chunk.iloc[kept].astype(numeric), index=False).to_numpy()
+
+        is_test = hashes % 1_000_000 < self.config.test_fraction * 1_000_000
+        return kept[~is_test], kept[is_test]
+
+    # out-of-core Transformation method, only one chunk of the CSV is in memory at a time
+    def get_transformed_chunked(self):
+        target = self.config.target_column
+        root_dir = self.config.root_dir
+        writers = {}
+
+        chunks = pd.read_csv(self.config.data_path, dtype={col: 'category' for col in CATEGORIES},
+                             chunksize=self.config.chunk_rows)
+        for i, chunk in enumerate(chunks):
+            if i == 0:
+                num_cols = [col for col in chunk.columns if col != target and col not in CATEGORIES]
+                cat_cols = [col for col in chunk.columns if col in CATEGORIES]
+                n_num = len(num_cols)
+                std_scaler, ordinal_encoder = self.get_scaler_and_encoder(cat_cols)
+
+                # targets are float64 so a chunk with a missing price cannot change the dtype midway
+                for name in ["train", "test"]:
+                    writers[f"X_{name}"] = ArrayAppender(Path(os.path.join(root_dir, f"X_{name}_transformed.npy")),
+                                                         np.float64, (n_num + len(cat_cols),), num_cols + cat_cols)
+                    writers[f"y_{name}"] = ArrayAppender(Path(os.path.join(root_dir, f"y_{name}.npy")),
+                                                         np.float64, columns=[target])
+
+            train_rows, test_rows = self.hash_split(chunk, np.flatnonzero(self.outlier_mask(chunk)))
+            columns = {col: chunk[col].array if col in CATEGORIES else chunk[col].to_numpy() for col in chunk.columns}
+
+            for name, rows in [("train", train_rows), ("test", test_rows)]:
+                X = self.gather_features(columns, num_cols, ordinal_encoder, rows)
+                if name == "train" and len(rows):
+                    std_scaler.partial_fit(pd.DataFrame(X[:, :n_num], columns=num_cols, copy=False))
+                writers[f"X_{name}"].append(X)
+                writers[f"y_{name}"].append(columns[target][rows])
+
+            # raw test rows stay CSV, they are mixed-type and read by people and benchmarks
+            chunk.iloc[test_rows].drop(columns=[target]).to_csv(os.path.join(root_dir, "X_test.csv"), index=False,
+                                                                 mode='w' if i == 0 else 'a', header=i == 0)
+
+        paths = {name: writer.close() for name, writer in writers.items()}
+
+        # the scaler is only complete after the last chunk, so the written matrices are scaled in place
+        # (re-mapped per block, so only one block of the file stays resident)
+        for name in ["X_train", "X_test"]:
+            for start in range(0, writers[name].n_rows, self.config.chunk_rows):
+                X = np.load(paths[name], mmap_mode='r+')
+                X[start:start + self.config.chunk_rows, :n_num] -= std_scaler.mean_
+                X[start:start + self.config.chunk_rows, :n_num] /= std_scaler.scale_
+                X.flush()
+                del X
+
+        # Save the fitted scaler and encoder for future use (e.g., during prediction)
+        joblib.dump(std_scaler, os.path.join(root_dir, 'scaler.pkl'))
+        joblib.dump(ordinal_encoder, os.path.join(root_dir, 'encoder.pkl'))
+
+        logger.info(f"X train transformed size: ({writers['X_train'].n_rows}, {n_num + len(cat_cols)}), "
+                    f"X test transformed size: ({writers['X_test'].n_rows}, {n_num + len(cat_cols)})")
@@ -0,0 +1,226 @@
+import json
+import numpy as np
+from mlProject import logger
+from mlProject.utils.npz import load_npz_mmap
+
+class FlatForest:
+    """A fitted tree ensemble flattened into contiguous NumPy arrays.
+
+    All trees are concatenated into one set of node arrays (feature,
+    threshold, left, right, value) with `tree_offsets` pointing at each
+    root. Leaves are stored as self-loops, and a batch is walked one level
+    at a time for every (tree, row) cursor that has not reached a leaf.
+
+    Predictions are bit-identical to sklearn's RandomForestRegressor:
+    inputs are compared as float32 like sklearn's trees do, and the tree
+    outputs are summed in estimator order before dividing by the count.
+    `meta` is a JSON-serializable dict stored alongside the arrays.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, tree_offsets, n_features, max_depth, meta=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.tree_offsets = tree_offsets
+        self.n_features = int(n_features)
+        self.max_depth = int(max_depth)
+        self.meta = meta or {}
+
+    @property
+    def n_trees(self):
+        return len(self.tree_offsets)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.left, self.right, self.value, self.tree_offsets))
+
+    def head(self, n_trees):
+        """returns a forest of the first n_trees trees, sharing this forest's arrays
+
+        Args:
+            n_trees (int): trees to keep
+
+        Returns:
+            FlatForest: forest whose nodes are a prefix of these node arrays
+        """
+        end = self.tree_offsets[n_trees] if n_trees < self.n_trees else self.n_nodes
+        return FlatForest(self.feature[:end], self.threshold[:end], self.left[:end], self.right[:end],
+                          self.value[:end], self.tree_offsets[:n_trees], self.n_features, self.max_depth, self.meta)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """flattens a fitted single-output forest (or a single tree)
+
+        Args:
+            model: fitted RandomForestRegressor, ExtraTreesRegressor or DecisionTreeRegressor
+
+        Returns:
+            FlatForest: flattened copy of the model
+        """
+        estimators = getattr(model, 'estimators_', [model])
+
+        features, thresholds, lefts, rights, values, offsets = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            if tree.n_outputs != 1:
+                raise ValueError("FlatForest only supports single-output regressors")
+
+            node_ids = np.arange(tree.node_count, dtype=np.int64) + offset
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold).astype(np.float64))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset).astype(np.int32))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset).astype(np.int32))
+            values.append(tree.value[:, 0, 0].astype(np.float64))
+            offsets.append(offset)
+
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        if offset > np.iinfo(np.int32).max:
+            raise ValueError("Forest has too many nodes for int32 indices")
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features)),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds)),
+            left=np.ascontiguousarray(np.concatenate(lefts)),
+            right=np.ascontiguousarray(np.concatenate(rights)),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            tree_offsets=np.asarray(offsets, dtype=np.int64),
+            n_features=estimators[0].n_features_in_,
+            max_depth=max_depth
+        )
+
+    # method to get the named arrays save writes, so other artifacts can embed a forest
+    def to_arrays(self) -> dict:
+        return {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'left': self.left,
+            'right': self.right,
+            'value': self.value,
+            'tree_offsets': self.tree_offsets,
+            'n_features': np.int64(self.n_features),
+            'max_depth': np.int64(self.max_depth),
+            'meta': np.array(json.dumps(self.meta))
+        }
+
+    def save(self, path):
+        np.savez(path, **self.to_arrays())
+        logger.info(f"Flat forest with {self.n_trees} trees and {self.n_nodes} nodes saved at: {path}")
+
+    @classmethod
+    def load(cls, path, mmap=False):
+        """loads a forest written by save
+
+        Args:
+            path (str): .npz file
+            mmap (bool, optional): memory map the node arrays instead of reading them, so every
+                process serving the same file shares one copy in the page cache. Defaults to False.
+
+        Returns:
+            FlatForest: the loaded forest
+        """
+        if mmap:
+            return cls._from_arrays(load_npz_mmap(path))
+
+        with np.load(path) as data:
+            return cls._from_arrays({name: data[name] for name in data.files})
+
+    @classmethod
+    def _from_arrays(cls, data):
+        return cls(
+            feature=data['feature'],
+            threshold=data['threshold'],
+            left=data['left'],
+            right=data['right'],
+            value=data['value'],
+            tree_offsets=data['tree_offsets'],
+            n_features=data['n_features'],
+            max_depth=data['max_depth'],
+            meta=json.loads(str(data['meta'])) if 'meta' in data else None
+        )
+
+    def predict(self, X, block_size=16384, out=None):
+        """scores a batch across all trees
+
+        Args:
+            X (array-like): (n_samples, n_features) transformed inputs, float32 C-contiguous inputs are not copied
+            block_size (int, optional): rows walked at once, bounds memory. Defaults to 16384.
+            out (np.ndarray, optional): float64 buffer of n_samples to write the predictions into
+
+        Returns:
+            np.ndarray: float64 predictions, one per row (out when given)
+        """
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected input of shape (n, {self.n_features}), got {X.shape}")
+
+        # sklearn's trees compare float32 inputs against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if out is None:
+            out = np.empty(X.shape[0], dtype=np.float64)
+        elif out.shape != (X.shape[0],) or out.dtype != np.float64:
+            raise ValueError(f"Expected a float64 output buffer of shape ({X.shape[0]},), got {out.dtype} {out.shape}")
+
+        for start in range(0, X.shape[0], block_size):
+            self._predict_block(X[start:start + block_size], out[start:start + block_size])
+
+        return out
+
+    def tree_predictions(self, X, block_size=16384):
+        """scores a batch with every tree separately
+
+        Args:
+            X (array-like): (n_samples, n_features) transformed inputs
+            block_size (int, optional): rows walked at once, bounds memory. Defaults to 16384.
+
+        Returns:
+            np.ndarray: (n_trees, n_samples) float64 tree outputs
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        out = np.empty((self.n_trees, X.shape[0]), dtype=np.float64)
+
+        for start in range(0, X.shape[0], block_size):
+            out[:, start:start + block_size] = self._leaf_values_block(X[start:start + block_size])
+
+        return out
+
+    def _leaf_values_block(self, X):
+        n_rows = X.shape[0]
+        flat_X = X.ravel()
+
+        # one cursor per (tree, row), all starting at the tree roots
+        nodes = np.repeat(self.tree_offsets, n_rows).astype(np.int32)
+        row_base = np.tile(np.arange(n_rows, dtype=np.int32) * self.n_features, self.n_trees)
+
+        # only advance the cursors that have not reached a leaf yet
+        active = np.flatnonzero(self.left[nodes] != nodes)
+        while active.size:
+            current = nodes[active]
+            x = flat_X[row_base[active] + self.feature[current]]
+            following = np.where(x <= self.threshold[current], self.left[current], self.right[current])
+            nodes[active] = following
+            active = active[self.left[following] != following]
+
+        return self.value[nodes].reshape(self.n_trees, n_rows)
+
+    def _predict_block(self, X, out):
+        leaf_values = self._leaf_values_block(X)
+
+        # sum in estimator order, exactly like sklearn's accumulation
+        out[:] = 0.0
+        for tree_values in leaf_values:
+            out += tree_values
+        out /= self.n_trees
+
+        return out
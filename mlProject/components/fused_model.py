@@ -0,0 +1,261 @@
+import os
+import json
+import numpy as np
+from mlProject import logger
+from mlProject.utils.lazy import LazyModule
+from mlProject.utils.npz import load_npz_mmap
+from mlProject.components.flat_forest import FlatForest
+
+# only the column-wise transform, for batches, needs pandas
+pd = LazyModule('pandas')
+
+# method to identify the exact file an artifact was built from, without reading it
+def file_stamp(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class FusedModel:
+    """Preprocessing and forest of the served model, in one object and one .npz file.
+
+    The fitted StandardScaler becomes one affine step per numeric column,
+    (x - mean) / scale, the same operations in the same order as the scaler,
+    so predictions stay bit-identical. The OrdinalEncoder becomes one
+    {category: code} lookup table per categorical column; a missing value
+    (None or NaN) is encoded as encoded_missing_value in the missing_cols,
+    the columns the encoder saw one in, and as an unknown category in the
+    others, like OrdinalEncoder. The feature order
+    is the order the scaler and encoder were fitted in (numeric columns,
+    then categorical), read from them once and stored in the artifact, so
+    serving never depends on a column list of its own.
+
+    Features are written as float32, which is what the trees compare, into
+    a caller-provided buffer when one is given; predict_records also writes
+    the predictions into a caller-provided buffer. `forest` may be None for
+    a preprocessing-only model (when the sklearn model is served instead);
+    such a model's features are asked for as float64, since models other
+    than forests (gradient boosting) compare the unrounded scaled values.
+    """
+
+    def __init__(self, numerical_cols, mean, scale, categorical_cols, categories, unknown_value=None, forest=None,
+                 encoded_missing_value=None, missing_cols=()):
+        self.numerical_cols = list(numerical_cols)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.categorical_cols = list(categorical_cols)
+        self.categories = {col: list(categories[col]) for col in self.categorical_cols}
+        self.unknown_value = None if unknown_value is None else float(unknown_value)
+        self.encoded_missing_value = None if encoded_missing_value is None else float(encoded_missing_value)
+        self.missing_cols = [col for col in self.categorical_cols if col in set(missing_cols)]
+        self.forest = forest
+
+        if forest is not None and forest.n_features != self.n_features:
+            raise ValueError(f"Forest expects {forest.n_features} features, preprocessing produces {self.n_features}")
+
+        # plain-Python copies for the per-record path
+        self._num_steps = [(col, float(m), float(sd)) for col, m, sd in zip(self.numerical_cols, self.mean, self.scale)]
+        self._cat_steps = [(j, col, {category: float(code) for code, category in enumerate(self.categories[col])},
+                            self.encoded_missing_value if col in self.missing_cols else self.unknown_value)
+                           for j, col in enumerate(self.categorical_cols, start=len(self.numerical_cols))]
+
+    @property
+    def feature_names(self):
+        return self.numerical_cols + self.categorical_cols
+
+    @property
+    def n_features(self):
+        return len(self.numerical_cols) + len(self.categorical_cols)
+
+    @property
+    def meta(self):
+        return self.forest.meta if self.forest is not None else {}
+
+    @classmethod
+    def from_sklearn(cls, scaler, encoder, forest=None):
+        """compiles a fitted StandardScaler and OrdinalEncoder, plus an optional FlatForest
+
+        Args:
+            scaler: fitted StandardScaler of the numeric columns
+            encoder: fitted OrdinalEncoder of the categorical columns
+            forest (FlatForest, optional): forest trained on the scaler's then the encoder's columns
+
+        Returns:
+            FusedModel: the compiled model
+        """
+        n_num = scaler.n_features_in_
+        numerical_cols = list(getattr(scaler, 'feature_names_in_', []))
+        categorical_cols = list(getattr(encoder, 'feature_names_in_', []))
+        if len(numerical_cols) != n_num or len(categorical_cols) != len(encoder.categories_):
+            raise ValueError("The scaler and encoder must be fitted on DataFrames, so their column names are known")
+
+        if getattr(encoder, 'handle_unknown', 'error') == 'use_encoded_value':
+            unknown_value = encoder.unknown_value
+        else:
+            unknown_value = None
+
+        # a missing value the encoder was fitted on is its last category, encoded as encoded_missing_value
+        missing_cols = [col for col, categories in zip(categorical_cols, encoder.categories_)
+                        if len(categories) and pd.isna(categories[-1])]
+
+        return cls(
+            numerical_cols=numerical_cols,
+            mean=scaler.mean_ if scaler.with_mean else np.zeros(n_num),
+            scale=scaler.scale_ if scaler.with_std else np.ones(n_num),
+            categorical_cols=categorical_cols,
+            categories={col: [str(category) for category in categories if not pd.isna(category)]
+                        for col, categories in zip(categorical_cols, encoder.categories_)},
+            unknown_value=unknown_value,
+            forest=forest,
+            encoded_missing_value=getattr(encoder, 'encoded_missing_value', None) if missing_cols else None,
+            missing_cols=missing_cols
+        )
+
+    # method to check a caller's feature buffer, or allocate one
+    def _feature_buffer(self, n_rows, out, dtype):
+        dtype = np.dtype(dtype)
+        if out is None:
+            return np.empty((n_rows, self.n_features), dtype=dtype)
+        if out.shape != (n_rows, self.n_features) or out.dtype != dtype or not out.flags.c_contiguous:
+            raise ValueError(f"Expected a C-contiguous {dtype} buffer of shape ({n_rows}, {self.n_features}), "
+                             f"got {out.dtype} {out.shape}")
+        return out
+
+    def transform_records(self, records, out=None, dtype=np.float32):
+        """transforms diamonds given as dicts, without pandas
+
+        Args:
+            records (list): dicts with the numerical_cols and categorical_cols fields
+            out (np.ndarray, optional): C-contiguous (len(records), n_features) buffer of dtype to write into
+            dtype (np.dtype, optional): float32 for a forest, float64 for other models. Defaults to float32.
+
+        Returns:
+            np.ndarray: features in training order (out when given)
+        """
+        out = self._feature_buffer(len(records), out, dtype)
+        for i, record in enumerate(records):
+            row = out[i]
+            try:
+                j = 0
+                for col, mean, scale in self._num_steps:
+                    row[j] = (float(record[col]) - mean) / scale
+                    j += 1
+
+                for j, col, codes, missing_code in self._cat_steps:
+                    value = record[col]
+                    code = codes.get(value)
+                    if code is None:
+                        missing = value is None or (isinstance(value, float) and value != value)
+                        code = missing_code if missing else self.unknown_value
+                        if code is None:
+                            raise ValueError(f"Found unknown category {value!r} in column '{col}'")
+                    row[j] = code
+            except KeyError as e:
+                raise ValueError(f"Missing required field {e}") from None
+
+        return out
+
+    def transform_columns(self, data, out=None, dtype=np.float32):
+        """transforms a batch given column-wise, e.g. a validated DataFrame
+
+        Args:
+            data (Mapping): column name -> values, numeric columns convertible to float64
+            out (np.ndarray, optional): C-contiguous (n_rows, n_features) buffer of dtype to write into
+            dtype (np.dtype, optional): float32 for a forest, float64 for other models. Defaults to float32.
+
+        Returns:
+            np.ndarray: features in training order (out when given)
+        """
+        missing_cols = [col for col in self.feature_names if col not in data]
+        if missing_cols:
+            raise ValueError(f"Missing required columns: {missing_cols}")
+
+        n_rows = len(data[self.feature_names[0]])
+        out = self._feature_buffer(n_rows, out, dtype)
+
+        # one float64 column at a time, scaled in place exactly like StandardScaler.transform
+        column = np.empty(n_rows, dtype=np.float64)
+        for j, (col, mean, scale) in enumerate(zip(self.numerical_cols, self.mean, self.scale)):
+            np.subtract(np.asarray(data[col], dtype=np.float64), mean, out=column)
+            np.divide(column, scale, out=column)
+            out[:, j] = column
+
+        for j, col, _, missing_code in self._cat_steps:
+            values = np.asarray(data[col], dtype=object)
+            codes = pd.Categorical(values, categories=self.categories[col]).codes
+            out[:, j] = codes
+            unknown = codes < 0
+            if unknown.any():
+                if missing_code is not None:
+                    missing = unknown & pd.isna(values)
+                    out[missing, j] = missing_code
+                    unknown &= ~missing
+                if unknown.any():
+                    if self.unknown_value is None:
+                        raise ValueError(f"Found unknown category {values[np.flatnonzero(unknown)[0]]!r} in column '{col}'")
+                    out[unknown, j] = self.unknown_value
+
+        return out
+
+    def predict_records(self, records, out=None, features=None):
+        """transforms and scores diamonds given as dicts
+
+        Args:
+            records (list): dicts with the input fields
+            out (np.ndarray, optional): float64 buffer of len(records) to write the predictions into
+            features (np.ndarray, optional): float32 (len(records), n_features) scratch buffer for the features
+
+        Returns:
+            np.ndarray: float64 predictions (out when given)
+        """
+        if self.forest is None:
+            raise ValueError("This model has no forest, it only transforms")
+        return self.forest.predict(self.transform_records(records, out=features), out=out)
+
+    def predict_columns(self, data, out=None, features=None):
+        """transforms and scores a batch given column-wise, see predict_records"""
+        if self.forest is None:
+            raise ValueError("This model has no forest, it only transforms")
+        return self.forest.predict(self.transform_columns(data, out=features), out=out)
+
+    def save(self, path):
+        if self.forest is None:
+            raise ValueError("Only a model with a forest can be saved")
+
+        preprocessing = {"numerical_cols": self.numerical_cols, "categorical_cols": self.categorical_cols,
+                         "categories": self.categories, "unknown_value": self.unknown_value,
+                         "encoded_missing_value": self.encoded_missing_value, "missing_cols": self.missing_cols}
+        np.savez(path, **self.forest.to_arrays(), mean=self.mean, scale=self.scale,
+                 preprocessing=np.array(json.dumps(preprocessing)))
+        logger.info(f"Fused model with {len(self.numerical_cols)} scaled and {len(self.categorical_cols)} encoded "
+                    f"columns and {self.forest.n_trees} trees saved at: {path}")
+
+    @classmethod
+    def load(cls, path, mmap=False):
+        """loads a model written by save
+
+        Args:
+            path (str): .npz file
+            mmap (bool, optional): memory map the forest arrays, see FlatForest.load. Defaults to False.
+
+        Returns:
+            FusedModel: the loaded model
+        """
+        if mmap:
+            data = load_npz_mmap(path)
+        else:
+            with np.load(path) as npz:
+                data = {name: npz[name] for name in npz.files}
+
+        preprocessing = json.loads(str(data['preprocessing']))
+        return cls(
+            numerical_cols=preprocessing['numerical_cols'],
+            mean=data['mean'],
+            scale=data['scale'],
+            categorical_cols=preprocessing['categorical_cols'],
+            categories=preprocessing['categories'],
+            unknown_value=preprocessing['unknown_value'],
+            forest=FlatForest._from_arrays(data),
+            # packages written before missing values were stored have none
+            encoded_missing_value=preprocessing.get('encoded_missing_value'),
+            missing_cols=preprocessing.get('missing_cols', [])
+        )
@@ -0,0 +1,144 @@
+import os
+import math
+import time
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from threadpoolctl import threadpool_limits
+from sklearn.model_selection import ParameterSampler
+from mlProject import logger
+from mlProject.utils.common import save_json, load_array, ArrayAppender
+from mlProject.components.model_trainer import build_model
+from mlProject.entity.config_entity import HyperparameterSearchConfig
+
+# rows gathered per write when the search matrix is built
+GATHER_ROWS = 262144
+
+# training matrix of a worker process, memory mapped from the shared search file
+_shared = {}
+
+def _init_worker(X_path, y_path):
+    _shared["X"] = np.load(X_path, mmap_mode="r")
+    _shared["y"] = np.load(y_path, mmap_mode="r")
+    # the pool already uses every core, so each trial fits on one thread
+    threadpool_limits(1)
+
+def _run_trial(model_name, params, n_rows, n_val, random_state):
+    X, y = _shared["X"], _shared["y"]
+
+    start = time.perf_counter()
+    model = build_model(model_name, params, random_state)
+    # prefixes and the tail of a memmap are views, nothing is copied to the worker
+    model.fit(X[:n_rows], y[:n_rows])
+    fit_seconds = time.perf_counter() - start
+
+    return model.score(X[-n_val:], y[-n_val:]), fit_seconds
+
+
+class HyperparameterSearch:
+    """Successive-halving search over forest and gradient-boosting hyperparameters.
+
+    Random candidates from every family of the search space are fitted on a
+    small share of the training rows; only the best 1/factor of them go on
+    to the next rung, which has factor times more rows, until the last rung
+    uses every search row. Trials run on a process pool, and the workers
+    memory map a shuffled float32 copy of the training matrix instead of
+    receiving it pickled. Each rung's rows are a prefix of that copy and the
+    validation rows are its tail.
+    """
+
+    def __init__(self, config: HyperparameterSearchConfig):
+        self.config = config
+
+    # method to write the shuffled search rows (train prefix, validation tail) shared by the workers
+    def write_search_matrix(self):
+        X_train = load_array(Path(self.config.X_train_transformed_path))
+        y_train = load_array(Path(self.config.y_train_path))
+
+        n_rows = min(len(y_train), self.config.max_rows or len(y_train))
+        rows = np.random.default_rng(self.config.random_state).permutation(len(y_train))[:n_rows]
+
+        # float32 is what the forest trains on anyway, so workers use the file without converting it
+        X_path = Path(os.path.join(self.config.root_dir, "X_search.npy"))
+        y_path = Path(os.path.join(self.config.root_dir, "y_search.npy"))
+        with ArrayAppender(X_path, np.float32, X_train.shape[1:]) as X_out, ArrayAppender(y_path, np.float64) as y_out:
+            for start in range(0, n_rows, GATHER_ROWS):
+                block = rows[start:start + GATHER_ROWS]
+                X_out.append(X_train[block])
+                y_out.append(y_train[block])
+
+        return X_path, y_path, n_rows
+
+    # method to draw the candidates, split evenly between model families
+    def get_candidates(self):
+        families = list(self.config.search_space)
+        candidates = []
+        for i, name in enumerate(families):
+            n_family = self.config.n_candidates // len(families) + (i < self.config.n_candidates % len(families))
+            sampler = ParameterSampler(self.config.search_space[name], n_family, random_state=self.config.random_state)
+            candidates += [{"model": name, "params": params} for params in sampler]
+
+        return candidates
+
+    # method to get the rows of every rung, the last rung uses all of them
+    def get_rungs(self, n_search, n_candidates):
+        factor = self.config.factor
+        n_rungs = 1 + min(int(math.log(n_candidates, factor)) if n_candidates > 1 else 0,
+                          int(math.log(max(n_search / self.config.min_rows, 1), factor)))
+
+        return [max(min(self.config.min_rows, n_search), n_search // factor ** (n_rungs - 1 - rung))
+                for rung in range(n_rungs)]
+
+    def search(self):
+        start = time.perf_counter()
+        n_jobs = self.config.n_jobs if self.config.n_jobs > 0 else os.cpu_count()
+
+        X_path, y_path, n_rows = self.write_search_matrix()
+        n_val = max(1, int(n_rows * self.config.validation_fraction))
+        n_search = n_rows - n_val
+
+        candidates = self.get_candidates()
+        rungs = self.get_rungs(n_search, len(candidates))
+        alive = list(range(len(candidates)))
+        trials = []
+
+        try:
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                     initargs=(str(X_path), str(y_path))) as executor:
+                for rung, rung_rows in enumerate(rungs):
+                    futures = {i: executor.submit(_run_trial, candidates[i]["model"], candidates[i]["params"],
+                                                  rung_rows, n_val, self.config.random_state) for i in alive}
+
+                    scores = {}
+                    for i, future in futures.items():
+                        score, fit_seconds = future.result()
+                        scores[i] = score
+                        trials.append({"candidate": i, **candidates[i], "rung": rung, "rows": rung_rows,
+                                       "r2": score, "fit_seconds": round(fit_seconds, 3)})
+
+                    # early stopping: only the best 1/factor of the candidates get more rows
+                    alive = sorted(alive, key=lambda i: -scores[i])
+                    logger.info(f"Rung {rung + 1}/{len(rungs)}: {len(alive)} candidates on {rung_rows} rows, "
+                                f"best r2 {scores[alive[0]]:.4f} ({candidates[alive[0]]['model']})")
+                    if rung < len(rungs) - 1:
+                        alive = alive[:max(1, math.ceil(len(alive) / self.config.factor))]
+        finally:
+            for path in (X_path, y_path):
+                for leftover in (path, path.with_suffix(".meta.json")):
+                    if leftover.exists():
+                        leftover.unlink()
+
+        best = {**candidates[alive[0]], "r2": scores[alive[0]], "rows": rungs[-1]}
+        save_json(path=Path(self.config.best_params_file), data=best)
+        save_json(path=Path(self.config.report_file), data={
+            "best": best,
+            "rungs": rungs,
+            "validation_rows": n_val,
+            "n_jobs": n_jobs,
+            "seconds": round(time.perf_counter() - start, 3),
+            "trials": trials
+        })
+
+        logger.info(f"Best candidate {best['model']} {best['params']}: r2 {best['r2']:.4f} "
+                    f"({len(trials)} trials in {time.perf_counter() - start:.1f}s)")
+        return best
@@ -0,0 +1,235 @@
+import time
+import heapq
+import tracemalloc
+import joblib
+import numpy as np
+from pathlib import Path
+from mlProject import logger
+from mlProject.utils.common import save_json, load_array
+from mlProject.components.flat_forest import FlatForest
+from mlProject.components.fused_model import file_stamp
+from mlProject.entity.config_entity import ModelCompactionConfig
+
+# method to get the rows a fitted tree of a bootstrap forest did not train on
+def get_out_of_bag_rows(estimator, n_rows, max_samples=None):
+    # the forest draws each tree's sample as RandomState(tree seed).randint(0, n_rows, n_bootstrap),
+    # with n_bootstrap from max_samples: every row, a fraction of them (at least one) or a count
+    if max_samples is None:
+        n_bootstrap = n_rows
+    elif isinstance(max_samples, float):
+        n_bootstrap = max(round(n_rows * max_samples), 1)
+    else:
+        n_bootstrap = max_samples
+    sampled = np.random.RandomState(estimator.random_state).randint(0, n_rows, n_bootstrap)
+    return np.flatnonzero(np.bincount(sampled, minlength=n_rows) == 0)
+
+# method to get the splits a tree keeps under the depth and leaf limits
+def get_kept_splits(tree, max_depth=None, max_leaf_nodes=None):
+    left, right = tree.children_left, tree.children_right
+    split = left != -1
+
+    # depth of every node, one tree level at a time
+    depth = np.zeros(tree.node_count, dtype=np.int64)
+    level, d = np.array([0]), 0
+    while level.size:
+        depth[level] = d
+        level = level[split[level]]
+        level = np.concatenate([left[level], right[level]])
+        d += 1
+
+    if max_depth is not None:
+        split &= depth < max_depth
+
+    if max_leaf_nodes is not None and split[0]:
+        # best first, as if the tree had been grown with max_leaf_nodes: the split that
+        # removes the most weighted impurity goes next, children become candidates
+        weighted = tree.weighted_n_node_samples * tree.impurity
+        gain = lambda node: weighted[node] - weighted[left[node]] - weighted[right[node]]
+
+        kept = np.zeros_like(split)
+        heap, n_leaves = [(-gain(0), 0)], 1
+        while heap and n_leaves < max_leaf_nodes:
+            _, node = heapq.heappop(heap)
+            kept[node] = True
+            n_leaves += 1
+            for child in (left[node], right[node]):
+                if split[child]:
+                    heapq.heappush(heap, (-gain(child), child))
+        split = kept
+
+    return split
+
+# method to round thresholds down to float32 without changing any decision
+def round_down_float32(values):
+    # sklearn compares float32 inputs, and no float32 lies between t and the largest float32 <= t
+    rounded = values.astype(np.float32)
+    above = rounded > values
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+# method to flatten a forest cut to the limits, with float32 thresholds and leaf values
+def compact_forest(model, max_depth=None, max_leaf_nodes=None):
+    features, thresholds, lefts, rights, values, offsets = [], [], [], [], [], []
+    offset, forest_depth = 0, 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        split = get_kept_splits(tree, max_depth, max_leaf_nodes)
+
+        # nodes still reachable from the root, renumbered in their original order
+        keep = np.zeros(tree.node_count, dtype=bool)
+        level, d = np.array([0]), 0
+        while level.size:
+            keep[level] = True
+            forest_depth = max(forest_depth, d)
+            level = level[split[level]]
+            level = np.concatenate([tree.children_left[level], tree.children_right[level]])
+            d += 1
+
+        nodes = np.flatnonzero(keep)
+        new_ids = np.cumsum(keep) - 1 + offset
+        is_split = split[nodes]
+
+        # internal values are the mean target of the node, so a pruned node predicts like a leaf grown there
+        features.append(np.where(is_split, tree.feature[nodes], 0))
+        thresholds.append(np.where(is_split, tree.threshold[nodes], np.inf))
+        lefts.append(np.where(is_split, new_ids[tree.children_left[nodes]], new_ids[nodes]))
+        rights.append(np.where(is_split, new_ids[tree.children_right[nodes]], new_ids[nodes]))
+        values.append(tree.value[nodes, 0, 0])
+        offsets.append(offset)
+        offset += len(nodes)
+
+    n_features = model.n_features_in_
+    return FlatForest(
+        feature=np.concatenate(features).astype(np.int16 if n_features <= np.iinfo(np.int16).max else np.int32),
+        threshold=round_down_float32(np.concatenate(thresholds)),
+        left=np.concatenate(lefts).astype(np.int32),
+        right=np.concatenate(rights).astype(np.int32),
+        value=np.concatenate(values).astype(np.float32),
+        tree_offsets=np.asarray(offsets, dtype=np.int64),
+        n_features=n_features,
+        max_depth=forest_depth
+    )
+
+# method to time a load and measure the memory it allocates
+def measure_load(load):
+    start = time.perf_counter()
+    load()
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    loaded = load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return loaded, seconds, peak / 2**20
+
+
+class ModelCompaction:
+    """Shrinks the trained forest into a compact FlatForest for serving.
+
+    Trees are cut to optional depth and leaf limits (best-first, as if grown
+    with those limits), thresholds are rounded down to float32 (lossless for
+    float32 inputs) and leaf values are stored as float32. An accuracy-versus-size
+    sweep over the first k trees then keeps the fewest trees whose RMSE on a
+    validation slice of the training rows stays within max_rmse_increase of
+    the uncompressed model. Each validation row is only scored by the trees
+    whose bootstrap sample left it out, so the trees never saw the rows they
+    are judged on. The test set is only used to report the result.
+    """
+
+    def __init__(self, config: ModelCompactionConfig):
+        self.config = config
+
+    # method to get the RMSE of the first k trees, for every k, optionally only over each row's out-of-bag trees
+    def get_rmse_curve(self, forest, X, y, out_of_bag=None, block_rows=16384):
+        squared_errors = np.zeros(forest.n_trees)
+        counts = np.arange(1, forest.n_trees + 1)[:, None]
+        for start in range(0, len(y), block_rows):
+            predictions = forest.tree_predictions(X[start:start + block_rows])
+            if out_of_bag is None:
+                running_mean = np.cumsum(predictions, axis=0) / counts
+            else:
+                mask = out_of_bag[:, start:start + block_rows]
+                running_mean = np.cumsum(predictions * mask, axis=0) / np.cumsum(mask, axis=0)
+            squared_errors += ((running_mean - y[start:start + block_rows]) ** 2).sum(axis=1)
+
+        return np.sqrt(squared_errors / len(y))
+
+    # method to get a seeded sample of the training rows, and for each tree which of them it did not train on
+    def get_validation_slice(self, model):
+        y_train = load_array(Path(self.config.y_train_path))
+        n_rows = len(y_train)
+        size = max(1, min(n_rows, int(round(n_rows * self.config.validation_fraction))))
+        rows = np.sort(np.random.default_rng(self.config.random_state).choice(n_rows, size=size, replace=False))
+
+        X_train = load_array(Path(self.config.X_train_transformed_path))
+        X_val, y_val = np.asarray(X_train[rows]), np.asarray(y_train[rows], dtype=np.float64)
+
+        # without bootstrap every tree saw every row, and chunked (warm_start) trees were grown on blocks
+        if not model.bootstrap or model.warm_start:
+            logger.warning("The trees' bootstrap samples are unknown, the tree sweep scores training rows with every tree")
+            return X_val, y_val, None
+
+        out_of_bag = np.zeros((len(model.estimators_), size), dtype=bool)
+        for i, estimator in enumerate(model.estimators_):
+            out_of_bag[i] = np.isin(rows, get_out_of_bag_rows(estimator, n_rows, model.max_samples))
+
+        # rows the first tree was not trained on have an out-of-bag prediction for every tree count
+        keep = out_of_bag[0]
+        return X_val[keep], y_val[keep], out_of_bag[:, keep]
+
+    def compact(self):
+        model_path = Path(self.config.model_path)
+        compact_path = Path(self.config.compact_model_file)
+
+        model, model_seconds, model_mb = measure_load(lambda: joblib.load(model_path))
+        if not hasattr(model, "estimators_") or not hasattr(model.estimators_[0], "tree_"):
+            logger.info(f"{type(model).__name__} is not a random forest, nothing to compact")
+            if compact_path.exists():
+                compact_path.unlink()
+            save_json(path=Path(self.config.report_file), data={"compacted": False, "model": type(model).__name__})
+            return None
+
+        X_val, y_val, out_of_bag = self.get_validation_slice(model)
+        val_rmse = float(self.get_rmse_curve(FlatForest.from_sklearn(model), X_val, y_val, out_of_bag)[-1])
+
+        forest = compact_forest(model, self.config.max_depth, self.config.max_leaf_nodes)
+        curve = self.get_rmse_curve(forest, X_val, y_val, out_of_bag)
+
+        # fewest trees within the allowed RMSE increase, every tree when none is
+        within = np.flatnonzero(curve <= val_rmse * (1 + self.config.max_rmse_increase))
+        n_trees = int(within[0]) + 1 if within.size else forest.n_trees
+        forest = forest.head(n_trees)
+
+        forest.meta = {"source_model": file_stamp(model_path)}
+        forest.save(compact_path)
+
+        # the tree count never saw the test set, so its RMSE there is an honest estimate of the cost
+        X_test = load_array(Path(self.config.X_test_transformed_path))
+        y_test = np.asarray(load_array(Path(self.config.y_test_path)), dtype=np.float64)
+        rmse = float(np.sqrt(np.mean((model.predict(X_test) - y_test) ** 2)))
+
+        compact, compact_seconds, compact_mb = measure_load(lambda: FlatForest.load(compact_path))
+        compact_rmse = float(np.sqrt(np.mean((compact.predict(X_test) - y_test) ** 2)))
+
+        report = {
+            "compacted": True,
+            "source": {"file_mb": forest.meta["source_model"]["size"] / 2**20, "load_seconds": model_seconds, "memory_mb": model_mb,
+                       "n_trees": len(model.estimators_),
+                       "n_nodes": int(sum(estimator.tree_.node_count for estimator in model.estimators_)),
+                       "rmse": rmse},
+            "compact": {"file_mb": compact_path.stat().st_size / 2**20, "load_seconds": compact_seconds,
+                        "memory_mb": compact_mb, "n_trees": compact.n_trees, "n_nodes": compact.n_nodes,
+                        "max_depth": compact.max_depth, "rmse": compact_rmse},
+            "rmse_delta": compact_rmse - rmse,
+            "limits": {"max_depth": self.config.max_depth, "max_leaf_nodes": self.config.max_leaf_nodes,
+                       "max_rmse_increase": self.config.max_rmse_increase},
+            "validation": {"rows": len(y_val), "out_of_bag": out_of_bag is not None, "rmse": val_rmse, "compact_rmse": float(curve[n_trees - 1])},
+            "sweep": [{"trees": k + 1, "validation_rmse": float(value)} for k, value in enumerate(curve)]
+        }
+        save_json(path=Path(self.config.report_file), data=report)
+
+        logger.info(f"Compacted {report['source']['n_trees']} trees / {report['source']['file_mb']:.1f} MB "
+                    f"to {compact.n_trees} trees / {report['compact']['file_mb']:.1f} MB, "
+                    f"load {model_seconds:.3f}s -> {compact_seconds:.3f}s, RMSE {rmse:.2f} -> {compact_rmse:.2f}")
+        return report
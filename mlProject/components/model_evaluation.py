@@ -1,10 +1,9 @@
 from mlProject import logger
-from mlProject.utils.common import save_json
+from mlProject.utils.common import save_json, load_json, load_array
 from mlProject.entity.config_entity import ModelEvaluationConfig
 
 import joblib
 import numpy as np
-import pandas as pd
 from pathlib import Path
 from urllib.parse import urlparse
 
@@ -26,8 +25,8 @@ class ModelEvaluation:
         return mae, mse, rmse, r2
     
     def mlflow_experiments(self):
-        X_test_transformed = pd.read_csv(self.config.X_test_transformed_path)
-        y_test = pd.read_csv(self.config.y_test_path)
+        X_test_transformed = load_array(Path(self.config.X_test_transformed_path))
+        y_test = load_array(Path(self.config.y_test_path))
 
         model = joblib.load(self.config.model_path)
 
@@ -44,6 +43,12 @@ class ModelEvaluation:
 
             # Save metrics to local JSON file
             scores = {"mae": mae, "mse": mse, "rmse": rmse, "r2": r2}
+
+            # per-trial time and validation score of the hyperparameter search, when it ran
+            if self.config.search_report_file:
+                search_report = load_json(Path(self.config.search_report_file))
+                scores["search"] = {"best": search_report.best.to_dict(), "seconds": search_report.seconds,
+                                    "trials": search_report.trials.to_list()}
             save_json(path=Path(self.config.metric_file), data=scores)
 
             # mlflow log params
@@ -0,0 +1,117 @@
+import os
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from mlProject import logger
+from mlProject.utils.common import save_json
+from mlProject.components.flat_forest import FlatForest
+from mlProject.components.fused_model import FusedModel, file_stamp
+from mlProject.entity.config_entity import ModelPackagingConfig
+
+class ModelPackaging:
+    """Packages the scaler, the encoder and the served forest into one FusedModel file.
+
+    The forest is the one serving would otherwise use: the compact forest
+    when it was built from the current model, else the flat export of the
+    model. The package records the files it was built from, so serving can
+    tell a stale package from a fresh one, and it is only written after its
+    predictions on the held-out rows match the scaler + encoder + forest
+    path bit for bit. A model that is not a forest is not packaged, but the
+    float64 features serving computes for it are checked against sklearn the
+    same way.
+    """
+
+    def __init__(self, config: ModelPackagingConfig):
+        self.config = config
+
+    # method to get the forest to package and where it came from
+    def get_forest(self):
+        source_model = file_stamp(self.config.model_path)
+        for name, path in [("compact", self.config.compact_model_file), ("flat", self.config.forest_path)]:
+            if os.path.exists(path):
+                forest = FlatForest.load(path)
+                if forest.meta.get("source_model") == source_model:
+                    return forest, name
+
+        model = joblib.load(self.config.model_path)
+        if not hasattr(model, "estimators_") or not hasattr(model.estimators_[0], "tree_"):
+            return None, type(model).__name__
+        return FlatForest.from_sklearn(model), "flat"
+
+    # method to predict the held-out rows the way serving did before packaging
+    def reference_predictions(self, scaler, encoder, model, X_test):
+        X = np.hstack([scaler.transform(X_test[list(scaler.feature_names_in_)]),
+                       encoder.transform(X_test[list(encoder.feature_names_in_)])])
+        return model.predict(X)
+
+    # method to check that serving's own preprocessing leaves the predictions of an unpackaged model unchanged
+    def verify_preprocessing(self):
+        scaler = joblib.load(self.config.scaler_path)
+        encoder = joblib.load(self.config.encoder_path)
+        model = joblib.load(self.config.model_path)
+        fused = FusedModel.from_sklearn(scaler, encoder)
+
+        X_test = pd.read_csv(self.config.test_data_path)
+        expected = self.reference_predictions(scaler, encoder, model, X_test)
+        by_column = model.predict(fused.transform_columns(X_test, dtype=np.float64))
+        by_record = model.predict(fused.transform_records(X_test.to_dict(orient="records"), dtype=np.float64))
+        if not (np.array_equal(by_column, expected) and np.array_equal(by_record, expected)):
+            raise ValueError(f"Serving's preprocessing changes the predictions of {type(model).__name__} "
+                             f"on {self.config.test_data_path}")
+        return len(X_test)
+
+    def package(self):
+        packaged_path = Path(self.config.packaged_model_file)
+
+        forest, source = self.get_forest()
+        if forest is None:
+            logger.info(f"{source} is not a random forest, nothing to package")
+            if packaged_path.exists():
+                packaged_path.unlink()
+            verified_rows = self.verify_preprocessing()
+            logger.info(f"Serving's preprocessing gives {source} identical predictions on {verified_rows} test rows")
+            report = {"packaged": False, "model": source, "verified_rows": verified_rows}
+            save_json(path=Path(self.config.report_file), data=report)
+            return report
+
+        scaler = joblib.load(self.config.scaler_path)
+        encoder = joblib.load(self.config.encoder_path)
+        fused = FusedModel.from_sklearn(scaler, encoder, forest)
+        forest.meta = {**forest.meta,
+                       "source_model": file_stamp(self.config.model_path),
+                       "source_scaler": file_stamp(self.config.scaler_path),
+                       "source_encoder": file_stamp(self.config.encoder_path),
+                       "forest": source}
+        fused.save(packaged_path)
+
+        # the file as serving loads it, against the separate scaler, encoder and forest
+        start = time.perf_counter()
+        packaged = FusedModel.load(packaged_path)
+        load_seconds = time.perf_counter() - start
+
+        X_test = pd.read_csv(self.config.test_data_path)
+        expected = self.reference_predictions(scaler, encoder, forest, X_test)
+        by_column = packaged.predict_columns(X_test)
+        by_record = packaged.predict_records(X_test.to_dict(orient="records"))
+        if not (np.array_equal(by_column, expected) and np.array_equal(by_record, expected)):
+            packaged_path.unlink()
+            raise ValueError(f"Packaged model predictions differ from the scaler, encoder and forest on "
+                             f"{self.config.test_data_path}, {packaged_path} was not written")
+
+        report = {
+            "packaged": True,
+            "forest": source,
+            "features": packaged.feature_names,
+            "n_trees": packaged.forest.n_trees,
+            "n_nodes": packaged.forest.n_nodes,
+            "file_mb": packaged_path.stat().st_size / 2**20,
+            "load_seconds": load_seconds,
+            "verified_rows": len(X_test)
+        }
+        save_json(path=Path(self.config.report_file), data=report)
+
+        logger.info(f"Packaged {source} forest ({report['n_trees']} trees) with the scaler and encoder into "
+                    f"{packaged_path} ({report['file_mb']:.1f} MB), identical on {len(X_test)} test rows")
+        return report
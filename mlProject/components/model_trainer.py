@@ -2,22 +2,98 @@ import os
 from mlProject import logger
 from mlProject.config.configuration import ModelTrainerConfig
 
-import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
+from pathlib import Path
+from mlProject.utils.common import load_array, load_json, iter_array_blocks, get_array_blocks
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
 import joblib
+from joblib import parallel_backend
+from mlProject.components.flat_forest import FlatForest
+from mlProject.components.fused_model import file_stamp
+
+# model families the hyperparameter search can pick from
+MODELS = {
+    "RandomForestRegressor": RandomForestRegressor,
+    "HistGradientBoostingRegressor": HistGradientBoostingRegressor
+}
+
+# method to build an unfitted model of a family
+def build_model(model_name, params, random_state):
+    return MODELS[model_name](**params, random_state=random_state)
+
 
 class ModelTrainer:
     def __init__(self, config: ModelTrainerConfig):
         self.config = config
 
+    # method to get the unfitted model, from the searched hyperparameters when there are any
+    def get_model(self):
+        if self.config.best_params_file:
+            best = load_json(Path(self.config.best_params_file))
+            model = build_model(best.model, best.params.to_dict(), self.config.random_state)
+            # gradient boosting has no n_jobs, it uses every core through OpenMP
+            if "n_jobs" in model.get_params():
+                model.set_params(n_jobs=self.config.n_jobs)
+            return model
+
+        return RandomForestRegressor(n_estimators=self.config.n_estimators, random_state=self.config.random_state,
+                                     n_jobs=self.config.n_jobs, max_samples=self.config.max_samples,
+                                     max_features=self.config.max_features)
+
+    # out-of-core training method, only one block of rows is in memory at a time
+    def fit_chunked(self):
+        n_rows = len(load_array(Path(self.config.y_train_path)))
+        n_chunks = len(get_array_blocks(n_rows, self.config.chunk_rows, seed=self.config.random_state))
+
+        # warm_start keeps the trees grown so far, so every fit adds trees grown on the next block only;
+        # max_leaf_nodes bounds the size of each tree
+        model = self.get_model()
+        n_estimators = model.n_estimators
+        model.set_params(n_estimators=0, warm_start=True, max_leaf_nodes=self.config.max_leaf_nodes)
+
+        # the training rows keep the source file order, which may be sorted (diamonds.csv is sorted by price),
+        # so each block is drawn from random row groups of the whole file; X and y share the seed
+        blocks = zip(iter_array_blocks(Path(self.config.X_train_transformed_path), self.config.chunk_rows, seed=self.config.random_state),
+                     iter_array_blocks(Path(self.config.y_train_path), self.config.chunk_rows, seed=self.config.random_state))
+        for i, (X_block, y_block) in enumerate(blocks):
+            # the trees split exactly, the first n_estimators % n_chunks blocks grow one more
+            n_trees = n_estimators // n_chunks + (i < n_estimators % n_chunks)
+            if not n_trees:
+                continue
+            model.set_params(n_estimators=model.n_estimators + n_trees)
+            model.fit(X_block, y_block)
+            logger.info(f"Trained chunk {i + 1}/{n_chunks}: {len(model.estimators_)} trees")
+
+        return model
+
     def train(self):
-        X_train_transformed = pd.read_csv(self.config.X_train_transformed_path)
-        y_train = pd.read_csv(self.config.y_train_path)
+        # the forest fits its trees in parallel through joblib, on the configured backend
+        with parallel_backend(self.config.backend, n_jobs=self.config.n_jobs):
+            if self.config.chunked:
+                model = self.fit_chunked()
+            else:
+                # memory mapped, nothing is parsed or copied until the model converts it
+                X_train_transformed = load_array(Path(self.config.X_train_transformed_path))
+                y_train = load_array(Path(self.config.y_train_path))
 
-        model = RandomForestRegressor(n_estimators=self.config.n_estimators, random_state=self.config.random_state)
+                model = self.get_model()
 
-        # train the model
-        model.fit(X_train_transformed, y_train.values.ravel())
+                # train the model
+                model.fit(X_train_transformed, y_train)
+
+        # parallelism is a training setting, serving predicts on one thread per request as before
+        if "n_jobs" in model.get_params():
+            model.set_params(n_jobs=None)
 
         # save the model
-        joblib.dump(model, os.path.join(self.config.root_dir, self.config.model_name))
\ No newline at end of file
+        model_path = os.path.join(self.config.root_dir, self.config.model_name)
+        joblib.dump(model, model_path)
+
+        # export the flattened forest used by the fast inference engine (forests only)
+        forest_path = os.path.join(self.config.root_dir, "forest.npz")
+        if isinstance(model, RandomForestRegressor):
+            flat_forest = FlatForest.from_sklearn(model)
+            # lets serving check the forest against model.joblib without unpickling it
+            flat_forest.meta = {"source_model": file_stamp(model_path)}
+            flat_forest.save(forest_path)
+        elif os.path.exists(forest_path):
+            os.remove(forest_path)
\ No newline at end of file
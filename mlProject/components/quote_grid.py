@@ -0,0 +1,140 @@
+import json
+import itertools
+import numpy as np
+from mlProject import logger
+from mlProject.constants import NUMERICAL_COLS, CATEGORICAL_COLS
+
+class QuoteGrid:
+    """Precomputed model prices for approximate, sub-millisecond quotes.
+
+    `values` holds one price per (cut, color, clarity) combination and per
+    point of the numeric grid axes. Numeric columns that are not grid axes
+    (x, y, z by default) are derived from carat with a fitted power law when
+    the grid is built, so a quote only interpolates over the grid axes. A
+    diamond whose derived columns are further from the power law than
+    `derived_tolerance` (in log space) is not quoted, since the grid never
+    saw its actual x, y, z. `sources` holds the stamps of the model, scaler
+    and encoder files the grid was computed from.
+    """
+
+    def __init__(self, values, axes, axis_values, categories, derived, error_bound, derived_tolerance=None, sources=None):
+        self.values = values
+        self.axes = list(axes)
+        self.axis_values = [np.asarray(v, dtype=np.float64) for v in axis_values]
+        self.categories = [list(c) for c in categories]
+        self.derived = derived
+        self.error_bound = error_bound
+        self.derived_tolerance = derived_tolerance or {}
+        self.sources = sources or {}
+
+        self._category_codes = [{category: code for code, category in enumerate(c)} for c in self.categories]
+        self._corners = list(itertools.product([0, 1], repeat=len(self.axes)))
+
+    def save(self, path):
+        meta = {
+            "axes": self.axes,
+            "categories": self.categories,
+            "derived": self.derived,
+            "error_bound": self.error_bound,
+            "derived_tolerance": self.derived_tolerance,
+            "sources": self.sources
+        }
+        np.savez(
+            path,
+            values=self.values,
+            meta=np.array(json.dumps(meta)),
+            **{f"axis_{col}": values for col, values in zip(self.axes, self.axis_values)}
+        )
+        logger.info(f"Quote grid of shape {self.values.shape} saved at: {path}")
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            return cls(
+                values=data['values'],
+                axes=meta['axes'],
+                axis_values=[data[f"axis_{col}"] for col in meta['axes']],
+                categories=meta['categories'],
+                derived={col: tuple(coef) for col, coef in meta['derived'].items()},
+                error_bound=meta['error_bound'],
+                derived_tolerance=meta.get('derived_tolerance'),
+                sources=meta.get('sources')
+            )
+
+    def typical(self, numeric):
+        """rows whose derived columns are within derived_tolerance of the power law of their carat
+
+        Args:
+            numeric (dict): numeric column name -> array of raw values
+
+        Returns:
+            np.ndarray: boolean mask of the rows the grid can quote
+        """
+        carat = np.asarray(numeric['carat'], dtype=np.float64)
+        typical = np.ones(len(carat), dtype=bool)
+        for col, tolerance in self.derived_tolerance.items():
+            intercept, slope = self.derived[col]
+            residual = np.log(np.asarray(numeric[col], dtype=np.float64)) - (intercept + slope * np.log(carat))
+            typical &= np.abs(residual) <= tolerance
+        return typical
+
+    def interpolate(self, numeric, codes):
+        """multilinear interpolation for a batch of raw inputs
+
+        Args:
+            numeric (dict): grid axis name -> array of raw values
+            codes (np.ndarray): (n, 3) integer cut/color/clarity codes
+
+        Returns:
+            tuple: (prices, boolean mask of rows inside the grid)
+        """
+        n_rows = len(codes)
+        inside = np.ones(n_rows, dtype=bool)
+        lower, weights = [], []
+
+        for col, grid in zip(self.axes, self.axis_values):
+            v = np.asarray(numeric[col], dtype=np.float64)
+            inside &= (v >= grid[0]) & (v <= grid[-1])
+            i = np.clip(np.searchsorted(grid, v, side='right') - 1, 0, len(grid) - 2)
+            t = np.clip((v - grid[i]) / (grid[i + 1] - grid[i]), 0.0, 1.0)
+            lower.append(i)
+            weights.append(t)
+
+        prices = np.zeros(n_rows, dtype=np.float64)
+        for corner in self._corners:
+            weight = np.ones(n_rows, dtype=np.float64)
+            index = [codes[:, 0], codes[:, 1], codes[:, 2]]
+            for step, i, t in zip(corner, lower, weights):
+                weight *= t if step else 1.0 - t
+                index.append(i + step)
+            prices += weight * self.values[tuple(index)]
+
+        return prices, inside
+
+    def quote(self, record: dict):
+        """approximate price for one diamond
+
+        Args:
+            record (dict): the nine input fields of a single diamond
+
+        Returns:
+            float or None: interpolated price, None when outside the grid or untypical (see typical)
+        """
+        try:
+            codes = np.array([[self._category_codes[i][str(record[col]).strip()]
+                               for i, col in enumerate(CATEGORICAL_COLS)]])
+        except KeyError:
+            return None
+
+        try:
+            numeric = {col: [float(record[col])] for col in NUMERICAL_COLS}
+        except (KeyError, TypeError, ValueError):
+            return None
+        if not self.typical(numeric)[0]:
+            return None
+
+        prices, inside = self.interpolate(numeric, codes)
+        if not inside[0]:
+            return None
+        return float(prices[0])
@@ -0,0 +1,131 @@
+import time
+import itertools
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from mlProject import logger
+from mlProject.utils.common import save_json
+from mlProject.entity.config_entity import QuoteGridConfig
+from mlProject.constants import NUMERICAL_COLS, CATEGORICAL_COLS
+from mlProject.components.quote_grid import QuoteGrid
+from mlProject.components.fused_model import file_stamp
+
+class QuoteGridBuilder:
+    def __init__(self, config: QuoteGridConfig):
+        self.config = config
+
+    # grid points follow the data quantiles, so they are dense where diamonds are
+    def get_axis_values(self, df):
+        axis_values = []
+        for col, n_points in self.config.axes.items():
+            quantiles = np.linspace(self.config.lower_quantile, self.config.upper_quantile, int(n_points))
+            values = np.unique(np.round(np.quantile(df[col], quantiles), 4))
+            if len(values) < 2:
+                raise ValueError(f"Quote grid axis '{col}' needs at least two distinct points")
+            axis_values.append(values)
+        return axis_values
+
+    # log(col) = a + b * log(carat) for every numeric column that is not an axis, and the
+    # derived_quantile of the absolute log residuals, beyond which a diamond is not quoted
+    def fit_derived_columns(self, df):
+        derived, tolerance = {}, {}
+        log_carat = np.log(df['carat'])
+        for col in NUMERICAL_COLS:
+            if col in self.config.axes:
+                continue
+            if 'carat' not in self.config.axes:
+                intercept, slope = float(np.log(df[col].median())), 0.0
+            else:
+                slope, intercept = np.polyfit(log_carat, np.log(df[col]), 1)
+            derived[col] = (float(intercept), float(slope))
+            residual = np.log(df[col]) - (intercept + slope * log_carat)
+            tolerance[col] = float(np.quantile(np.abs(residual), self.config.derived_quantile))
+        return derived, tolerance
+
+    def build(self):
+        start = time.perf_counter()
+
+        df = pd.read_csv(self.config.data_path)
+        df = df.loc[(df[NUMERICAL_COLS] > 0).all(axis=1)]
+
+        model = joblib.load(self.config.model_path)
+        scaler = joblib.load(self.config.scaler_path)
+        encoder = joblib.load(self.config.encoder_path)
+
+        axes = list(self.config.axes)
+        axis_values = self.get_axis_values(df)
+        derived, derived_tolerance = self.fit_derived_columns(df)
+
+        # numeric part of every grid point, shared by all category combinations
+        mesh = np.meshgrid(*axis_values, indexing='ij')
+        points = {col: m.ravel() for col, m in zip(axes, mesh)}
+        n_points = len(points[axes[0]])
+        carat = points.get('carat', np.full(n_points, df['carat'].median()))
+        for col, (intercept, slope) in derived.items():
+            points[col] = np.exp(intercept + slope * np.log(carat))
+
+        numeric = scaler.transform(pd.DataFrame({col: points[col] for col in scaler.feature_names_in_}))
+
+        categories = [list(c) for c in encoder.categories_]
+        shape = [len(c) for c in categories] + [len(v) for v in axis_values]
+        values = np.empty((int(np.prod(shape[:3])), n_points), dtype=np.float32)
+
+        X = np.empty((n_points, len(NUMERICAL_COLS) + len(CATEGORICAL_COLS)), dtype=np.float64)
+        X[:, :len(NUMERICAL_COLS)] = numeric
+        for row, codes in enumerate(itertools.product(*[range(len(c)) for c in categories])):
+            X[:, len(NUMERICAL_COLS):] = codes
+            values[row] = model.predict(X)
+
+        sources = {"source_model": file_stamp(self.config.model_path),
+                   "source_scaler": file_stamp(self.config.scaler_path),
+                   "source_encoder": file_stamp(self.config.encoder_path)}
+        grid = QuoteGrid(values.reshape(shape), axes, axis_values, categories, derived, {}, derived_tolerance, sources)
+        grid.error_bound = self.measure_error(grid, model, scaler, encoder)
+        grid.save(self.config.grid_file)
+
+        report = {
+            "axes": {col: len(v) for col, v in zip(axes, axis_values)},
+            "derived_columns": sorted(derived),
+            "derived_tolerance": derived_tolerance,
+            "grid_points": int(values.size),
+            "grid_bytes": int(values.nbytes),
+            "build_seconds": time.perf_counter() - start,
+            **grid.error_bound
+        }
+        save_json(path=Path(self.config.report_file), data=report)
+        logger.info(f"Quote grid max abs error on held-out rows: {grid.error_bound['max_abs_error']:.2f}")
+
+        return grid
+
+    # error of the grid against the model itself, on the held-out raw test rows it would quote
+    def measure_error(self, grid, model, scaler, encoder):
+        X_test = pd.read_csv(self.config.test_data_path)
+        X_test = X_test.loc[(X_test[NUMERICAL_COLS] > 0).all(axis=1)]
+
+        codes = encoder.transform(X_test[CATEGORICAL_COLS])
+        known = (codes >= 0).all(axis=1)
+        X_test, codes = X_test.loc[known], codes[known].astype(np.int64)
+
+        numeric = {col: X_test[col].to_numpy() for col in NUMERICAL_COLS}
+        approx, inside = grid.interpolate(numeric, codes)
+        typical = grid.typical(numeric)
+        inside &= typical
+        X = np.hstack([scaler.transform(X_test[list(scaler.feature_names_in_)]), codes])
+        exact = model.predict(X)
+
+        abs_error = np.abs(approx - exact)[inside]
+        rel_error = abs_error / np.maximum(exact[inside], 1.0)
+        if not len(abs_error):
+            raise ValueError("No held-out rows fall inside the quote grid")
+
+        return {
+            "test_rows": int(len(inside)),
+            "coverage": float(inside.mean()),
+            "typical_share": float(typical.mean()),
+            "max_abs_error": float(abs_error.max()),
+            "p99_abs_error": float(np.quantile(abs_error, 0.99)),
+            "mean_abs_error": float(abs_error.mean()),
+            "max_rel_error": float(rel_error.max()),
+            "p99_rel_error": float(np.quantile(rel_error, 0.99))
+        }
@@ -1,7 +1,10 @@
+import os
 from mlProject.constants import *
+from box import ConfigBox
 from mlProject.utils.common import read_yaml, create_directories
 from mlProject.entity.config_entity import (DataIngestionConfig, DataValidationConfig, DataTransformationConfig,
-                                            ModelTrainerConfig, ModelEvaluationConfig)
+                                            HyperparameterSearchConfig, ModelTrainerConfig, ModelCompactionConfig,
+                                            ModelPackagingConfig, ModelEvaluationConfig, QuoteGridConfig)
 
 class ConfigurationManager:
     # pull yaml file paths from constants
@@ -19,6 +22,17 @@ class ConfigurationManager:
         # create a list of directories
         create_directories([self.config.artifacts_root])
     
+    def get_chunked_params(self) -> ConfigBox:
+        # out-of-core mode shared by validation, transformation and training, off unless params enable it
+        params = ConfigBox(self.params.get("ChunkedTraining", {}))
+
+        return ConfigBox({
+            "enabled": params.get("enabled", False),
+            "chunk_rows": self.config.data_transformation.get("chunk_rows", 1_000_000),
+            "test_fraction": params.get("test_fraction", 0.25),
+            "max_leaf_nodes": params.get("max_leaf_nodes", 65536)
+        })
+
     def get_data_ingestion_config(self) -> DataIngestionConfig:
         config = self.config.data_ingestion
 
@@ -41,6 +55,7 @@ class ConfigurationManager:
 
         # schema file
         schema = self.schema.COLUMNS
+        chunked = self.get_chunked_params()
 
         # create data validation directory
         create_directories([config.root_dir])
@@ -50,9 +65,18 @@ class ConfigurationManager:
             root_dir = config.root_dir,
             unzip_data_dir = config.unzip_data_dir,
             STATUS_FILE = config.STATUS_FILE,
+            report_file = config.get("report_file", os.path.join(config.root_dir, "report.json")),
 
-            # schema
-            all_schema = schema
+            # schema, value rules default to the bounds and levels the transformation uses
+            all_schema = schema,
+            ranges = dict(self.schema.get("RANGES", OUTLIER_BOUNDS)),
+            categories = dict(self.schema.get("CATEGORIES", ORDINAL_CATEGORIES)),
+            nullable = list(self.schema.get("NULLABLE", [])),
+            sample_rows = config.get("sample_rows", 5),
+
+            # out-of-core mode
+            chunked = chunked.enabled,
+            chunk_rows = chunked.chunk_rows
         )
         
         return data_validation_config
@@ -60,20 +84,60 @@ class ConfigurationManager:
     def get_data_transformation_config(self) -> DataTransformationConfig:
         config = self.config.data_transformation
         schema = self.schema.TARGET
+        chunked = self.get_chunked_params()
 
         create_directories([config.root_dir])
 
         data_transformation_config = DataTransformationConfig(
             root_dir = config.root_dir,
             data_path = config.data_path,
-            target_column = schema.name
+            target_column = schema.name,
+            export_csv = config.get("export_csv", False),
+            chunk_rows = chunked.chunk_rows,
+            chunked = chunked.enabled,
+            test_fraction = chunked.test_fraction
         )
         
         return data_transformation_config
     
+    def get_hyperparameter_search_config(self) -> HyperparameterSearchConfig:
+        # optional stage, falls back to defaults when config/params have no section for it
+        config = ConfigBox(self.config.get("hyperparameter_search", {}))
+        params = ConfigBox(self.params.get("HyperparameterSearch", {}))
+        chunked = self.get_chunked_params()
+
+        root_dir = config.get("root_dir", "artifacts/hyperparameter_search")
+        create_directories([root_dir])
+
+        # out-of-core training grows a forest chunk by chunk, so only forest candidates apply there
+        search_space = {name: {key: list(values) for key, values in space.items()}
+                        for name, space in params.get("search_space", SEARCH_SPACE).items()
+                        if not chunked.enabled or name == "RandomForestRegressor"}
+
+        hyperparameter_search_config = HyperparameterSearchConfig(
+            root_dir = root_dir,
+            X_train_transformed_path = self.config.model_trainer.X_train_transformed_path,
+            y_train_path = self.config.model_trainer.y_train_path,
+            best_params_file = config.get("best_params_file", os.path.join(root_dir, "best_params.json")),
+            report_file = config.get("report_file", os.path.join(root_dir, "report.json")),
+            enabled = params.get("enabled", False),
+            search_space = search_space,
+            n_candidates = params.get("n_candidates", 24),
+            factor = params.get("factor", 3),
+            min_rows = params.get("min_rows", 2000),
+            max_rows = params.get("max_rows", 1_000_000),
+            validation_fraction = params.get("validation_fraction", 0.2),
+            n_jobs = params.get("n_jobs", -1),
+            random_state = self.params.RandomForestRegressor.random_state
+        )
+
+        return hyperparameter_search_config
+
     def get_model_trainer_config(self) -> ModelTrainerConfig:
         config = self.config.model_trainer
         params = self.params.RandomForestRegressor
+        chunked = self.get_chunked_params()
+        search = self.get_hyperparameter_search_config()
 
         create_directories([config.root_dir])
 
@@ -83,15 +147,73 @@ class ConfigurationManager:
             y_train_path = config.y_train_path,
             model_name = config.model_name,
             n_estimators = params.n_estimators,
-            random_state = params.random_state
+            random_state = params.random_state,
+            # parallelism, every core by default; joblib backend used by the forest's fit
+            n_jobs = params.get("n_jobs", -1),
+            backend = params.get("backend", "threading"),
+            max_samples = params.get("max_samples", None),
+            max_features = params.get("max_features", 1.0),
+            chunked = chunked.enabled,
+            chunk_rows = chunked.chunk_rows,
+            max_leaf_nodes = chunked.max_leaf_nodes,
+            best_params_file = search.best_params_file if search.enabled else None
         )
 
         return model_trainer_config
     
+    def get_model_compaction_config(self) -> ModelCompactionConfig:
+        # optional stage, falls back to defaults when config/params have no section for it
+        config = ConfigBox(self.config.get("model_compaction", {}))
+        params = ConfigBox(self.params.get("ModelCompaction", {}))
+
+        root_dir = config.get("root_dir", "artifacts/model_compaction")
+        create_directories([root_dir])
+
+        model_compaction_config = ModelCompactionConfig(
+            root_dir = root_dir,
+            model_path = config.get("model_path", self.config.model_evaluation.model_path),
+            X_train_transformed_path = config.get("X_train_transformed_path", self.config.model_trainer.X_train_transformed_path),
+            y_train_path = config.get("y_train_path", self.config.model_trainer.y_train_path),
+            X_test_transformed_path = config.get("X_test_transformed_path", self.config.model_evaluation.X_test_transformed_path),
+            y_test_path = config.get("y_test_path", self.config.model_evaluation.y_test_path),
+            compact_model_file = config.get("compact_model_file", os.path.join(root_dir, "forest_compact.npz")),
+            report_file = config.get("report_file", os.path.join(root_dir, "report.json")),
+            enabled = params.get("enabled", False),
+            max_depth = params.get("max_depth", None),
+            max_leaf_nodes = params.get("max_leaf_nodes", None),
+            max_rmse_increase = params.get("max_rmse_increase", 0.01),
+            validation_fraction = params.get("validation_fraction", 0.5),
+            random_state = params.get("random_state", self.params.RandomForestRegressor.random_state)
+        )
+
+        return model_compaction_config
+
+    def get_model_packaging_config(self) -> ModelPackagingConfig:
+        # no section needed in config.yaml, every path has a default
+        config = ConfigBox(self.config.get("model_packaging", {}))
+
+        root_dir = config.get("root_dir", "artifacts/model_packaging")
+        create_directories([root_dir])
+
+        model_packaging_config = ModelPackagingConfig(
+            root_dir = root_dir,
+            model_path = config.get("model_path", self.config.model_evaluation.model_path),
+            scaler_path = config.get("scaler_path", "artifacts/data_transformation/scaler.pkl"),
+            encoder_path = config.get("encoder_path", "artifacts/data_transformation/encoder.pkl"),
+            forest_path = config.get("forest_path", os.path.join(self.config.model_trainer.root_dir, "forest.npz")),
+            compact_model_file = config.get("compact_model_file", "artifacts/model_compaction/forest_compact.npz"),
+            test_data_path = config.get("test_data_path", "artifacts/data_transformation/X_test.csv"),
+            packaged_model_file = config.get("packaged_model_file", os.path.join(root_dir, "model.npz")),
+            report_file = config.get("report_file", os.path.join(root_dir, "report.json"))
+        )
+
+        return model_packaging_config
+
     def get_model_evaluation_config(self) -> ModelEvaluationConfig:
         config = self.config.model_evaluation
         params = self.params.RandomForestRegressor
         schema = self.schema.TARGET
+        search = self.get_hyperparameter_search_config()
 
         model_evaluation_config = ModelEvaluationConfig(
             root_dir = config.root_dir,
@@ -101,7 +223,34 @@ class ConfigurationManager:
             metric_file = config.metric_file,
             target_column = schema.name,
             all_params = params,
-            mlflow_uri = "https://dagshub.com/CodeWithCharan/Diamond-Price-Prediction.mlflow"
+            mlflow_uri = "https://dagshub.com/CodeWithCharan/Diamond-Price-Prediction.mlflow",
+            search_report_file = search.report_file if search.enabled else None
+        )
+
+        return model_evaluation_config
+    
+    def get_quote_grid_config(self) -> QuoteGridConfig:
+        # optional stage, falls back to defaults when config/params have no section for it
+        config = ConfigBox(self.config.get("quote_grid", {}))
+        params = ConfigBox(self.params.get("QuoteGrid", {}))
+
+        root_dir = config.get("root_dir", "artifacts/quote_grid")
+        create_directories([root_dir])
+
+        quote_grid_config = QuoteGridConfig(
+            root_dir = root_dir,
+            data_path = config.get("data_path", self.config.data_transformation.data_path),
+            test_data_path = config.get("test_data_path", "artifacts/data_transformation/X_test.csv"),
+            model_path = config.get("model_path", self.config.model_evaluation.model_path),
+            scaler_path = config.get("scaler_path", "artifacts/data_transformation/scaler.pkl"),
+            encoder_path = config.get("encoder_path", "artifacts/data_transformation/encoder.pkl"),
+            grid_file = config.get("grid_file", "artifacts/quote_grid/quote_grid.npz"),
+            report_file = config.get("report_file", "artifacts/quote_grid/report.json"),
+            enabled = params.get("enabled", False),
+            axes = dict(params.get("axes", {"carat": 64, "depth": 5, "table": 5})),
+            lower_quantile = params.get("lower_quantile", 0.005),
+            upper_quantile = params.get("upper_quantile", 0.995),
+            derived_quantile = params.get("derived_quantile", 0.99)
         )
 
-        return model_evaluation_config
\ No newline at end of file
+        return quote_grid_config
\ No newline at end of file
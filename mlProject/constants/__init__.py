@@ -1,6 +1,46 @@
+import numpy as np
 from pathlib import Path
 
 # to fetch these yaml files directly
 CONFIG_FILE_PATH = Path("config/config.yaml")
 PARAMS_FILE_PATH = Path("params.yaml")
-SCHEMA_FILE_PATH = Path("schema.yaml")
\ No newline at end of file
+SCHEMA_FILE_PATH = Path("schema.yaml")
+
+# diamond quality, low to high (ordinals)
+ORDINAL_CATEGORIES = {
+    'cut': ['Fair', 'Good', 'Very Good', 'Premium', 'Ideal'],
+    'color': ['J', 'I', 'H', 'G', 'F', 'E', 'D'],
+    'clarity': ['I1', 'SI2', 'SI1', 'VS2', 'VS1', 'VVS2', 'VVS1', 'IF']
+}
+
+# request fields of a diamond, in the order the web form and the batch API use them
+INPUT_COLS = ['carat', 'cut', 'color', 'clarity', 'depth', 'table', 'x', 'y', 'z']
+NUMERICAL_COLS = ['carat', 'depth', 'table', 'x', 'y', 'z']
+CATEGORICAL_COLS = list(ORDINAL_CATEGORIES)
+
+# acc to experiments, values outside these (exclusive) bounds are outliers
+OUTLIER_BOUNDS = {
+    'x': {'gt': 3},
+    'y': {'lt': 15},
+    'z': {'gt': 2, 'lt': 10}
+}
+
+# bound names used by OUTLIER_BOUNDS and the schema RANGES
+COMPARISONS = {'gt': np.greater, 'ge': np.greater_equal, 'lt': np.less, 'le': np.less_equal}
+
+# hyperparameter search space per model family, every value list is sampled uniformly
+SEARCH_SPACE = {
+    'RandomForestRegressor': {
+        'n_estimators': [50, 100, 200],
+        'max_features': [0.33, 0.5, 1.0],
+        'min_samples_leaf': [1, 2, 4],
+        'max_depth': [None, 16, 24]
+    },
+    'HistGradientBoostingRegressor': {
+        'learning_rate': [0.03, 0.1, 0.3],
+        'max_iter': [200, 500],
+        'max_leaf_nodes': [15, 31, 63],
+        'min_samples_leaf': [10, 20, 50],
+        'l2_regularization': [0.0, 1.0]
+    }
+}
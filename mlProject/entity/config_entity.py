@@ -15,7 +15,14 @@ class DataValidationConfig:
     root_dir: Path
     unzip_data_dir: Path
     STATUS_FILE: Path
+    report_file: Path
     all_schema: dict
+    ranges: dict
+    categories: dict
+    nullable: list
+    sample_rows: int
+    chunked: bool
+    chunk_rows: int
 
 # Data Transformation
 @dataclass(frozen=True)
@@ -23,6 +30,28 @@ class DataTransformationConfig:
     root_dir: Path
     data_path: Path
     target_column: str
+    export_csv: bool
+    chunk_rows: int
+    chunked: bool
+    test_fraction: float
+
+# Hyperparameter Search
+@dataclass(frozen=True)
+class HyperparameterSearchConfig:
+    root_dir: Path
+    X_train_transformed_path: Path
+    y_train_path: Path
+    best_params_file: Path
+    report_file: Path
+    enabled: bool
+    search_space: dict
+    n_candidates: int
+    factor: int
+    min_rows: int
+    max_rows: int
+    validation_fraction: float
+    n_jobs: int
+    random_state: int
 
 # Model Trainer
 @dataclass(frozen=True)
@@ -33,6 +62,45 @@ class ModelTrainerConfig:
     model_name: str
     n_estimators: int
     random_state: int
+    n_jobs: int
+    backend: str
+    max_samples: float
+    max_features: float
+    chunked: bool
+    chunk_rows: int
+    max_leaf_nodes: int
+    best_params_file: Path
+
+# Model Compaction
+@dataclass(frozen=True)
+class ModelCompactionConfig:
+    root_dir: Path
+    model_path: Path
+    X_train_transformed_path: Path
+    y_train_path: Path
+    X_test_transformed_path: Path
+    y_test_path: Path
+    compact_model_file: Path
+    report_file: Path
+    enabled: bool
+    max_depth: int
+    max_leaf_nodes: int
+    max_rmse_increase: float
+    validation_fraction: float
+    random_state: int
+
+# Model Packaging
+@dataclass(frozen=True)
+class ModelPackagingConfig:
+    root_dir: Path
+    model_path: Path
+    scaler_path: Path
+    encoder_path: Path
+    forest_path: Path
+    compact_model_file: Path
+    test_data_path: Path
+    packaged_model_file: Path
+    report_file: Path
 
 # Model Evaluation
 @dataclass(frozen=True)
@@ -44,4 +112,22 @@ class ModelEvaluationConfig:
     metric_file: str
     target_column: str
     all_params: dict
-    mlflow_uri: str
\ No newline at end of file
+    mlflow_uri: str
+    search_report_file: Path
+
+# Quote Grid
+@dataclass(frozen=True)
+class QuoteGridConfig:
+    root_dir: Path
+    data_path: Path
+    test_data_path: Path
+    model_path: Path
+    scaler_path: Path
+    encoder_path: Path
+    grid_file: Path
+    report_file: Path
+    enabled: bool
+    axes: dict
+    lower_quantile: float
+    upper_quantile: float
+    derived_quantile: float
\ No newline at end of file
@@ -1,10 +1,21 @@
+import os
+import inspect
 from mlProject.config.configuration import ConfigurationManager
 from mlProject.components.data_ingestion import DataIngestion
+from mlProject.pipeline.stage_cache import StageSpec
 
 class DataIngestionPipeline:
     def __init__(self):
         pass
     
+    def cache_spec(self):
+        config = ConfigurationManager().get_data_ingestion_config()
+        return StageSpec(
+            inputs = [inspect.getfile(DataIngestion)],
+            params = {"source_URL": config.source_URL},
+            outputs = [config.local_data_file, os.path.join(config.unzip_dir, "diamonds.csv")]
+        )
+
     def main(self):
         config = ConfigurationManager()
         data_ingestion_config = config.get_data_ingestion_config()
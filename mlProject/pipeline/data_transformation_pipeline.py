@@ -1,16 +1,28 @@
+import os
+import inspect
 from mlProject.config.configuration import ConfigurationManager
 from mlProject.components.data_transformation import DataTransformation
+from mlProject.pipeline.stage_cache import StageSpec
 
 class DataTransformationPipeline:
     def __init__(self):
         pass
 
+    def cache_spec(self):
+        config = ConfigurationManager().get_data_transformation_config()
+        return StageSpec(
+            inputs = [inspect.getfile(DataTransformation), config.data_path],
+            params = {"target_column": config.target_column, "export_csv": config.export_csv,
+                      "chunked": config.chunked, "test_fraction": config.test_fraction},
+            outputs = [os.path.join(config.root_dir, name) for name in
+                       ["X_train_transformed.npy", "y_train.npy", "X_test_transformed.npy", "y_test.npy",
+                        "X_test.csv", "scaler.pkl", "encoder.pkl"]]
+        )
+
     def main(self):
         config = ConfigurationManager()
         data_transformation_config = config.get_data_transformation_config()
         data_transformation = DataTransformation(config=data_transformation_config)
 
-        data_transformation.remove_outliers()
-        data_transformation.data_segregation()
-        data_transformation.get_train_test_split()
+        # get_transformed runs outlier removal, segregation and the split itself
         data_transformation.get_transformed()
\ No newline at end of file
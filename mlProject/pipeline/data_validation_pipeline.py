@@ -1,10 +1,22 @@
+import inspect
 from mlProject.config.configuration import ConfigurationManager
 from mlProject.components.data_validation import DataValiadtion
+from mlProject.pipeline.stage_cache import StageSpec
 
 class DataValidationPipeline:
     def __init__(self):
         pass
 
+    def cache_spec(self):
+        config = ConfigurationManager().get_data_validation_config()
+        return StageSpec(
+            inputs = [inspect.getfile(DataValiadtion), config.unzip_data_dir],
+            params = {"schema": dict(config.all_schema), "ranges": config.ranges, "categories": config.categories,
+                      "nullable": config.nullable, "sample_rows": config.sample_rows,
+                      "chunked": config.chunked, "chunk_rows": config.chunk_rows},
+            outputs = [config.STATUS_FILE, config.report_file]
+        )
+
     def main(self):
         config = ConfigurationManager()
         data_validation_config = config.get_data_validation_config()
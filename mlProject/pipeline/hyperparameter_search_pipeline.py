@@ -0,0 +1,36 @@
+import inspect
+from pathlib import Path
+from mlProject import logger
+from mlProject.config.configuration import ConfigurationManager
+from mlProject.components.hyperparameter_search import HyperparameterSearch
+from mlProject.components import model_trainer
+from mlProject.pipeline.stage_cache import StageSpec
+from mlProject.utils.common import resolve_array_path
+
+class HyperparameterSearchPipeline:
+    def __init__(self):
+        pass
+
+    def cache_spec(self):
+        config = ConfigurationManager().get_hyperparameter_search_config()
+        if not config.enabled:
+            return StageSpec(params = {"enabled": False})
+        return StageSpec(
+            inputs = [inspect.getfile(HyperparameterSearch), inspect.getfile(model_trainer),
+                      resolve_array_path(Path(config.X_train_transformed_path)), resolve_array_path(Path(config.y_train_path))],
+            params = {"search_space": config.search_space, "n_candidates": config.n_candidates, "factor": config.factor,
+                      "min_rows": config.min_rows, "max_rows": config.max_rows,
+                      "validation_fraction": config.validation_fraction, "random_state": config.random_state},
+            outputs = [config.best_params_file, config.report_file]
+        )
+
+    def main(self):
+        config = ConfigurationManager()
+        hyperparameter_search_config = config.get_hyperparameter_search_config()
+
+        if not hyperparameter_search_config.enabled:
+            logger.info("Hyperparameter search is disabled (HyperparameterSearch.enabled in params.yaml), skipping")
+            return
+
+        hyperparameter_search = HyperparameterSearch(config=hyperparameter_search_config)
+        hyperparameter_search.search()
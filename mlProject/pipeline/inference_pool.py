@@ -0,0 +1,93 @@
+import os
+import asyncio
+import functools
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from mlProject import logger
+
+class PoolSaturated(RuntimeError):
+    """Raised when the inference pool already holds max_pending calls."""
+
+
+class InferencePool:
+    """Runs blocking inference for an asyncio server in a bounded thread pool.
+
+    The event loop only parses requests and writes responses; every call to
+    the model goes to one of `max_workers` threads. At most `max_pending`
+    calls may be queued or running at once, further calls are rejected with
+    PoolSaturated straight away, so an overloaded worker sheds load instead
+    of queueing requests until they time out.
+    """
+
+    def __init__(self, max_workers=4, max_pending=64):
+        if max_workers < 1 or max_pending < 1:
+            raise ValueError("max_workers and max_pending must be at least 1")
+
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+
+        self._executor = None
+        self._executor_pid = None
+        self._start_lock = threading.Lock()
+
+        # metrics, only written on the event loop
+        self._pending = 0
+        self._max_pending_seen = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+
+    # start the threads lazily so they also exist in forked server workers
+    def _ensure_executor(self):
+        if self._executor is not None and self._executor_pid == os.getpid():
+            return self._executor
+
+        with self._start_lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+                self._executor_pid = os.getpid()
+        return self._executor
+
+    async def run(self, fn, *args, **kwargs):
+        """runs fn(*args, **kwargs) in the pool and waits for it without blocking the event loop
+
+        Raises:
+            PoolSaturated: max_pending calls are already queued or running
+        """
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise PoolSaturated(f"Inference pool is full ({self.max_pending} pending calls)")
+
+        executor = self._ensure_executor()
+        self._pending += 1
+        self._max_pending_seen = max(self._max_pending_seen, self._pending)
+        try:
+            # run in a copy of the caller's context, so request-scoped context variables reach the thread
+            context = contextvars.copy_context()
+            result = await asyncio.get_running_loop().run_in_executor(
+                executor, functools.partial(context.run, fn, *args, **kwargs))
+            self._completed += 1
+            return result
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._pending -= 1
+
+    def shutdown(self):
+        if self._executor is not None and self._executor_pid == os.getpid():
+            logger.info("Shutting down the inference pool")
+            self._executor.shutdown(wait=True)
+        self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "max_pending_seen": self._max_pending_seen,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected
+        }
@@ -0,0 +1,228 @@
+"""
+Serving metrics in the Prometheus text format, without a client library.
+
+Counters and histograms are sharded per thread: a thread only ever writes
+its own shard, so recording takes no lock and never contends, and a scrape
+sums the shards. The shard of a finished thread is folded into a retired
+total, so servers that start a thread per request do not grow without bound.
+Metrics are per process; with several gunicorn or hypercorn workers each
+scrape sees the worker that answered it.
+"""
+import time
+import bisect
+import weakref
+import threading
+
+# latency buckets in seconds, from 100us to 10s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                   5.0, 10.0)
+
+class _ShardOwner:
+    """Lives in the thread-local storage of one thread, so it is freed when the thread ends."""
+
+    __slots__ = ("shard", "__weakref__")
+
+    def __init__(self, shard):
+        self.shard = shard
+
+
+class _ShardedMetric:
+    """Per-thread shards of {label values: value}, merged when a thread ends and on scrape."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = {}
+        self._retired = {}
+
+    def _shard(self):
+        try:
+            return self._local.owner.shard
+        except AttributeError:
+            shard = {}
+            owner = self._local.owner = _ShardOwner(shard)
+            with self._lock:
+                self._shards[id(shard)] = shard
+            weakref.finalize(owner, self._retire, shard)
+            return shard
+
+    def _retire(self, shard):
+        with self._lock:
+            self._shards.pop(id(shard), None)
+            self._merge(self._retired, shard)
+
+    # method to add one shard into a total, per metric type
+    def _merge(self, total, shard):
+        raise NotImplementedError
+
+    def collect(self) -> dict:
+        """returns {label values: value} summed over every thread"""
+        with self._lock:
+            total = {}
+            self._merge(total, self._retired)
+            for shard in self._shards.values():
+                # dict() copies under the GIL, the owner thread may keep writing
+                self._merge(total, dict(shard))
+        return total
+
+
+class Counter(_ShardedMetric):
+    kind = "counter"
+
+    def inc(self, labels=(), amount=1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def _merge(self, total, shard):
+        for labels, value in shard.items():
+            total[labels] = total.get(labels, 0) + value
+
+    def samples(self):
+        for labels, value in sorted(self.collect().items()):
+            yield self.name, dict(zip(self.labelnames, labels)), value
+
+
+class Histogram(_ShardedMetric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, labels=()):
+        shard = self._shard()
+        entry = shard.get(labels)
+        if entry is None:
+            # one count per bucket plus +Inf, then the sum
+            entry = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        entry[bisect.bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+
+    def _merge(self, total, shard):
+        for labels, entry in shard.items():
+            merged = total.setdefault(labels, [0] * len(entry))
+            for i, value in enumerate(list(entry)):
+                merged[i] += value
+
+    def samples(self):
+        for labels, entry in sorted(self.collect().items()):
+            label_dict = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), entry):
+                cumulative += count
+                yield f"{self.name}_bucket", {**label_dict, "le": format_value(bound)}, cumulative
+            yield f"{self.name}_sum", label_dict, entry[-1]
+            yield f"{self.name}_count", label_dict, cumulative
+
+
+class Gauge:
+    """Value read when scraped, from a function returning [(label values, value)]."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, collect, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._collect = collect
+
+    def samples(self):
+        for labels, value in self._collect():
+            yield self.name, dict(zip(self.labelnames, labels)), value
+
+
+class StageTimer:
+    """Times consecutive stages of one request into a histogram labelled by stage.
+
+    Each mark(stage) records the time since the previous mark (or since the
+    timer was created) under that stage.
+    """
+
+    __slots__ = ("histogram", "last")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.histogram.observe(now - self.last, (stage,))
+        self.last = now
+
+    # method to start the next stage now, leaving the time since the last mark unrecorded
+    def restart(self):
+        self.last = time.perf_counter()
+
+# method to write a sample value the way Prometheus expects it
+def format_value(value):
+    if isinstance(value, float):
+        if value != value:
+            return "NaN"
+        if value in (float("inf"), float("-inf")):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsRegistry:
+    """Holds the metrics of a process and renders them for a /metrics scrape."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, collect, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, documentation, collect, labelnames))
+
+    # method to export every numeric value of a stats() dict as a gauge
+    def stats_gauges(self, prefix, documentation, get_stats):
+        for key, value in get_stats().items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.gauge(f"{prefix}_{key}", f"{documentation}: {key}", lambda key=key: [((), get_stats()[key])])
+
+    def render(self) -> str:
+        """returns every metric in the Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                if labels:
+                    label_text = ",".join(f'{key}="{escape_label(val)}"' for key, val in labels.items())
+                    lines.append(f"{name}{{{label_text}}} {format_value(value)}")
+                else:
+                    lines.append(f"{name} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# one registry per worker process, with the metrics every entry point records
+metrics_registry = MetricsRegistry()
+
+http_requests = metrics_registry.counter(
+    "gempricer_http_requests_total", "HTTP requests by endpoint, method and status", ("endpoint", "method", "status"))
+http_request_seconds = metrics_registry.histogram(
+    "gempricer_http_request_duration_seconds", "HTTP request latency by endpoint", ("endpoint",))
+prediction_errors = metrics_registry.counter(
+    "gempricer_prediction_errors_total", "Failed prediction requests by error type", ("type",))
+stage_seconds = metrics_registry.histogram(
+    "gempricer_prediction_stage_seconds", "Time spent in each stage of a prediction request "
+    "(parse, validate, transform, predict, render)", ("stage",))
@@ -0,0 +1,156 @@
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from mlProject import logger
+
+class BatcherFull(RuntimeError):
+    """Raised when max_queue_size rows are already waiting for a batch."""
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-diamond predictions into small batches.
+
+    Requests are queued and a background thread drains the queue, waiting at
+    most `max_wait_ms` after the first queued row for up to `max_batch_size`
+    rows, then scores them as one matrix and resolves each caller's future.
+    At most `max_queue_size` rows wait at once; further submissions raise
+    BatcherFull straight away, so an overloaded worker sheds load.
+    """
+
+    def __init__(self, pipeline_getter, max_batch_size=64, max_wait_ms=5.0, max_queue_size=1024):
+        if max_batch_size < 1 or max_queue_size < 1:
+            raise ValueError("max_batch_size and max_queue_size must be at least 1")
+
+        self.pipeline_getter = pipeline_getter
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue_size = max_queue_size
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._worker = None
+        self._worker_pid = None
+        self._start_lock = threading.Lock()
+
+        # metrics, only written by the worker thread
+        self._batches = 0
+        self._rows = 0
+        self._last_batch_size = 0
+        self._max_batch_size_seen = 0
+        self._batch_size_buckets = {}
+        self._rejected = 0
+
+    # start the worker lazily so it also exists in forked server workers
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker_pid == os.getpid() and self._worker.is_alive():
+            return
+
+        with self._start_lock:
+            if self._worker is None or self._worker_pid != os.getpid() or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._worker_pid = os.getpid()
+                self._worker.start()
+
+    def submit(self, record: dict) -> Future:
+        """queues one diamond for the next batch
+
+        Args:
+            record (dict): the INPUT_COLS fields of a single diamond
+
+        Returns:
+            Future: resolves to the predicted price
+
+        Raises:
+            BatcherFull: max_queue_size rows are already waiting
+        """
+        self._ensure_worker()
+        future = Future()
+        try:
+            self._queue.put_nowait((record, future))
+        except queue.Full:
+            self._rejected += 1
+            raise BatcherFull(f"Micro-batch queue is full ({self.max_queue_size} waiting rows)") from None
+        return future
+
+    def predict(self, record: dict, timeout=None) -> float:
+        return self.submit(record).result(timeout=timeout)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        batch.append(self._queue.get(timeout=remaining))
+                    else:
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._process(batch)
+
+    def _process(self, batch):
+        records = [record for record, _ in batch]
+        futures = [future for _, future in batch]
+
+        try:
+            pipeline = self.pipeline_getter()
+            results = self._predict_rows(pipeline, records)
+        except Exception as e:
+            logger.error(f"Micro-batch of {len(batch)} rows failed: {str(e)}")
+            for future in futures:
+                future.set_exception(e)
+            return
+        finally:
+            self._record_batch(len(batch))
+
+        for future, (prediction, error) in zip(futures, results):
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(prediction)
+
+    # method to get each row's (prediction, error), so one bad row never fails the rows batched with it
+    def _predict_rows(self, pipeline, records):
+        # the same call as an unbatched request, so batching never changes an answer
+        try:
+            predictions = pipeline.predict_records(records)
+        except Exception as e:
+            if len(records) == 1:
+                return [(None, e)]
+            # the batch as a whole failed: score every row on its own to find the ones at fault
+            logger.warning(f"Micro-batch of {len(records)} rows failed, retrying row by row: {str(e)}")
+            return [self._predict_rows(pipeline, [record])[0] for record in records]
+
+        return [(float(prediction), None) for prediction in predictions]
+
+    def _record_batch(self, size):
+        self._batches += 1
+        self._rows += size
+        self._last_batch_size = size
+        self._max_batch_size_seen = max(self._max_batch_size_seen, size)
+
+        # power-of-two buckets: 1, 2, 4, 8, ...
+        bucket = 1
+        while bucket < size:
+            bucket *= 2
+        self._batch_size_buckets[bucket] = self._batch_size_buckets.get(bucket, 0) + 1
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self._queue.qsize(),
+            "max_queue_size": self.max_queue_size,
+            "rejected": self._rejected,
+            "batches": self._batches,
+            "rows": self._rows,
+            "mean_batch_size": self._rows / self._batches if self._batches else 0.0,
+            "last_batch_size": self._last_batch_size,
+            "max_batch_size_seen": self._max_batch_size_seen,
+            "batch_size_buckets": {f"le_{bucket}": count for bucket, count in sorted(self._batch_size_buckets.items())}
+        }
@@ -0,0 +1,41 @@
+import os
+import inspect
+from pathlib import Path
+from mlProject import logger
+from mlProject.config.configuration import ConfigurationManager
+from mlProject.components.model_compaction import ModelCompaction
+from mlProject.pipeline.stage_cache import StageSpec
+from mlProject.utils.common import resolve_array_path
+
+class ModelCompactionPipeline:
+    def __init__(self):
+        pass
+
+    def cache_spec(self):
+        config = ConfigurationManager().get_model_compaction_config()
+        if not config.enabled:
+            return StageSpec(params = {"enabled": False})
+        return StageSpec(
+            inputs = [inspect.getfile(ModelCompaction), config.model_path,
+                      resolve_array_path(Path(config.X_train_transformed_path)), resolve_array_path(Path(config.y_train_path)),
+                      resolve_array_path(Path(config.X_test_transformed_path)), resolve_array_path(Path(config.y_test_path))],
+            params = {"max_depth": config.max_depth, "max_leaf_nodes": config.max_leaf_nodes,
+                      "max_rmse_increase": config.max_rmse_increase, "validation_fraction": config.validation_fraction,
+                      "random_state": config.random_state},
+            # the compact forest is not written for models that are not forests
+            outputs = [config.report_file] + ([config.compact_model_file] if os.path.exists(config.compact_model_file) else [])
+        )
+
+    def main(self):
+        config = ConfigurationManager()
+        model_compaction_config = config.get_model_compaction_config()
+
+        if not model_compaction_config.enabled:
+            # a compact forest left from an earlier run would be served instead of the new model
+            if os.path.exists(model_compaction_config.compact_model_file):
+                os.remove(model_compaction_config.compact_model_file)
+            logger.info("Model compaction is disabled (ModelCompaction.enabled in params.yaml), skipping")
+            return
+
+        model_compaction = ModelCompaction(config=model_compaction_config)
+        model_compaction.compact()
@@ -1,10 +1,24 @@
+import inspect
+from pathlib import Path
 from mlProject.config.configuration import ConfigurationManager
 from mlProject.components.model_evaluation import ModelEvaluation
+from mlProject.pipeline.stage_cache import StageSpec
+from mlProject.utils.common import resolve_array_path
 
 class ModelEvaluationPipeline:
     def __init__(self):
         pass
 
+    def cache_spec(self):
+        config = ConfigurationManager().get_model_evaluation_config()
+        return StageSpec(
+            inputs = [inspect.getfile(ModelEvaluation), resolve_array_path(Path(config.X_test_transformed_path)),
+                      resolve_array_path(Path(config.y_test_path)), config.model_path]
+                     + ([config.search_report_file] if config.search_report_file else []),
+            params = {"all_params": dict(config.all_params), "mlflow_uri": config.mlflow_uri},
+            outputs = [config.metric_file]
+        )
+
     def main(self):
         config = ConfigurationManager()
         model_evaluation_config = config.get_model_evaluation_config()
@@ -0,0 +1,26 @@
+import os
+import inspect
+from mlProject.config.configuration import ConfigurationManager
+from mlProject.components.model_packaging import ModelPackaging
+from mlProject.components.fused_model import FusedModel
+from mlProject.pipeline.stage_cache import StageSpec
+
+class ModelPackagingPipeline:
+    def __init__(self):
+        pass
+
+    def cache_spec(self):
+        config = ConfigurationManager().get_model_packaging_config()
+        # the forests are packaged when present, the package is not written for models that are not forests
+        forests = [path for path in (config.forest_path, config.compact_model_file) if os.path.exists(path)]
+        return StageSpec(
+            inputs = [inspect.getfile(ModelPackaging), inspect.getfile(FusedModel), config.model_path,
+                      config.scaler_path, config.encoder_path, config.test_data_path] + forests,
+            outputs = [config.report_file] + ([config.packaged_model_file] if os.path.exists(config.packaged_model_file) else [])
+        )
+
+    def main(self):
+        config = ConfigurationManager()
+        model_packaging_config = config.get_model_packaging_config()
+        model_packaging = ModelPackaging(config=model_packaging_config)
+        model_packaging.package()
@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+from mlProject import logger
+from mlProject.pipeline.prediction_pipeline import PredictionPipeline, get_artifact_paths, OPTIONAL_ARTIFACTS
+from mlProject.pipeline.training_jobs import get_training_lock_path, training_lock_held
+
+# written after a successful training run, points at the published snapshot to serve
+VERSION_STAMP_FILE = 'model_version.json'
+
+# published snapshots live in artifacts/serving/<version>, the newest few are kept for workers still on them
+SERVING_DIR = 'serving'
+KEEP_PUBLISHED = 3
+
+def get_version_stamp_path(base_dir=None):
+    if base_dir is None:
+        base_dir = os.path.join(os.getcwd(), 'artifacts')
+    return os.path.join(base_dir, VERSION_STAMP_FILE)
+
+
+def read_version_stamp(base_dir=None):
+    """reads the stamp of the published model version
+
+    Args:
+        base_dir (str, optional): artifacts root. Defaults to ./artifacts.
+
+    Returns:
+        dict: version, created_at and the snapshot path, or None when nothing was published yet
+    """
+    path = get_version_stamp_path(base_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        stamp = json.load(f)
+    # stamps from before snapshots were published do not point at a servable set
+    return stamp if "path" in stamp else None
+
+
+def publish_artifacts(base_dir=None) -> str:
+    """copies the serving artifacts into a new snapshot and stamps it as the version to serve
+
+    The snapshot is filled under a staging name and renamed into place, and
+    the stamp is only replaced after that, so serving never sees a partial set.
+
+    Args:
+        base_dir (str, optional): artifacts root. Defaults to ./artifacts.
+
+    Returns:
+        str: the new version id
+    """
+    if base_dir is None:
+        base_dir = os.path.join(os.getcwd(), 'artifacts')
+
+    version = uuid.uuid4().hex[:12]
+    snapshot_dir = os.path.join(base_dir, SERVING_DIR, version)
+    staging_dir = f"{snapshot_dir}.staging"
+
+    # copies, not hard links: the stages rewrite their files in place on the next run
+    staging_paths = get_artifact_paths(staging_dir)
+    for name, path in get_artifact_paths(base_dir).items():
+        if not os.path.exists(path):
+            if name in OPTIONAL_ARTIFACTS:
+                continue
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise FileNotFoundError(f"Cannot publish model version {version}, missing artifact: {path}")
+        os.makedirs(os.path.dirname(staging_paths[name]), exist_ok=True)
+        shutil.copy2(path, staging_paths[name])
+    os.replace(staging_dir, snapshot_dir)
+
+    path = get_version_stamp_path(base_dir)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": version, "created_at": time.time(), "path": os.path.join(SERVING_DIR, version)}, f)
+    os.replace(tmp_path, path)
+
+    prune_published(base_dir, current=version)
+    logger.info(f"Model version {version} published at: {snapshot_dir}")
+    return version
+
+
+# method to delete all but the newest KEEP_PUBLISHED snapshots and any staging left by a crashed run
+def prune_published(base_dir, current):
+    serving_dir = os.path.join(base_dir, SERVING_DIR)
+    entries = sorted(os.scandir(serving_dir), key=lambda entry: entry.stat().st_mtime_ns, reverse=True)
+    kept = [current]
+    for entry in entries:
+        if entry.name in kept:
+            continue
+        if len(kept) < KEEP_PUBLISHED and not entry.name.endswith(".staging"):
+            kept.append(entry.name)
+            continue
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+class ModelRegistry:
+    """Process-wide holder of the loaded PredictionPipeline.
+
+    Artifacts are loaded once per worker and shared by every request. The
+    registry watches the version stamp written by a successful training run
+    and swaps in the snapshot it points to when it changes; requests already
+    holding the previous pipeline keep using it until they finish. Before the
+    first publish it serves artifacts/ itself, tracked by mtimes, but only
+    while no training holds the lock.
+    """
+
+    def __init__(self, base_dir=None, check_interval=None):
+        self.base_dir = base_dir
+        if check_interval is None:
+            check_interval = float(os.environ.get('MODEL_RELOAD_INTERVAL', 2.0))
+        self.check_interval = check_interval
+
+        self._pipeline = None
+        self._version = None
+        self._loaded_at = None
+        self._load_seconds = None
+        self._last_check = 0.0
+        self._reload_lock = threading.Lock()
+
+    # method to get the version to serve and the directory holding its artifacts
+    def published(self):
+        stamp = read_version_stamp(self.base_dir)
+        base_dir = self.base_dir or os.path.join(os.getcwd(), 'artifacts')
+        if stamp is not None:
+            snapshot_dir = os.path.join(base_dir, stamp["path"])
+            if not os.path.isdir(snapshot_dir):
+                raise FileNotFoundError(f"Published model version {stamp['version']} is missing: {snapshot_dir}")
+            return stamp["version"], snapshot_dir
+
+        # nothing published yet: artifacts/ is only consistent while no training is rewriting it
+        if training_lock_held(get_training_lock_path(base_dir)):
+            raise RuntimeError("No published model version yet and a training run is writing the artifacts")
+
+        h = hashlib.sha1()
+        for name, path in sorted(get_artifact_paths(base_dir).items()):
+            if name in OPTIONAL_ARTIFACTS and not os.path.exists(path):
+                h.update(f"{name}:missing;".encode())
+                continue
+            stat = os.stat(path)
+            h.update(f"{name}:{stat.st_mtime_ns}:{stat.st_size};".encode())
+        return h.hexdigest()[:12], base_dir
+
+    def artifact_version(self):
+        return self.published()[0]
+
+    @property
+    def version(self):
+        return self._version
+
+    @property
+    def loaded_at(self):
+        return self._loaded_at
+
+    @property
+    def load_seconds(self):
+        return self._load_seconds
+
+    def get(self) -> PredictionPipeline:
+        """returns the current pipeline, loading or reloading it if needed
+
+        Returns:
+            PredictionPipeline: shared, read-only pipeline instance
+        """
+        pipeline = self._pipeline
+        if pipeline is None:
+            return self.reload()
+
+        now = time.monotonic()
+        if self.check_interval >= 0 and now - self._last_check >= self.check_interval:
+            self._last_check = now
+            try:
+                if self.artifact_version() != self._version:
+                    return self.reload()
+            except (OSError, ValueError, KeyError, RuntimeError) as e:
+                # nothing servable to switch to right now; keep serving what we have
+                logger.warning(f"Could not stat model artifacts, keeping version {self._version}: {e}")
+
+        return self._pipeline
+
+    def reload(self, force=False) -> PredictionPipeline:
+        """loads the artifacts and atomically swaps the shared pipeline
+
+        Args:
+            force (bool, optional): reload even if the version is unchanged. Defaults to False.
+
+        Returns:
+            PredictionPipeline: the pipeline now being served
+        """
+        with self._reload_lock:
+            try:
+                version, artifacts_dir = self.published()
+                if not force and self._pipeline is not None and version == self._version:
+                    return self._pipeline
+
+                start = time.perf_counter()
+                pipeline = PredictionPipeline(base_dir=artifacts_dir)
+                pipeline.version = version
+
+                # unpublished artifacts changed while we were reading them, pick them up next check
+                try:
+                    changed = self.artifact_version() != version
+                except RuntimeError:
+                    changed = True
+                if changed:
+                    logger.warning("Model artifacts changed during load, will reload on next check")
+
+                self._pipeline = pipeline
+                self._version = version
+                self._loaded_at = time.time()
+                self._load_seconds = time.perf_counter() - start
+                self._last_check = 0.0 if changed else time.monotonic()
+                logger.info(f"Model registry loaded version {version} in {self._load_seconds:.3f}s")
+
+            except Exception as e:
+                if self._pipeline is None:
+                    raise
+                logger.error(f"Model reload failed, keeping version {self._version}: {str(e)}")
+
+            return self._pipeline
+
+
+# one registry per worker process
+model_registry = ModelRegistry()
@@ -1,10 +1,33 @@
+import os
+import inspect
+from pathlib import Path
 from mlProject.config.configuration import ConfigurationManager
 from mlProject.components.model_trainer import ModelTrainer
+from sklearn.ensemble import RandomForestRegressor
+from mlProject.pipeline.stage_cache import StageSpec
+from mlProject.utils.common import resolve_array_path
 
 class ModelTrainerPipeline:
     def __init__(self):
         pass
 
+    def cache_spec(self):
+        config = ConfigurationManager().get_model_trainer_config()
+        outputs = [os.path.join(config.root_dir, config.model_name)]
+        # only forests are exported for the flat inference engine
+        if isinstance(ModelTrainer(config).get_model(), RandomForestRegressor):
+            outputs.append(os.path.join(config.root_dir, "forest.npz"))
+
+        return StageSpec(
+            inputs = [inspect.getfile(ModelTrainer), resolve_array_path(Path(config.X_train_transformed_path)),
+                      resolve_array_path(Path(config.y_train_path))] + ([config.best_params_file] if config.best_params_file else []),
+            # n_jobs and backend only change how fast the same forest is grown
+            params = {"n_estimators": config.n_estimators, "random_state": config.random_state,
+                      "max_samples": config.max_samples, "max_features": config.max_features,
+                      "chunked": config.chunked, "chunk_rows": config.chunk_rows, "max_leaf_nodes": config.max_leaf_nodes},
+            outputs = outputs
+        )
+
     def main(self):
         config = ConfigurationManager()
         model_trainer_config = config.get_model_trainer_config()
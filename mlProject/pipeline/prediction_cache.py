@@ -0,0 +1,117 @@
+import sys
+import time
+import threading
+from collections import OrderedDict
+from mlProject.pipeline.prediction_pipeline import INPUT_COLS, CATEGORICAL_COLS
+
+# rough cost of an OrderedDict slot plus the (value, expiry, size) record
+ENTRY_OVERHEAD_BYTES = 200
+
+class PredictionCache:
+    """Bounded LRU (optionally TTL) cache of single-diamond predictions.
+
+    Keys are the model version plus the nine input fields, with numbers
+    as exact floats and categories as given, so only requests the model
+    prices identically share an entry and a retrain never serves stale prices.
+    """
+
+    def __init__(self, max_entries=10000, max_bytes=16 * 1024 * 1024, ttl_seconds=0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def make_key(self, record: dict, version) -> tuple:
+        """builds the normalized cache key for one diamond
+
+        Args:
+            record (dict): the INPUT_COLS fields of a single diamond
+            version (str): version of the model that will price it
+
+        Returns:
+            tuple: hashable cache key
+        """
+        key = [version]
+        for col in INPUT_COLS:
+            value = record[col]
+            # the transform looks categories up as given and converts numbers with float(), nothing coarser,
+            # so e.g. 1.0000001 and 1.0 or ' Ideal' and 'Ideal' are priced apart and cached apart
+            if col in CATEGORICAL_COLS:
+                key.append(repr(value))
+            else:
+                key.append(float(value))
+        return tuple(key)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at, size = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        size = ENTRY_OVERHEAD_BYTES + sys.getsizeof(key) + sum(sys.getsizeof(part) for part in key) + sys.getsizeof(value)
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else None
+
+        with self._lock:
+            # a new model version makes every existing entry unreachable
+            if key[0] != self._version:
+                self._entries.clear()
+                self._bytes = 0
+                self._version = key[0]
+
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "model_version": self._version
+        }
@@ -1,28 +1,92 @@
 import os
-import joblib
-import pandas as pd
+import time
+import threading
 import numpy as np
 from pathlib import Path
 from mlProject import logger
+from mlProject.utils.lazy import LazyModule
+# request fields; the model's feature order is read from the fitted scaler and encoder, see FusedModel
+from mlProject.constants import INPUT_COLS, NUMERICAL_COLS, CATEGORICAL_COLS
+from mlProject.components.flat_forest import FlatForest
+from mlProject.components.fused_model import FusedModel, file_stamp
+from mlProject.components.quote_grid import QuoteGrid
+from mlProject.pipeline.metrics import stage_seconds
+from mlProject.utils.profiling import profiled
+
+# imported on first use: joblib pulls in sklearn when it unpickles the artifacts, pandas only batch paths need
+joblib = LazyModule('joblib')
+pd = LazyModule('pandas')
+
+# artifacts that are used when present but not required for serving
+OPTIONAL_ARTIFACTS = {'forest', 'compact_forest', 'fused_model', 'quote_grid'}
+
+# inference engine: "auto" uses the flat forest for small inputs, "sklearn" or "flat" force one
+INFERENCE_ENGINE = os.environ.get('INFERENCE_ENGINE', 'auto')
+FLAT_FOREST_MAX_ROWS = int(os.environ.get('FLAT_FOREST_MAX_ROWS', 128))
+
+# serve the flat forest memory mapped, without loading model.joblib, so worker processes share its pages
+MODEL_MMAP = os.environ.get('MODEL_MMAP', '0').lower() in ('1', 'true', 'yes')
+
+def get_artifact_paths(base_dir=None):
+    """returns the model, scaler, encoder, flat forest, compact forest, packaged model and quote grid paths used for serving
+
+    Args:
+        base_dir (str, optional): artifacts root. Defaults to ./artifacts.
+
+    Returns:
+        dict: artifact name -> file path
+    """
+    if base_dir is None:
+        base_dir = os.path.join(os.getcwd(), 'artifacts')
+
+    return {
+        'model': os.path.join(base_dir, 'model_trainer', 'model.joblib'),
+        'scaler': os.path.join(base_dir, 'data_transformation', 'scaler.pkl'),
+        'encoder': os.path.join(base_dir, 'data_transformation', 'encoder.pkl'),
+        'forest': os.path.join(base_dir, 'model_trainer', 'forest.npz'),
+        'compact_forest': os.path.join(base_dir, 'model_compaction', 'forest_compact.npz'),
+        'fused_model': os.path.join(base_dir, 'model_packaging', 'model.npz'),
+        'quote_grid': os.path.join(base_dir, 'quote_grid', 'quote_grid.npz'),
+    }
+
 
 class PredictionPipeline:
-    def __init__(self):
+    def __init__(self, base_dir=None):
         try:
             # Define base paths
-            base_dir = os.path.join(os.getcwd(), 'artifacts')
-            model_path = os.path.join(base_dir, 'model_trainer', 'model.joblib')
-            scaler_path = os.path.join(base_dir, 'data_transformation', 'scaler.pkl')
-            encoder_path = os.path.join(base_dir, 'data_transformation', 'encoder.pkl')
+            artifact_paths = get_artifact_paths(base_dir)
+            model_path = artifact_paths['model']
+            scaler_path = artifact_paths['scaler']
+            encoder_path = artifact_paths['encoder']
             
             # Check if files exist
             for path in [model_path, scaler_path, encoder_path]:
                 if not os.path.exists(path):
                     raise FileNotFoundError(f"Required file not found: {path}")
             
-            # Load artifacts
-            self.model = joblib.load(model_path)
-            self.scaler = joblib.load(scaler_path)
-            self.encoder = joblib.load(encoder_path)
+            # the packaged model holds the preprocessing and the forest, nothing else is loaded
+            self.fused = self._load_fused_model(artifact_paths['fused_model'], model_path, scaler_path, encoder_path)
+            if self.fused is not None:
+                self.model, self.flat_forest = None, self.fused.forest
+            else:
+                # Load artifacts, the compact forest (or in MODEL_MMAP mode the full one) replaces the sklearn model
+                self.flat_forest = self._load_standalone_forest(artifact_paths['compact_forest'], model_path)
+                if self.flat_forest is None and MODEL_MMAP:
+                    self.flat_forest = self._load_standalone_forest(artifact_paths['forest'], model_path)
+                self.model = joblib.load(model_path) if self.flat_forest is None else None
+                if self.model is not None:
+                    self.flat_forest = self._load_flat_forest(artifact_paths['forest'])
+                self.fused = FusedModel.from_sklearn(joblib.load(scaler_path), joblib.load(encoder_path), self.flat_forest)
+
+            # the feature order comes from the fitted scaler and encoder, the request fields must all be there
+            if sorted(self.fused.feature_names) != sorted(INPUT_COLS):
+                raise ValueError(f"Model was fitted on {self.fused.feature_names}, expected the fields {INPUT_COLS}")
+            # float32 is what the flat forest compares (and sklearn forests cast to); any other sklearn
+            # model, e.g. gradient boosting, gets the unrounded float64 features it was trained on
+            self.feature_dtype = np.float32 if self.flat_forest is not None else np.float64
+            self._row_buffers = threading.local()
+
+            self.quote_grid = self._load_quote_grid(artifact_paths['quote_grid'], model_path, scaler_path, encoder_path)
             
             logger.info("Successfully loaded all model artifacts")
             
@@ -30,72 +94,240 @@ class PredictionPipeline:
             logger.error(f"Error initializing PredictionPipeline: {str(e)}")
             raise
 
+    # the packaged model, when it was built from exactly these model, scaler and encoder files
+    def _load_fused_model(self, fused_path, model_path, scaler_path, encoder_path):
+        if INFERENCE_ENGINE == 'sklearn' or not os.path.exists(fused_path):
+            return None
+
+        fused = FusedModel.load(fused_path, mmap=MODEL_MMAP)
+        sources = {'source_model': model_path, 'source_scaler': scaler_path, 'source_encoder': encoder_path}
+        for key, path in sources.items():
+            if fused.meta.get(key) != file_stamp(path):
+                logger.warning(f"Ignoring {fused_path}: it was not built from {path}")
+                return None
+
+        logger.info(f"Serving {fused_path} ({fused.forest.n_trees} trees{', memory mapped' if MODEL_MMAP else ''}), "
+                    f"{model_path}, {scaler_path} and {encoder_path} are not loaded")
+        return fused
+
+    # the quote grid, when it was built from exactly these model, scaler and encoder files
+    def _load_quote_grid(self, grid_path, model_path, scaler_path, encoder_path):
+        if not os.path.exists(grid_path):
+            return None
+
+        quote_grid = QuoteGrid.load(grid_path)
+        sources = {'source_model': model_path, 'source_scaler': scaler_path, 'source_encoder': encoder_path}
+        for key, path in sources.items():
+            if quote_grid.sources.get(key) != file_stamp(path):
+                logger.warning(f"Ignoring {grid_path}: it was not built from {path}")
+                return None
+
+        return quote_grid
+
+    # a flat forest served on its own, without model.joblib
+    def _load_standalone_forest(self, forest_path, model_path):
+        if INFERENCE_ENGINE == 'sklearn' or not os.path.exists(forest_path):
+            return None
+
+        flat_forest = FlatForest.load(forest_path, mmap=MODEL_MMAP)
+
+        # built from exactly this model file, otherwise it is left over from an earlier training
+        if flat_forest.meta.get('source_model') != file_stamp(model_path):
+            logger.warning(f"Ignoring {forest_path}: it was not built from {model_path}")
+            return None
+
+        logger.info(f"Serving {forest_path} ({flat_forest.n_trees} trees{', memory mapped' if MODEL_MMAP else ''}), "
+                    f"{model_path} is not loaded")
+        return flat_forest
+
+    def _load_flat_forest(self, forest_path):
+        if INFERENCE_ENGINE == 'sklearn' or not os.path.exists(forest_path):
+            return None
+
+        flat_forest = FlatForest.load(forest_path)
+
+        # a forest exported from a different model must never be used
+        estimators = getattr(self.model, 'estimators_', [])
+        expected_nodes = sum(estimator.tree_.node_count for estimator in estimators)
+        if flat_forest.n_trees != len(estimators) or flat_forest.n_nodes != expected_nodes:
+            logger.warning(f"Ignoring {forest_path}: it does not match the loaded model")
+            return None
+
+        return flat_forest
+
+    # method to get this thread's feature buffer for a single diamond
+    def _row_buffer(self):
+        row = getattr(self._row_buffers, 'row', None)
+        if row is None:
+            row = self._row_buffers.row = np.empty((1, self.fused.n_features), dtype=self.feature_dtype)
+        return row
+
+    @profiled
+    def transform_record(self, record: dict):
+        """transforms one diamond without pandas, identical to data_transform
+
+        Args:
+            record (dict): the nine input fields of a single diamond
+
+        Returns:
+            np.ndarray: (1, 9) row of feature_dtype, reused by later calls on the same thread
+        """
+        start = time.perf_counter()
+        row = self.fused.transform_records([record], out=self._row_buffer(), dtype=self.feature_dtype)
+        stage_seconds.observe(time.perf_counter() - start, ("transform",))
+        return row
+
+    @profiled
+    def predict_records(self, records, out=None):
+        """transforms and predicts diamonds given as dicts, without pandas
+
+        Args:
+            records (list): dicts with the nine input fields
+            out (np.ndarray, optional): float64 buffer of len(records) to write the predictions into
+
+        Returns:
+            np.ndarray: float64 predictions (out when given)
+        """
+        start = time.perf_counter()
+        features = self._row_buffer() if len(records) == 1 else None
+        X = self.fused.transform_records(records, out=features, dtype=self.feature_dtype)
+        stage_seconds.observe(time.perf_counter() - start, ("transform",))
+        return self.predict(X, out=out)
+
+    @profiled
     def data_transform(self, data):
         try:
-            logger.info("Starting data transformation")
-            
-            # Define expected columns
-            numerical_cols = ['carat', 'depth', 'table', 'x', 'y', 'z']
-            categorical_cols = ['cut', 'color', 'clarity']
-            
-            # Check if all required columns are present
-            missing_cols = [col for col in numerical_cols + categorical_cols 
-                          if col not in data.columns]
-            if missing_cols:
-                raise ValueError(f"Missing required columns: {missing_cols}")
-
-            # Apply scaler to numerical columns
-            num_data = data[numerical_cols].copy()
-            num_data_transformed = pd.DataFrame(
-                self.scaler.transform(num_data),
-                columns=numerical_cols,
-                index=data.index
-            )
-            
-            # Encode categorical variables
-            cat_data = data[categorical_cols].copy()
-            
-            try:
-                # Try to transform and handle different encoder output types
-                cat_encoded = self.encoder.transform(cat_data)
-                
-                # Handle different types of encoder outputs
-                if hasattr(cat_encoded, 'toarray'):
-                    # Sparse matrix (from OneHotEncoder)
-                    cat_data_encoded = cat_encoded.toarray()
-                elif isinstance(cat_encoded, np.ndarray):
-                    # Already a numpy array (from LabelEncoder or OrdinalEncoder)
-                    cat_data_encoded = cat_encoded
-                else:
-                    # Convert to numpy array
-                    cat_data_encoded = np.array(cat_encoded)
-                
-                # Ensure it's 2D for concatenation
-                if cat_data_encoded.ndim == 1:
-                    cat_data_encoded = cat_data_encoded.reshape(-1, 1)
-                    
-            except Exception as e:
-                logger.error(f"Error encoding categorical data: {str(e)}")
-                raise
-            
-            # Combine numerical and categorical features
-            X_transformed = np.hstack([num_data_transformed.values, cat_data_encoded])
+            start = time.perf_counter()
+            logger.debug("Starting data transformation")
+
+            # columns are picked by name and laid out in the order the model was trained on
+            X_transformed = self.fused.transform_columns(data, dtype=self.feature_dtype)
             
-            logger.info(f"Data transformation completed. Shape: {X_transformed.shape}")
+            stage_seconds.observe(time.perf_counter() - start, ("transform",))
+            logger.debug("Data transformation completed. Shape: %s", X_transformed.shape)
             return X_transformed
             
         except Exception as e:
             logger.error(f"Error in data transformation: {str(e)}")
             raise
 
-    def predict(self, X):
+    @profiled
+    def validate_batch(self, data):
+        """validates every row of a batch in one vectorized pass
+
+        Args:
+            data (pd.DataFrame): raw rows with the INPUT_COLS fields
+
+        Returns:
+            tuple: (valid rows as a clean DataFrame, boolean mask of valid rows,
+                    list of {"row", "message"} dicts for the rejected rows)
+        """
+        start = time.perf_counter()
+        missing_cols = [col for col in INPUT_COLS if col not in data.columns]
+        if missing_cols:
+            raise ValueError(f"Missing required columns: {missing_cols}")
+
+        n_rows = len(data)
+        problems = []
+        clean = pd.DataFrame(index=data.index)
+
+        for col in self.fused.numerical_cols:
+            raw = data[col]
+            values = pd.to_numeric(raw, errors='coerce').astype('float64')
+            clean[col] = values
+            # JSON true/false would otherwise be read as 1.0 and 0.0
+            if raw.dtype == bool:
+                is_bool = np.ones(n_rows, dtype=bool)
+            elif raw.dtype == object:
+                is_bool = raw.map(type).isin([bool, np.bool_]).to_numpy()
+            else:
+                is_bool = np.zeros(n_rows, dtype=bool)
+            missing = values.isna().to_numpy() | is_bool
+            problems.append((missing, f"'{col}' must be a number"))
+            problems.append((~missing & np.isinf(values.to_numpy()), f"'{col}' must be a finite number"))
+            problems.append(((values <= 0).to_numpy(), f"'{col}' must be positive"))
+
+        for col in self.fused.categorical_cols:
+            categories = self.fused.categories[col]
+            values = data[col].astype('string').str.strip()
+            clean[col] = values.astype(object)
+            problems.append((~values.isin(categories).fillna(False).to_numpy(dtype=bool),
+                             f"'{col}' must be one of {list(categories)}"))
+
+        invalid = np.zeros(n_rows, dtype=bool)
+        for mask, _ in problems:
+            invalid |= mask
+
+        # only rejected rows are visited in Python to build their messages
+        errors = []
+        for row in np.flatnonzero(invalid):
+            messages = [message for mask, message in problems if mask[row]]
+            errors.append({"row": int(row), "message": "; ".join(messages)})
+
+        valid = ~invalid
+        clean = clean.loc[valid, INPUT_COLS]
+        stage_seconds.observe(time.perf_counter() - start, ("validate",))
+        return clean, valid, errors
+
+    @profiled
+    def predict_batch(self, data):
+        """validates, transforms and predicts a whole batch at once
+
+        Args:
+            data (pd.DataFrame): raw rows with the INPUT_COLS fields
+
+        Returns:
+            tuple: (per-row predictions with None for rejected rows, list of row errors)
+        """
+        clean, valid, errors = self.validate_batch(data)
+
+        results = np.full(len(data), None, dtype=object)
+        if len(clean):
+            X = self.data_transform(clean)
+            results[valid] = self.predict(X)
+
+        logger.debug("Batch prediction completed. Rows: %d, rejected: %d", len(data), len(errors))
+        return results.tolist(), errors
+
+    @profiled
+    def quote(self, record: dict):
+        """approximate price from the precomputed quote grid
+
+        Args:
+            record (dict): the nine input fields of a single diamond
+
+        Returns:
+            tuple or None: (price, max abs error measured on held-out data, not a bound for this diamond),
+                           None when there is no grid, the diamond is outside it or its x, y, z
+                           are untypical for its carat
+        """
+        if self.quote_grid is None:
+            return None
+
+        price = self.quote_grid.quote(record)
+        if price is None:
+            return None
+        return price, self.quote_grid.error_bound['max_abs_error']
+
+    @profiled
+    def predict(self, X, out=None):
         try:
-            logger.info("Making prediction")
+            start = time.perf_counter()
+            logger.debug("Making prediction")
             
             # Make predictions
-            predictions = self.model.predict(X)
+            if self.model is None or (self.flat_forest is not None and (INFERENCE_ENGINE == 'flat' or len(X) <= FLAT_FOREST_MAX_ROWS)):
+                predictions = self.flat_forest.predict(X, out=out)
+            elif out is not None:
+                out[:] = self.model.predict(X)
+                predictions = out
+            else:
+                predictions = self.model.predict(X)
             
-            logger.info(f"Prediction completed. Result: {predictions}")
+            stage_seconds.observe(time.perf_counter() - start, ("predict",))
+
+            # the count only: stringifying the predictions of a large batch costs more than scoring it
+            logger.debug("Prediction completed. Rows: %d", len(predictions))
             return predictions
             
         except Exception as e:
@@ -0,0 +1,36 @@
+import os
+import inspect
+from mlProject import logger
+from mlProject.config.configuration import ConfigurationManager
+from mlProject.components.quote_grid_builder import QuoteGridBuilder
+from mlProject.pipeline.stage_cache import StageSpec
+
+class QuoteGridPipeline:
+    def __init__(self):
+        pass
+
+    def cache_spec(self):
+        config = ConfigurationManager().get_quote_grid_config()
+        if not config.enabled:
+            return StageSpec(params = {"enabled": False})
+        return StageSpec(
+            inputs = [inspect.getfile(QuoteGridBuilder), config.data_path, config.test_data_path,
+                      config.model_path, config.scaler_path, config.encoder_path],
+            params = {"axes": config.axes, "lower_quantile": config.lower_quantile,
+                      "upper_quantile": config.upper_quantile, "derived_quantile": config.derived_quantile},
+            outputs = [config.grid_file, config.report_file]
+        )
+
+    def main(self):
+        config = ConfigurationManager()
+        quote_grid_config = config.get_quote_grid_config()
+
+        if not quote_grid_config.enabled:
+            # a grid left from an earlier run would quote prices of an older model
+            if os.path.exists(quote_grid_config.grid_file):
+                os.remove(quote_grid_config.grid_file)
+            logger.info("Quote grid is disabled (QuoteGrid.enabled in params.yaml), skipping")
+            return
+
+        quote_grid = QuoteGridBuilder(config=quote_grid_config)
+        quote_grid.build()
\ No newline at end of file
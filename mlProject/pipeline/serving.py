@@ -0,0 +1,145 @@
+"""
+Request handling shared by the WSGI app (app.py) and the ASGI app (asgi.py),
+so both entry points accept the same inputs and answer with the same messages
+"""
+import os
+import math
+import random
+from mlProject import logger
+from mlProject.pipeline.prediction_pipeline import INPUT_COLS, NUMERICAL_COLS
+from mlProject.pipeline.model_registry import model_registry
+from mlProject.pipeline.metrics import metrics_registry
+from mlProject.pipeline.micro_batcher import MicroBatcher
+from mlProject.pipeline.prediction_cache import PredictionCache
+
+# upper bound on rows accepted by /predict/batch
+MAX_BATCH_ROWS = int(os.environ.get('MAX_BATCH_ROWS', 100000))
+
+# share of requests whose INFO logs are written, warnings and errors are always written
+REQUEST_LOG_SAMPLE_RATE = float(os.environ.get('REQUEST_LOG_SAMPLE_RATE', 0.01))
+
+class NullLogger:
+    """Stands in for the logger on requests whose INFO logs are not sampled."""
+
+    def debug(self, *args, **kwargs):
+        pass
+
+    info = debug
+
+NULL_LOGGER = NullLogger()
+
+# method to pick the logger for the INFO logs of one request, so a sampled request logs every line
+def request_logger():
+    return logger if random.random() < REQUEST_LOG_SAMPLE_RATE else NULL_LOGGER
+
+# method to build the micro batcher when MICRO_BATCHING is set
+def make_micro_batcher(pipeline_getter):
+    if os.environ.get('MICRO_BATCHING', '0').lower() not in ('1', 'true', 'yes'):
+        return None
+
+    return MicroBatcher(
+        pipeline_getter,
+        max_batch_size=int(os.environ.get('MICRO_BATCH_MAX_SIZE', 64)),
+        max_wait_ms=float(os.environ.get('MICRO_BATCH_MAX_WAIT_MS', 5)),
+        max_queue_size=int(os.environ.get('MICRO_BATCH_MAX_QUEUE', 1024))
+    )
+
+# method to build the prediction cache unless PREDICTION_CACHE_SIZE is 0
+def make_prediction_cache():
+    if int(os.environ.get('PREDICTION_CACHE_SIZE', 10000)) <= 0:
+        return None
+
+    return PredictionCache(
+        max_entries=int(os.environ.get('PREDICTION_CACHE_SIZE', 10000)),
+        max_bytes=int(float(os.environ.get('PREDICTION_CACHE_MAX_MB', 16)) * 1024 * 1024),
+        ttl_seconds=float(os.environ.get('PREDICTION_CACHE_TTL', 0))
+    )
+
+
+def parse_record(get_value):
+    """validates the fields of a single-diamond request
+
+    Args:
+        get_value (callable): field name -> submitted value, '' when missing
+
+    Returns:
+        tuple: (record, None) with the INPUT_COLS fields, or (None, error message)
+    """
+    missing_fields = [field for field in INPUT_COLS if not get_value(field)]
+    if missing_fields:
+        return None, f"Missing required fields: {', '.join(missing_fields)}"
+
+    try:
+        # JSON true/false would otherwise be read as 1.0 and 0.0
+        if any(isinstance(get_value(col), bool) for col in NUMERICAL_COLS):
+            raise ValueError("All numerical values must be numbers")
+        numbers = {col: float(get_value(col)) for col in NUMERICAL_COLS}
+
+        # Basic validation, inf and nan would fail every request batched with this one
+        if not all(math.isfinite(val) for val in numbers.values()):
+            raise ValueError("All numerical values must be finite")
+        if any(val <= 0 for val in numbers.values()):
+            raise ValueError("All numerical values must be positive")
+
+    except ValueError as e:
+        return None, f"Invalid input: {str(e)}"
+
+    # Single predictions skip pandas: the record goes straight to predict_records
+    record = {col: numbers[col] if col in numbers else str(get_value(col)).strip() for col in INPUT_COLS}
+    return record, None
+
+
+def get_results_context(args) -> dict:
+    """template context of the results page, from the query string of the /predict redirect
+
+    Args:
+        args (Mapping): query string arguments
+
+    Returns:
+        dict: inputs, the prediction as a float and the formatted prediction
+    """
+    prediction = args.get('prediction', '0')
+
+    # Format the prediction with 2 decimal places
+    try:
+        prediction_float = float(prediction)
+        formatted_pred = "${:,.2f}".format(prediction_float)
+    except (ValueError, TypeError) as e:
+        logger.error(f"Error formatting prediction value '{prediction}': {str(e)}")
+        prediction_float = 0.0
+        formatted_pred = "N/A"
+
+    return {
+        'carat': args.get('carat', '0'),
+        'cut': args.get('cut', 'N/A').title(),
+        'color': args.get('color', 'N/A').upper(),
+        'clarity': args.get('clarity', 'N/A').upper(),
+        'depth': args.get('depth', '0'),
+        'table': args.get('table', '0'),
+        'x': args.get('x', '0'),
+        'y': args.get('y', '0'),
+        'z': args.get('z', '0'),
+        'prediction': prediction_float,
+        'formatted_prediction': formatted_pred
+    }
+
+
+def register_serving_metrics(micro_batcher=None, prediction_cache=None, inference_pool=None):
+    """adds the served model and the optional serving components to the /metrics output
+
+    Args:
+        micro_batcher (MicroBatcher, optional): its stats() values become gempricer_batching_* gauges
+        prediction_cache (PredictionCache, optional): its stats() values become gempricer_cache_* gauges
+        inference_pool (InferencePool, optional): its stats() values become gempricer_pool_* gauges
+    """
+    metrics_registry.gauge("gempricer_model_info", "Version of the served model, always 1",
+                           lambda: [((model_registry.version,), 1)] if model_registry.version else [], ("version",))
+    metrics_registry.gauge("gempricer_model_load_seconds", "Time the last artifact load took",
+                           lambda: [((), model_registry.load_seconds)] if model_registry.load_seconds else [])
+    metrics_registry.gauge("gempricer_model_loaded_timestamp_seconds", "Unix time the served model was loaded",
+                           lambda: [((), model_registry.loaded_at)] if model_registry.loaded_at else [])
+
+    for prefix, component in [("batching", micro_batcher), ("cache", prediction_cache), ("pool", inference_pool)]:
+        if component is not None:
+            metrics_registry.stats_gauges(f"gempricer_{prefix}", f"{type(component).__name__} stats",
+                                          component.stats)
@@ -0,0 +1,149 @@
+import os
+import json
+import time
+import hashlib
+from dataclasses import dataclass, field
+import mlProject
+from mlProject import logger
+from mlProject.utils.profiling import maybe_profile
+
+# Stage cache specification
+@dataclass
+class StageSpec:
+    inputs: list = field(default_factory=list)
+    params: dict = field(default_factory=dict)
+    outputs: list = field(default_factory=list)
+
+
+class StageCache:
+    """Content-addressed manifest of completed training stages.
+
+    A stage's key is the hash of its input file contents, its params and the
+    mlProject sources, so editing any helper a stage imports reruns it too.
+    The stage can be skipped when the key matches the manifest entry and
+    every recorded output still exists unchanged. Input hashes are memoized
+    by (size, mtime) so unchanged files are not re-read on every run.
+    """
+
+    def __init__(self, manifest_path=os.path.join("artifacts", "stage_manifest.json"),
+                 package_dir=os.path.dirname(mlProject.__file__)):
+        self.manifest_path = manifest_path
+        self.package_dir = package_dir
+        self.manifest = {"stages": {}, "files": {}}
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+
+    def file_hash(self, path):
+        stat = os.stat(path)
+        memo = self.manifest["files"].get(path)
+        if memo and memo["size"] == stat.st_size and memo["mtime_ns"] == stat.st_mtime_ns:
+            return memo["sha256"]
+
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+
+        self.manifest["files"][path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": h.hexdigest()}
+        return h.hexdigest()
+
+    # method to fingerprint every module of the mlProject package
+    def source_hash(self):
+        h = hashlib.sha256()
+        for root, dirs, files in os.walk(self.package_dir):
+            dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+            for name in sorted(files):
+                if name.endswith(".py"):
+                    path = os.path.join(root, name)
+                    h.update(f"{os.path.relpath(path, self.package_dir)}:{self.file_hash(path)};".encode())
+        return h.hexdigest()
+
+    def stage_key(self, spec: StageSpec):
+        inputs = {str(path): self.file_hash(str(path)) for path in spec.inputs}
+        payload = json.dumps({"inputs": inputs, "params": spec.params, "sources": self.source_hash()},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def is_fresh(self, name, spec: StageSpec) -> bool:
+        entry = self.manifest["stages"].get(name)
+        if entry is None:
+            return False
+
+        for path, recorded in entry["outputs"].items():
+            if not os.path.exists(path):
+                return False
+            stat = os.stat(path)
+            if stat.st_size != recorded["size"] or stat.st_mtime_ns != recorded["mtime_ns"]:
+                return False
+
+        try:
+            return self.stage_key(spec) == entry["key"]
+        except OSError:
+            return False
+
+    def record(self, name, spec: StageSpec, seconds):
+        outputs = {}
+        for path in spec.outputs:
+            stat = os.stat(str(path))
+            outputs[str(path)] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+        self.manifest["stages"][name] = {
+            "key": self.stage_key(spec),
+            "outputs": outputs,
+            "seconds": round(seconds, 3),
+            "completed_at": time.time()
+        }
+        self.save()
+
+    def invalidate(self, name):
+        if self.manifest["stages"].pop(name, None) is not None:
+            self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, indent=4)
+        os.replace(tmp_path, self.manifest_path)
+
+
+class StageRunner:
+    """Runs main.py stages, skipping the ones whose StageSpec is unchanged."""
+
+    def __init__(self, use_cache=True, cache: StageCache = None):
+        self.use_cache = use_cache
+        self.cache = cache or StageCache()
+        self.summary = []
+
+    @property
+    def ran_any(self):
+        return any(entry["result"] != "hit" for entry in self.summary)
+
+    def run(self, stage_name, pipeline):
+        start = time.perf_counter()
+        spec = pipeline.cache_spec() if hasattr(pipeline, "cache_spec") else None
+
+        if self.use_cache and spec is not None and self.cache.is_fresh(stage_name, spec):
+            logger.info(f">>>>>> {stage_name} skipped <<<<<<")
+            self.summary.append({"stage": stage_name, "result": "hit", "seconds": time.perf_counter() - start})
+            return
+
+        logger.info(f">>>>>> {stage_name} started <<<<<<")
+        if spec is not None:
+            self.cache.invalidate(stage_name)
+        # profiled into logs/profiles/ when PROFILE includes "stages"
+        with maybe_profile("stages", f"stage-{stage_name}"):
+            pipeline.main()
+        seconds = time.perf_counter() - start
+        logger.info(f">>>>>> {stage_name} completed <<<<<<")
+
+        if spec is not None:
+            self.cache.record(stage_name, spec, seconds)
+        self.summary.append({"stage": stage_name, "result": "miss" if spec is not None else "uncached", "seconds": seconds})
+
+    def log_summary(self):
+        logger.info("Stage summary:")
+        for entry in self.summary:
+            logger.info(f"  {entry['stage']:<30} {entry['result']:<9} {entry['seconds']:>8.2f}s")
+        logger.info(f"  {'Total':<30} {'':<9} {sum(e['seconds'] for e in self.summary):>8.2f}s")
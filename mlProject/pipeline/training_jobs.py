@@ -0,0 +1,206 @@
+import os
+import re
+import sys
+import time
+import uuid
+import threading
+import subprocess
+from contextlib import contextmanager
+from collections import OrderedDict
+from mlProject import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+# main.py logs ">>>>>> {STAGE_NAME} started <<<<<<" around every stage (or "skipped" on a cache hit)
+STAGE_PATTERN = re.compile(r">>>>>> (?P<stage>.+?) (?P<event>started|completed|skipped) <<<<<<")
+
+TRAINING_LOCK_FILE = '.training.lock'
+
+def get_training_lock_path(base_dir=None):
+    if base_dir is None:
+        base_dir = os.path.join(os.getcwd(), 'artifacts')
+    return os.path.join(base_dir, TRAINING_LOCK_FILE)
+
+
+@contextmanager
+def training_lock(lock_path=None):
+    """holds the exclusive training lock, so only one run writes to artifacts/ at a time
+
+    Args:
+        lock_path (str, optional): lock file. Defaults to artifacts/.training.lock.
+
+    Raises:
+        RuntimeError: another training already holds the lock
+    """
+    lock_path = lock_path or get_training_lock_path()
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    with open(lock_path, "w") as lock_file:
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                raise RuntimeError("Another training is already running")
+
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+# method to check, without taking it, whether a training run holds the lock
+def training_lock_held(lock_path=None) -> bool:
+    lock_path = lock_path or get_training_lock_path()
+    if fcntl is None or not os.path.exists(lock_path):
+        return False
+
+    with open(lock_path) as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except OSError:
+            return True
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return False
+
+
+class TrainingJob:
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:12]
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.stages = []
+        self.returncode = None
+        self.error = None
+        self.model_version = None
+
+    def stage_event(self, stage, event):
+        now = time.time()
+        if event == "started":
+            self.stages.append({"name": stage, "status": "running", "started_at": now, "seconds": None})
+            return
+
+        if event == "skipped":
+            self.stages.append({"name": stage, "status": "skipped", "started_at": now, "seconds": 0.0})
+            return
+
+        for entry in reversed(self.stages):
+            if entry["name"] == stage and entry["status"] == "running":
+                entry["status"] = "completed"
+                entry["seconds"] = round(now - entry["started_at"], 3)
+                break
+
+    def to_dict(self) -> dict:
+        finished = self.finished_at or time.time()
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed_seconds": round(finished - self.started_at, 3) if self.started_at else None,
+            "stages": [dict(stage) for stage in self.stages],
+            "returncode": self.returncode,
+            "error": self.error,
+            "model_version": self.model_version
+        }
+
+
+class TrainingJobRunner:
+    """Runs main.py in the background, one training at a time.
+
+    A job is single-flight inside the process (submitting while a job is
+    queued or running returns that job) and across processes through the
+    exclusive lock main.py takes next to the artifacts, so concurrent workers
+    never write to artifacts/ at the same time.
+    """
+
+    def __init__(self, on_success=None, command=None, lock_path=None, max_jobs=20):
+        self.on_success = on_success
+        self.command = command or [sys.executable, "main.py"]
+        self.lock_path = lock_path or os.path.join("artifacts", TRAINING_LOCK_FILE)
+        self.max_jobs = max_jobs
+
+        self._jobs = OrderedDict()
+        self._active = None
+        self._lock = threading.Lock()
+
+    def submit(self):
+        """starts a training job unless one is already active
+
+        Returns:
+            tuple: (TrainingJob, bool) the job and whether it was newly created
+        """
+        with self._lock:
+            if self._active is not None and self._active.status in ("queued", "running"):
+                return self._active, False
+
+            job = TrainingJob()
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+            self._active = job
+
+        threading.Thread(target=self._run, args=(job,), name=f"training-{job.id}", daemon=True).start()
+        return job, True
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def _run(self, job):
+        # main.py takes the lock itself, this only rejects early while another process trains
+        if training_lock_held(self.lock_path):
+            job.status = "failed"
+            job.error = "Another training is already running"
+            job.finished_at = time.time()
+            logger.warning(f"Training job {job.id} rejected: {job.error}")
+            return
+
+        self._train(job)
+
+    def _train(self, job):
+        job.status = "running"
+        job.started_at = time.time()
+        logger.info(f"Training job {job.id} started")
+
+        output_tail = []
+        try:
+            process = subprocess.Popen(
+                self.command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1,
+                env={**os.environ, "PYTHONUNBUFFERED": "1"}
+            )
+            for line in process.stdout:
+                match = STAGE_PATTERN.search(line)
+                if match:
+                    job.stage_event(match.group("stage"), match.group("event"))
+                output_tail = (output_tail + [line.rstrip()])[-20:]
+            job.returncode = process.wait()
+
+            if job.returncode != 0:
+                raise RuntimeError(f"Training process exited with code {job.returncode}")
+
+            # only a successful run is swapped into serving
+            if self.on_success is not None:
+                job.model_version = self.on_success()
+
+            job.status = "succeeded"
+            logger.info(f"Training job {job.id} succeeded")
+
+        except Exception as e:
+            job.status = "failed"
+            job.error = f"{str(e)}\n" + "\n".join(output_tail)
+            for stage in job.stages:
+                if stage["status"] == "running":
+                    stage["status"] = "failed"
+            logger.error(f"Training job {job.id} failed: {str(e)}")
+
+        finally:
+            job.finished_at = time.time()
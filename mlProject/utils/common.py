@@ -9,6 +9,8 @@ from ensure import ensure_annotations
 from box import ConfigBox
 from pathlib import Path
 from typing import Any
+import numpy as np
+import pandas as pd
 
 """
 What is the use of Utils?
@@ -115,6 +117,206 @@ def load_bin(path: Path) -> Any:
     logger.info(f"binary file loaded from: {path}")
     return data
 
+# method to save a matrix between pipeline stages (.npy + metadata)
+@ensure_annotations
+def save_array(path: Path, data, columns: list = None, export_csv: bool = False) -> Path:
+    """save a 1-D/2-D array as .npy with a .meta.json sidecar
+
+    Args:
+        path (Path): target path, the suffix is replaced by .npy
+        data (np.ndarray | pd.DataFrame | pd.Series): values to save
+        columns (list, optional): feature names. Defaults to the DataFrame/Series names.
+        export_csv (bool, optional): also write a .csv copy. Defaults to False.
+
+    Returns:
+        Path: path of the .npy file
+    """
+    if columns is None and isinstance(data, pd.DataFrame):
+        columns = [str(col) for col in data.columns]
+    elif columns is None and isinstance(data, pd.Series):
+        columns = [str(data.name)]
+
+    array = np.asarray(data.to_numpy() if hasattr(data, "to_numpy") else data)
+    npy_path = Path(path).with_suffix(".npy")
+    if array.flags.c_contiguous:
+        np.save(npy_path, array, allow_pickle=False)
+    else:
+        # always row-major on disk, copied in row blocks rather than all at once
+        header = {"descr": np.lib.format.dtype_to_descr(array.dtype), "fortran_order": False, "shape": array.shape}
+        block_rows = max(1, (64 << 20) // max(1, array[:1].nbytes))
+        with open(npy_path, "wb") as f:
+            np.lib.format.write_array_header_1_0(f, header)
+            for start in range(0, len(array), block_rows):
+                f.write(np.ascontiguousarray(array[start:start + block_rows]).data)
+
+    meta = {"dtype": str(array.dtype), "shape": list(array.shape), "columns": columns}
+    with open(npy_path.with_suffix(".meta.json"), "w") as f:
+        json.dump(meta, f, indent=4)
+
+    if export_csv:
+        pd.DataFrame(array.reshape(len(array), -1), columns=columns).to_csv(npy_path.with_suffix(".csv"), index=False)
+
+    logger.info(f"array {array.shape} {array.dtype} saved at: {npy_path}")
+    return npy_path
+
+# method to find the .npy file behind a (possibly legacy .csv) artifact path
+@ensure_annotations
+def resolve_array_path(path: Path) -> Path:
+    """returns the .npy sibling of path if it exists, else path itself
+
+    Args:
+        path (Path): configured artifact path
+
+    Returns:
+        Path: file that load_array will read
+    """
+    npy_path = Path(path).with_suffix(".npy")
+    return npy_path if npy_path.exists() else Path(path)
+
+# method to load a matrix written by save_array (memory mapped)
+@ensure_annotations
+def load_array(path: Path, mmap: bool = True):
+    """load an array saved by save_array, falling back to CSV
+
+    Args:
+        path (Path): .npy path, or the legacy .csv path of the same artifact
+        mmap (bool, optional): memory map the file read-only instead of copying it. Defaults to True.
+
+    Returns:
+        np.ndarray: np.memmap when mmap is True; 1-column CSVs load as 1-D
+    """
+    npy_path = resolve_array_path(Path(path))
+    if npy_path.suffix == ".npy":
+        return np.load(npy_path, mmap_mode="r" if mmap else None, allow_pickle=False)
+
+    data = pd.read_csv(path).to_numpy()
+    logger.info(f"no .npy artifact found, loaded CSV: {path}")
+    return data.ravel() if data.shape[1] == 1 else data
+
+# method to lay out the row ranges of every block iter_array_blocks reads
+def get_array_blocks(n_rows: int, block_rows: int, seed: int = None, group_rows: int = 4096) -> list:
+    """row ranges of each block, as (start, end) pairs
+
+    Args:
+        n_rows (int): rows in the array
+        block_rows (int): rows per block, at most
+        seed (int, optional): shuffles groups of consecutive rows into the blocks. Defaults to None.
+        group_rows (int, optional): rows per group when shuffling. Defaults to 4096.
+
+    Returns:
+        list: one list of (start, end) ranges per block
+    """
+    if seed is None:
+        return [[(start, min(start + block_rows, n_rows))] for start in range(0, n_rows, block_rows)]
+
+    # at least 256 groups per block, or a block covers too few parts of the file
+    group_rows = max(1, min(group_rows, block_rows // 256))
+    order = np.random.default_rng(seed).permutation(-(-n_rows // group_rows))
+    per_block = max(1, block_rows // group_rows)
+    # groups are read in file order within a block, every row is read exactly once overall
+    return [[(g * group_rows, min((g + 1) * group_rows, n_rows)) for g in np.sort(order[i:i + per_block])]
+            for i in range(0, len(order), per_block)]
+
+# method to read a saved array one block of rows at a time
+def iter_array_blocks(path: Path, block_rows: int, seed: int = None, group_rows: int = 4096):
+    """yields row blocks of a .npy array, read from disk into fresh arrays
+
+    Args:
+        path (Path): .npy path of the artifact
+        block_rows (int): rows per block
+        seed (int, optional): when set, each block is built from randomly chosen groups of
+            consecutive rows, so blocks of a sorted file are still representative samples. Defaults to None.
+        group_rows (int, optional): rows per group when shuffling. Defaults to 4096.
+
+    Yields:
+        np.ndarray: the next block; nothing else of the file is held in memory
+    """
+    with open(resolve_array_path(Path(path)), "rb") as f:
+        version = np.lib.format.read_magic(f)
+        read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+        shape, fortran_order, dtype = read_header(f)
+        if fortran_order:
+            raise ValueError(f"{path} is stored column-major, blocks of rows are not contiguous")
+        offset = f.tell()
+        n_rows, row_shape = shape[0], shape[1:]
+        row_bytes = dtype.itemsize * int(np.prod(row_shape))
+
+        for ranges in get_array_blocks(n_rows, block_rows, seed, group_rows):
+            block = np.empty((sum(end - start for start, end in ranges),) + row_shape, dtype=dtype)
+            buffer, position = memoryview(block.reshape(-1).view(np.uint8)), 0
+            for start, end in ranges:
+                f.seek(offset + start * row_bytes)
+                f.readinto(buffer[position:position + (end - start) * row_bytes])
+                position += (end - start) * row_bytes
+            yield block
+
+# method to read the metadata written by save_array
+@ensure_annotations
+def load_array_meta(path: Path) -> ConfigBox:
+    """load dtype, shape and column names of a saved array
+
+    Args:
+        path (Path): .npy (or legacy .csv) path of the artifact
+
+    Returns:
+        ConfigBox: dtype, shape and columns
+    """
+    with open(Path(path).with_suffix(".meta.json")) as f:
+        return ConfigBox(json.load(f))
+
+# writer for .npy arrays whose length is only known at the end
+class ArrayAppender:
+    """Appends row blocks to a .npy file, for arrays too large to hold in memory.
+
+    The header is written with a fixed size and rewritten with the final
+    shape on close(), which also writes the same .meta.json sidecar as
+    save_array, so load_array can memory map the result.
+    """
+
+    HEADER_BYTES = 128
+
+    def __init__(self, path: Path, dtype, row_shape: tuple = (), columns: list = None):
+        self.path = Path(path).with_suffix(".npy")
+        self.dtype = np.dtype(dtype)
+        self.row_shape = tuple(row_shape)
+        self.columns = columns
+        self.n_rows = 0
+
+        self._file = open(self.path, "wb")
+        self._write_header()
+
+    def _write_header(self):
+        header = {"descr": np.lib.format.dtype_to_descr(self.dtype), "fortran_order": False,
+                  "shape": (self.n_rows,) + self.row_shape}
+        # magic (6) + version (2) + header length (2), then the dict padded with spaces up to HEADER_BYTES
+        text = repr(header).ljust(self.HEADER_BYTES - 11) + "\n"
+        self._file.seek(0)
+        self._file.write(np.lib.format.magic(1, 0) + len(text).to_bytes(2, "little") + text.encode("latin1"))
+
+    def append(self, block):
+        block = np.ascontiguousarray(block, dtype=self.dtype)
+        if block.shape[1:] != self.row_shape:
+            raise ValueError(f"Row shape {block.shape[1:]} does not match {self.row_shape}")
+        self._file.write(block.data)
+        self.n_rows += len(block)
+
+    def close(self) -> Path:
+        self._write_header()
+        self._file.close()
+
+        meta = {"dtype": str(self.dtype), "shape": [self.n_rows, *self.row_shape], "columns": self.columns}
+        with open(self.path.with_suffix(".meta.json"), "w") as f:
+            json.dump(meta, f, indent=4)
+
+        logger.info(f"array {(self.n_rows,) + self.row_shape} {self.dtype} saved at: {self.path}")
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
 # method to get path size (In KB)
 @ensure_annotations
 def get_size(path: Path) -> str:
@@ -0,0 +1,36 @@
+"""
+Lazy imports for the serving path. `pd = LazyModule("pandas")` reads like
+the usual import, but pandas is only imported on the first `pd.` access,
+so a web worker starts without paying for modules a request may never use
+"""
+# imports
+import importlib
+import threading
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access.
+
+    Args:
+        name (str): dotted module name, as given to import
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    # method to import the module once, the first time it is needed; private so it never
+    # shadows a module attribute of the same name (joblib.load)
+    def _import(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._import(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
@@ -0,0 +1,94 @@
+"""
+Logging plumbing used by mlProject.setup_logging: a queue handler whose
+writer runs on a background thread, so a request never waits on disk or
+stdout, and a filter giving modules their own levels on the shared
+mlProjectLogger
+"""
+# imports
+import os
+import copy
+import queue
+import logging
+from logging.handlers import QueueHandler, QueueListener
+
+class DroppingQueueHandler(QueueHandler):
+    """Hands records to a background writer through a bounded queue.
+
+    When the writer falls behind and the queue is full, records are counted
+    in `dropped` and discarded instead of blocking the thread that logged them.
+    Records are queued unformatted, message arguments and exception included,
+    and the writer's handlers format them; arguments logged as mutable objects
+    are therefore rendered as they are when the writer gets to them.
+    """
+
+    def __init__(self, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+
+    # method to queue a copy of the record as logged, QueueHandler's default formats it on the calling thread
+    def prepare(self, record):
+        return copy.copy(record)
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class ModuleLevelFilter(logging.Filter):
+    """Applies per-module levels, keyed on the file name of the caller.
+
+    Args:
+        levels (dict): module name (e.g. "prediction_pipeline") -> level
+        default (int): level of every other module
+    """
+
+    def __init__(self, levels, default):
+        super().__init__()
+        self.levels = levels
+        self.default = default
+
+    def filter(self, record):
+        return record.levelno >= self.levels.get(record.module, self.default)
+
+# method to parse "prediction_pipeline=DEBUG,app=WARNING" into {module: level}
+def parse_module_levels(spec: str) -> dict:
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        module, _, name = item.partition("=")
+        level = logging.getLevelName(name.strip().upper())
+        if not isinstance(level, int):
+            raise ValueError(f"Unknown log level in LOG_MODULE_LEVELS: {item!r}")
+        levels[module.strip()] = level
+    return levels
+
+
+class BackgroundLogWriter:
+    """Runs the real handlers on a listener thread fed by a DroppingQueueHandler.
+
+    A forked child (a gunicorn worker of a preloading master) does not inherit
+    the listener thread, so the child gets a fresh queue and its own listener.
+    """
+
+    def __init__(self, handlers, maxsize=10000):
+        self.handlers = handlers
+        self.queue_handler = DroppingQueueHandler(maxsize)
+        self._maxsize = maxsize
+        self._listener = None
+        self.start()
+        os.register_at_fork(after_in_child=self._restart_in_child)
+
+    def start(self):
+        self._listener = QueueListener(self.queue_handler.queue, *self.handlers, respect_handler_level=True)
+        self._listener.start()
+
+    # method to write out every queued record, called at exit
+    def stop(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def _restart_in_child(self):
+        self.queue_handler.queue = queue.Queue(self._maxsize)
+        self.start()
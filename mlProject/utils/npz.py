@@ -0,0 +1,47 @@
+"""
+Reading helpers for the serving path: numpy and the standard library only,
+so a web worker can load the flat forest without importing utils.common
+(yaml, box, ensure, pandas, joblib)
+"""
+# imports
+import struct
+import zipfile
+import numpy as np
+from pathlib import Path
+
+# method to memory map the arrays of an .npz archive
+def load_npz_mmap(path: Path) -> dict:
+    """memory maps every array of an uncompressed .npz (as written by np.savez), read-only
+
+    Args:
+        path (Path): .npz file
+
+    Returns:
+        dict: array name -> array backed by the file; 0-d and empty arrays are read into memory
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            name = info.filename[:-len(".npy")] if info.filename.endswith(".npy") else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{info.filename} in {path} is compressed and cannot be memory mapped")
+
+            # the member's data follows its local header: 30 fixed bytes, then the file name and extra field
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack("<HH", f.read(4))
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+
+            version = np.lib.format.read_magic(f)
+            read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+            shape, fortran_order, dtype = read_header(f)
+
+            if not shape or 0 in shape or dtype.hasobject:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member)
+                continue
+
+            # a plain ndarray view, the mapping stays open as long as the view is referenced
+            arrays[name] = np.asarray(np.memmap(path, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+                                                order="F" if fortran_order else "C"))
+
+    return arrays
@@ -0,0 +1,233 @@
+"""
+Opt-in profiling of the main.py stages and of prediction requests.
+
+PROFILE lists what is profiled: "stages" profiles every main.py stage that
+runs, "requests" the PredictionPipeline calls of every request. With
+PROFILE_HEADER=1 a single request is profiled by sending "X-Profile: 1".
+PROFILE_MEMORY=1 also traces allocations with tracemalloc while a profile
+runs. Each profile is written to logs/profiles/ as <name>.prof (cProfile,
+readable with pstats or snakeviz) and <name>.tracemalloc, where the name is
+the stage or the request ID. To list the hottest functions across runs:
+
+    python -m mlProject.utils.profiling "stage-*" --top 25
+"""
+import os
+import re
+import sys
+import glob
+import time
+import uuid
+import pstats
+import cProfile
+import argparse
+import functools
+import threading
+import contextlib
+import contextvars
+import tracemalloc
+from mlProject import logger, log_dir
+
+PROFILE_TARGETS = {target.strip().lower() for target in os.environ.get('PROFILE', '').split(',') if target.strip()}
+PROFILE_HEADER = os.environ.get('PROFILE_HEADER', '0').lower() in ('1', 'true', 'yes')
+PROFILE_MEMORY = os.environ.get('PROFILE_MEMORY', '0').lower() in ('1', 'true', 'yes')
+
+profile_dir = os.path.join(log_dir, "profiles")
+
+# request ID of the request being profiled in this context, None when it is not profiled
+_request_profile = contextvars.ContextVar("request_profile", default=None)
+
+# tracemalloc is process wide, it runs while any profile in any thread needs it
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+def profiling_enabled(target) -> bool:
+    return target in PROFILE_TARGETS
+
+
+def profile_name(*parts) -> str:
+    """joins parts into a file name, dropping anything that is unsafe in a path (request IDs come from clients)"""
+    name = "-".join(re.sub(r"[^A-Za-z0-9_.-]+", "_", str(part)).strip("._-") for part in parts)
+    return name[:120] or "profile"
+
+
+def _start_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracemalloc_users += 1
+
+
+def _stop_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        snapshot = tracemalloc.take_snapshot()
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+    return snapshot
+
+
+@contextlib.contextmanager
+def profile(name):
+    """profiles the calling thread for the duration of the block
+
+    Writes logs/profiles/<name>-<time>-<pid>-<id>.prof and, with PROFILE_MEMORY,
+    a .tracemalloc snapshot of the memory allocated while the block ran.
+
+    Args:
+        name (str): stage or request the profile belongs to
+    """
+    os.makedirs(profile_dir, exist_ok=True)
+    # the random suffix keeps profiles of the same name started within the same second apart
+    path = os.path.join(profile_dir, f"{profile_name(name, time.strftime('%Y%m%dT%H%M%S'), os.getpid())}-{uuid.uuid4().hex[:8]}")
+
+    if PROFILE_MEMORY:
+        _start_tracemalloc()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield path
+    finally:
+        profiler.disable()
+        seconds = time.perf_counter() - start
+        if PROFILE_MEMORY:
+            # taken before the profile is written, without the profilers' own allocations
+            _stop_tracemalloc().filter_traces([
+                tracemalloc.Filter(False, cProfile.__file__),
+                tracemalloc.Filter(False, pstats.__file__),
+                tracemalloc.Filter(False, tracemalloc.__file__),
+            ]).dump(path + ".tracemalloc")
+        profiler.dump_stats(path + ".prof")
+        logger.info("Profile of %s (%.3fs) written to %s.prof", name, seconds, path)
+
+
+# method to profile a block only when PROFILE includes the target
+def maybe_profile(target, name):
+    return profile(name) if target in PROFILE_TARGETS else contextlib.nullcontext()
+
+
+def begin_request_profile(profile_header=None, request_id=None):
+    """decides whether the current request is profiled and marks it for the PredictionPipeline methods
+
+    Args:
+        profile_header (str, optional): value of the X-Profile header, honoured with PROFILE_HEADER=1
+        request_id (str, optional): value of the X-Request-ID header. Defaults to a random ID.
+
+    Returns:
+        str or None: the ID the request's profiles are named by, None when it is not profiled
+    """
+    if "requests" not in PROFILE_TARGETS and not (
+            PROFILE_HEADER and str(profile_header).strip().lower() in ('1', 'true', 'yes')):
+        return None
+
+    request_id = profile_name(request_id) if request_id else uuid.uuid4().hex
+    _request_profile.set(request_id)
+    return request_id
+
+
+# method to stop profiling once the request is answered, threads serve the next request with the same context
+def end_request_profile():
+    _request_profile.set(None)
+
+
+def profiled(method):
+    """profiles calls of a PredictionPipeline method made for a profiled request
+
+    Calls nested in a profiled call are part of its profile and are not
+    profiled again. Outside a profiled request the cost is one context
+    variable lookup.
+    """
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        request_id = _request_profile.get()
+        if request_id is None:
+            return method(*args, **kwargs)
+
+        token = _request_profile.set(None)
+        try:
+            with profile(f"request-{request_id}-{method.__name__}"):
+                return method(*args, **kwargs)
+        finally:
+            _request_profile.reset(token)
+
+    return wrapper
+
+
+# method to merge the function statistics of several .prof files
+def summarize_profiles(paths, top=25, sort="tottime"):
+    """returns the hottest functions over every profile
+
+    Returns:
+        list: dicts with the function, the number of profiles it appears in,
+              calls, own time and cumulative time, sorted by sort
+    """
+    functions = {}
+    for path in paths:
+        for (filename, line, func), (_, calls, tottime, cumtime, _) in pstats.Stats(path).stats.items():
+            entry = functions.setdefault((filename, line, func), {
+                "function": pstats.func_std_string((filename, line, func)),
+                "profiles": 0, "calls": 0, "tottime": 0.0, "cumtime": 0.0})
+            entry["profiles"] += 1
+            entry["calls"] += calls
+            entry["tottime"] += tottime
+            entry["cumtime"] += cumtime
+
+    return sorted(functions.values(), key=lambda entry: entry[sort], reverse=True)[:top]
+
+
+# method to merge the allocations of several .tracemalloc snapshots by source line
+def summarize_snapshots(paths, top=25):
+    lines = {}
+    for path in paths:
+        for stat in tracemalloc.Snapshot.load(path).statistics("lineno"):
+            frame = stat.traceback[0]
+            entry = lines.setdefault((frame.filename, frame.lineno), {
+                "line": f"{frame.filename}:{frame.lineno}", "profiles": 0, "size": 0, "count": 0})
+            entry["profiles"] += 1
+            entry["size"] += stat.size
+            entry["count"] += stat.count
+
+    return sorted(lines.values(), key=lambda entry: entry["size"], reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hottest functions and allocations across the profiles in logs/profiles")
+    parser.add_argument("patterns", nargs="*", default=["*"],
+                        help="profile names to include, e.g. 'stage-Model_Trainer*' or 'request-*' (default: all)")
+    parser.add_argument("--dir", default=profile_dir, help="directory of the profiles")
+    parser.add_argument("--top", type=int, default=25, help="rows to show")
+    parser.add_argument("--sort", choices=["tottime", "cumtime", "calls"], default="tottime",
+                        help="own time, time including callees, or number of calls")
+    args = parser.parse_args(argv)
+
+    def find(extension):
+        return sorted({path for pattern in args.patterns
+                       for path in glob.glob(os.path.join(args.dir, pattern + extension))})
+
+    prof_paths = find(".prof")
+    if not prof_paths:
+        print(f"No profiles matching {args.patterns} in {args.dir}", file=sys.stderr)
+        return 1
+
+    functions = summarize_profiles(prof_paths, args.top, args.sort)
+    total = sum(pstats.Stats(path).total_tt for path in prof_paths)
+    print(f"{len(prof_paths)} profiles, {total:.3f}s profiled")
+    print(f"{'tottime s':>10}{'share':>7}{'cumtime s':>11}{'calls':>11}{'profiles':>10}  function")
+    for entry in functions:
+        share = entry["tottime"] / total if total else 0.0
+        print(f"{entry['tottime']:>10.3f}{share:>7.1%}{entry['cumtime']:>11.3f}{entry['calls']:>11}"
+              f"{entry['profiles']:>10}  {entry['function']}")
+
+    snapshot_paths = find(".tracemalloc")
+    if snapshot_paths:
+        print(f"\n{len(snapshot_paths)} memory snapshots, largest allocations still held at the end of a profile")
+        print(f"{'size MB':>10}{'blocks':>11}{'profiles':>10}  line")
+        for entry in summarize_snapshots(snapshot_paths, args.top):
+            print(f"{entry['size'] / 2**20:>10.2f}{entry['count']:>11}{entry['profiles']:>10}  {entry['line']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Shared fixtures: a small synthetic diamonds dataset and a complete set of
+serving artifacts trained on it, written to a temporary directory so the
+tests never touch ./artifacts
+"""
+import os
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from mlProject.constants import ORDINAL_CATEGORIES, NUMERICAL_COLS, CATEGORICAL_COLS
+from mlProject.components.flat_forest import FlatForest
+from mlProject.components.fused_model import file_stamp
+from mlProject.components.data_transformation import DataTransformation
+
+# method to generate diamonds with the columns, order and dtypes of the real CSV
+def make_diamonds(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    carat = np.round(rng.uniform(0.2, 3.0, n_rows), 2)
+    size = np.cbrt(carat) * 6.5
+    df = pd.DataFrame({
+        'carat': carat,
+        'cut': rng.choice(ORDINAL_CATEGORIES['cut'], n_rows),
+        'color': rng.choice(ORDINAL_CATEGORIES['color'], n_rows),
+        'clarity': rng.choice(ORDINAL_CATEGORIES['clarity'], n_rows),
+        'depth': np.round(rng.normal(61.7, 1.4, n_rows), 1),
+        'table': np.round(rng.normal(57.4, 2.2, n_rows), 1),
+    })
+    quality = sum(df[col].map({c: i for i, c in enumerate(levels)}) for col, levels in ORDINAL_CATEGORIES.items())
+    df['price'] = np.round(3500 * carat ** 1.7 * (1 + 0.05 * quality) + rng.normal(0, 150, n_rows)).astype(np.int64)
+    df['x'] = np.round(size * rng.normal(1.0, 0.01, n_rows), 2)
+    df['y'] = np.round(size * rng.normal(1.0, 0.01, n_rows), 2)
+    df['z'] = np.round(size * 0.62 * rng.normal(1.0, 0.01, n_rows), 2)
+    return df
+
+
+# method to fit the scaler, the encoder and a small forest, and write them where serving looks for them
+def write_artifacts(base_dir, diamonds, model=None):
+    transform_dir = os.path.join(base_dir, 'data_transformation')
+    model_dir = os.path.join(base_dir, 'model_trainer')
+    os.makedirs(transform_dir, exist_ok=True)
+    os.makedirs(model_dir, exist_ok=True)
+
+    scaler, encoder = DataTransformation(config=None).get_scaler_and_encoder(CATEGORICAL_COLS)
+    X_num = scaler.fit_transform(diamonds[NUMERICAL_COLS])
+    X = np.hstack([X_num, encoder.transform(diamonds[CATEGORICAL_COLS])])
+
+    model = model if model is not None else RandomForestRegressor(n_estimators=5, max_depth=10, random_state=0)
+    model.fit(X, diamonds['price'])
+
+    model_path = os.path.join(model_dir, 'model.joblib')
+    joblib.dump(model, model_path)
+    joblib.dump(scaler, os.path.join(transform_dir, 'scaler.pkl'))
+    joblib.dump(encoder, os.path.join(transform_dir, 'encoder.pkl'))
+    diamonds.drop(columns=['price']).to_csv(os.path.join(transform_dir, 'X_test.csv'), index=False)
+
+    if isinstance(model, RandomForestRegressor):
+        forest = FlatForest.from_sklearn(model)
+        forest.meta = {"source_model": file_stamp(model_path)}
+        forest.save(os.path.join(model_dir, 'forest.npz'))
+
+    return scaler, encoder, model
+
+
+@pytest.fixture(scope="session")
+def diamonds():
+    return make_diamonds(2000)
+
+
+@pytest.fixture(scope="session")
+def artifacts_dir(tmp_path_factory, diamonds):
+    base_dir = str(tmp_path_factory.mktemp("artifacts"))
+    write_artifacts(base_dir, diamonds)
+    return base_dir
+
+
+@pytest.fixture(scope="session")
+def pipeline(artifacts_dir):
+    from mlProject.pipeline.prediction_pipeline import PredictionPipeline
+    return PredictionPipeline(base_dir=artifacts_dir)
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import pytest
+from mlProject.pipeline.model_registry import ModelRegistry
+from mlProject.pipeline.micro_batcher import BatcherFull
+
+pytest.importorskip("quart")
+
+@pytest.fixture
+def asgi(artifacts_dir, monkeypatch):
+    # imported here, where pytest already captures logging, so the app does not configure its log file
+    import asgi
+
+    threads = []
+    class Registry(ModelRegistry):
+        def get(self):
+            threads.append(threading.get_ident())
+            return super().get()
+    monkeypatch.setattr(asgi, "model_registry", Registry(base_dir=artifacts_dir))
+    monkeypatch.setattr(asgi, "prediction_cache", None)
+    asgi.registry_threads = threads
+    return asgi
+
+
+def post(asgi, record):
+    async def request():
+        response = await asgi.app.test_client().post('/predict', json=record)
+        return threading.get_ident(), response.status_code, await response.get_json()
+    return asyncio.run(request())
+
+
+def test_predict_is_one_pool_task_off_the_event_loop(asgi, diamonds):
+    completed = asgi.inference_pool.stats()["completed"]
+
+    loop_thread, status, body = post(asgi, diamonds.drop(columns=['price']).iloc[0].to_dict())
+
+    assert status == 200 and body["status"] == "success"
+    assert asgi.registry_threads and loop_thread not in asgi.registry_threads
+    assert asgi.inference_pool.stats()["completed"] == completed + 1
+
+
+def test_full_micro_batcher_answers_busy(asgi, diamonds, monkeypatch):
+    class FullBatcher:
+        def submit(self, record):
+            raise BatcherFull("Micro-batch queue is full")
+    monkeypatch.setattr(asgi, "micro_batcher", FullBatcher())
+
+    _, status, body = post(asgi, diamonds.drop(columns=['price']).iloc[0].to_dict())
+
+    assert status == 503 and body["message"] == "Server is busy, please retry shortly"
+
+
+def test_micro_batched_predict_matches_the_pipeline(asgi, pipeline, diamonds, monkeypatch):
+    from mlProject.pipeline.micro_batcher import MicroBatcher
+    monkeypatch.setattr(asgi, "micro_batcher", MicroBatcher(lambda: pipeline, max_wait_ms=1))
+    record = diamonds.drop(columns=['price']).iloc[0].to_dict()
+
+    _, status, body = post(asgi, record)
+
+    assert status == 200 and body["prediction"] == float(pipeline.predict_records([record])[0])
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+def good_rows(diamonds, n):
+    return diamonds.drop(columns=['price']).head(n).to_dict(orient='records')
+
+
+def test_valid_batch_has_no_errors(pipeline, diamonds):
+    predictions, errors = pipeline.predict_batch(pd.DataFrame.from_records(good_rows(diamonds, 20)))
+
+    assert errors == []
+    assert all(isinstance(value, float) for value in predictions)
+
+
+def test_non_finite_values_are_row_errors(pipeline, diamonds):
+    rows = good_rows(diamonds, 5)
+    rows[1]['carat'] = "inf"
+    rows[3]['depth'] = float('-inf')
+
+    predictions, errors = pipeline.predict_batch(pd.DataFrame.from_records(rows))
+
+    assert [error['row'] for error in errors] == [1, 3]
+    assert "'carat' must be a finite number" in errors[0]['message']
+    assert "'depth' must be a finite number" in errors[1]['message']
+    assert predictions[1] is None and predictions[3] is None
+    assert all(predictions[row] is not None for row in (0, 2, 4))
+
+
+def test_nan_and_booleans_are_not_numbers(pipeline, diamonds):
+    rows = good_rows(diamonds, 4)
+    rows[0]['carat'] = True
+    rows[2]['table'] = "nan"
+
+    predictions, errors = pipeline.predict_batch(pd.DataFrame.from_records(rows))
+
+    assert {error['row']: error['message'] for error in errors} == {
+        0: "'carat' must be a number", 2: "'table' must be a number"}
+    assert predictions[1] is not None and predictions[3] is not None
+
+
+def test_all_boolean_column_is_rejected(pipeline, diamonds):
+    data = pd.DataFrame.from_records(good_rows(diamonds, 3))
+    data['x'] = np.array([True, False, True])
+
+    _, errors = pipeline.predict_batch(data)
+
+    assert [error['row'] for error in errors] == [0, 1, 2]
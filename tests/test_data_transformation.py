@@ -0,0 +1,81 @@
+import os
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from mlProject.entity.config_entity import DataTransformationConfig
+from mlProject.components.data_transformation import DataTransformation
+from tests.conftest import make_diamonds
+
+ARRAYS = ["X_train_transformed", "y_train", "X_test_transformed", "y_test"]
+
+@pytest.fixture(scope="module")
+def data_path(tmp_path_factory):
+    diamonds = make_diamonds(3000, seed=1)
+    # rows the outlier bounds drop
+    diamonds.loc[[5, 700, 2999], 'x'] = 0.0
+    diamonds.loc[[42, 1500], 'z'] = 31.8
+    path = str(tmp_path_factory.mktemp("data") / "diamonds.csv")
+    diamonds.to_csv(path, index=False)
+    return path
+
+
+def transform(tmp_path, data_path, chunked, chunk_rows):
+    root_dir = str(tmp_path / f"{'chunked' if chunked else 'in_memory'}-{chunk_rows}")
+    os.makedirs(root_dir)
+    DataTransformation(DataTransformationConfig(root_dir=root_dir, data_path=data_path, target_column='price',
+                                                export_csv=False, chunk_rows=chunk_rows, chunked=chunked,
+                                                test_fraction=0.25)).get_transformed()
+
+    outputs = {name: np.load(os.path.join(root_dir, f"{name}.npy")) for name in ARRAYS}
+    outputs["scaler"] = joblib.load(os.path.join(root_dir, "scaler.pkl"))
+    outputs["X_test_raw"] = pd.read_csv(os.path.join(root_dir, "X_test.csv"))
+    return outputs
+
+
+# method to undo the scaling, so matrices scaled by slightly different scalers can be compared
+def unscaled(X, scaler):
+    X = X.copy()
+    X[:, :scaler.n_features_in_] = X[:, :scaler.n_features_in_] * scaler.scale_ + scaler.mean_
+    return X
+
+
+def sorted_rows(X, y):
+    rows = np.column_stack([X, y])
+    return rows[np.lexsort(rows.T[::-1])]
+
+
+def test_reading_in_chunks_matches_a_single_read(tmp_path, data_path):
+    small = transform(tmp_path, data_path, chunked=False, chunk_rows=97)
+    whole = transform(tmp_path, data_path, chunked=False, chunk_rows=1_000_000)
+
+    for name in ARRAYS:
+        assert np.array_equal(small[name], whole[name]), name
+    assert np.array_equal(small["scaler"].mean_, whole["scaler"].mean_)
+    pd.testing.assert_frame_equal(small["X_test_raw"], whole["X_test_raw"])
+
+
+def test_out_of_core_keeps_the_same_rows_and_scaling(tmp_path, data_path):
+    in_memory = transform(tmp_path, data_path, chunked=False, chunk_rows=1_000_000)
+    chunked = transform(tmp_path, data_path, chunked=True, chunk_rows=97)
+
+    def all_rows(outputs):
+        X = np.vstack([outputs["X_train_transformed"], outputs["X_test_transformed"]])
+        return sorted_rows(unscaled(X, outputs["scaler"]), np.concatenate([outputs["y_train"], outputs["y_test"]]))
+
+    assert len(chunked["y_test"]) + len(chunked["y_train"]) == 3000 - 5
+    assert np.allclose(all_rows(chunked), all_rows(in_memory), rtol=1e-12, atol=1e-9)
+
+    # partial_fit over the chunks gives the scaler a full fit on the same training rows would
+    X_train = unscaled(chunked["X_train_transformed"], chunked["scaler"])[:, :chunked["scaler"].n_features_in_]
+    assert np.allclose(chunked["scaler"].mean_, X_train.mean(axis=0), rtol=1e-12)
+    assert np.allclose(chunked["scaler"].scale_, X_train.std(axis=0), rtol=1e-10)
+
+
+def test_out_of_core_split_does_not_depend_on_the_chunk_size(tmp_path, data_path):
+    small = transform(tmp_path, data_path, chunked=True, chunk_rows=97)
+    large = transform(tmp_path, data_path, chunked=True, chunk_rows=1_000_000)
+
+    assert np.array_equal(small["y_train"], large["y_train"]) and np.array_equal(small["y_test"], large["y_test"])
+    for name in ["X_train_transformed", "X_test_transformed"]:
+        assert np.allclose(small[name], large[name], rtol=1e-12, atol=1e-12), name
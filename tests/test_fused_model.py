@@ -0,0 +1,120 @@
+import os
+import numpy as np
+import pytest
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.preprocessing import OrdinalEncoder, StandardScaler
+from mlProject.constants import NUMERICAL_COLS, CATEGORICAL_COLS, ORDINAL_CATEGORIES
+from mlProject.entity.config_entity import ModelPackagingConfig
+from mlProject.components.flat_forest import FlatForest
+from mlProject.components.fused_model import FusedModel
+from mlProject.components.model_packaging import ModelPackaging
+from mlProject.pipeline.prediction_pipeline import PredictionPipeline
+from tests.conftest import write_artifacts
+
+def reference(scaler, encoder, model, inputs):
+    X = np.hstack([scaler.transform(inputs[list(scaler.feature_names_in_)]),
+                   encoder.transform(inputs[list(encoder.feature_names_in_)])])
+    return model.predict(X)
+
+
+def packaging_config(base_dir):
+    return ModelPackagingConfig(
+        root_dir=os.path.join(base_dir, 'model_packaging'),
+        model_path=os.path.join(base_dir, 'model_trainer', 'model.joblib'),
+        scaler_path=os.path.join(base_dir, 'data_transformation', 'scaler.pkl'),
+        encoder_path=os.path.join(base_dir, 'data_transformation', 'encoder.pkl'),
+        forest_path=os.path.join(base_dir, 'model_trainer', 'forest.npz'),
+        compact_model_file=os.path.join(base_dir, 'model_compaction', 'forest_compact.npz'),
+        test_data_path=os.path.join(base_dir, 'data_transformation', 'X_test.csv'),
+        packaged_model_file=os.path.join(base_dir, 'model_packaging', 'model.npz'),
+        report_file=os.path.join(base_dir, 'model_packaging', 'report.json')
+    )
+
+
+@pytest.fixture(scope="module")
+def forest_artifacts(tmp_path_factory, diamonds):
+    base_dir = str(tmp_path_factory.mktemp("forest"))
+    return base_dir, write_artifacts(base_dir, diamonds)
+
+
+@pytest.fixture(scope="module")
+def boosting_artifacts(tmp_path_factory, diamonds):
+    base_dir = str(tmp_path_factory.mktemp("boosting"))
+    return base_dir, write_artifacts(base_dir, diamonds, model=HistGradientBoostingRegressor(max_iter=50, random_state=0))
+
+
+def test_flat_forest_matches_sklearn(forest_artifacts, diamonds):
+    _, (scaler, encoder, model) = forest_artifacts
+    inputs = diamonds.drop(columns=['price'])
+    X = np.hstack([scaler.transform(inputs[list(scaler.feature_names_in_)]),
+                   encoder.transform(inputs[list(encoder.feature_names_in_)])])
+
+    assert np.array_equal(FlatForest.from_sklearn(model).predict(X), model.predict(X))
+
+
+def test_packaged_model_matches_sklearn(forest_artifacts, diamonds):
+    base_dir, (scaler, encoder, model) = forest_artifacts
+    os.makedirs(os.path.join(base_dir, 'model_packaging'), exist_ok=True)
+    report = ModelPackaging(packaging_config(base_dir)).package()
+    inputs = diamonds.drop(columns=['price'])
+    expected = reference(scaler, encoder, model, inputs)
+
+    fused = FusedModel.load(packaging_config(base_dir).packaged_model_file, mmap=True)
+    pipeline = PredictionPipeline(base_dir=base_dir)
+    predictions, errors = pipeline.predict_batch(inputs)
+
+    assert report['packaged'] and report['verified_rows'] == len(inputs)
+    assert np.array_equal(fused.predict_columns(inputs), expected)
+    assert np.array_equal(fused.predict_records(inputs.to_dict(orient='records')), expected)
+    assert pipeline.model is None and not errors and np.array_equal(predictions, expected)
+
+
+def test_gradient_boosting_is_served_on_unrounded_features(boosting_artifacts, diamonds):
+    base_dir, (scaler, encoder, model) = boosting_artifacts
+    inputs = diamonds.drop(columns=['price'])
+    expected = reference(scaler, encoder, model, inputs)
+
+    pipeline = PredictionPipeline(base_dir=base_dir)
+    predictions, errors = pipeline.predict_batch(inputs)
+    records = inputs.to_dict(orient='records')
+
+    assert pipeline.feature_dtype == np.float64
+    assert not errors and np.array_equal(predictions, expected)
+    assert np.array_equal(pipeline.predict_records(records), expected)
+    assert [pipeline.predict_records([record])[0] for record in records[:50]] == list(expected[:50])
+
+
+def test_packaging_verifies_a_model_that_is_not_a_forest(boosting_artifacts, diamonds):
+    base_dir, _ = boosting_artifacts
+    os.makedirs(os.path.join(base_dir, 'model_packaging'), exist_ok=True)
+
+    report = ModelPackaging(packaging_config(base_dir)).package()
+
+    assert report == {"packaged": False, "model": "HistGradientBoostingRegressor", "verified_rows": len(diamonds)}
+
+
+@pytest.mark.parametrize("fit_missing", [False, True])
+def test_missing_category_is_encoded_like_sklearn(tmp_path, diamonds, fit_missing):
+    # some training rows lack a cut; the repo's encoder has fixed categories, so there a missing cut is unknown
+    data = diamonds.copy()
+    data['cut'] = data['cut'].astype(object).where(np.arange(len(data)) % 7 != 0, np.nan)
+    categories = [ORDINAL_CATEGORIES[col] + ([np.nan] if fit_missing and col == 'cut' else []) for col in CATEGORICAL_COLS]
+    encoder = OrdinalEncoder(categories=categories, handle_unknown="use_encoded_value", unknown_value=-1,
+                             encoded_missing_value=-5).fit(data[CATEGORICAL_COLS])
+    scaler = StandardScaler().fit(data[NUMERICAL_COLS])
+    X = np.hstack([scaler.transform(data[NUMERICAL_COLS]), encoder.transform(data[CATEGORICAL_COLS])])
+    model = RandomForestRegressor(n_estimators=5, max_depth=10, random_state=0).fit(X, data['price'])
+
+    path = str(tmp_path / 'model.npz')
+    FusedModel.from_sklearn(scaler, encoder, FlatForest.from_sklearn(model)).save(path)
+    fused = FusedModel.load(path)
+    inputs = data.drop(columns=['price']).head(50)
+    expected = reference(scaler, encoder, model, inputs)
+    records = inputs.to_dict(orient='records')
+
+    assert (X[:, -3] == (-5 if fit_missing else -1)).any()
+    assert fused.missing_cols == (['cut'] if fit_missing else [])
+    assert np.array_equal(fused.predict_columns(inputs), expected)
+    assert np.array_equal(fused.predict_records(records), expected)
+    # JSON null reaches the per-record path as None
+    assert np.array_equal(fused.predict_records([dict(records[0], cut=None)]), expected[:1])
@@ -0,0 +1,34 @@
+import logging
+from mlProject.utils.log_handlers import BackgroundLogWriter
+
+class Recorder(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+
+def test_records_are_formatted_by_the_writer_not_the_caller():
+    recorder = Recorder()
+    writer = BackgroundLogWriter([recorder])
+    writer.stop()
+    logger = logging.getLogger("test_log_handlers")
+    logger.propagate = False
+    logger.addHandler(writer.queue_handler)
+
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("priced %d diamonds", 3)
+
+    record = writer.queue_handler.queue.get_nowait()
+    assert record.msg == "priced %d diamonds" and record.args == (3,) and record.exc_info is not None
+
+    writer.queue_handler.queue.put_nowait(record)
+    writer.start()
+    writer.stop()
+    assert recorder.lines[0].startswith("ERROR priced 3 diamonds\nTraceback")
+    logger.removeHandler(writer.queue_handler)
@@ -0,0 +1,99 @@
+import time
+import threading
+import pytest
+from mlProject.pipeline.micro_batcher import MicroBatcher, BatcherFull
+from mlProject.pipeline.serving import parse_record
+
+def good_records(diamonds, n):
+    return diamonds.drop(columns=['price']).head(n).to_dict(orient='records')
+
+
+class FailingPipeline:
+    """Fails a whole batch whenever one of its rows has carat 999, like an unexpected model error."""
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+
+    def predict_records(self, records):
+        if any(record['carat'] == 999 for record in records):
+            raise RuntimeError("model error")
+        return self.pipeline.predict_records(records)
+
+
+def submit_batch(batcher, records):
+    # a long wait and an exact batch size, so every record lands in the same batch
+    futures = [batcher.submit(record) for record in records]
+    return [future.exception(timeout=10) or future.result() for future in futures]
+
+
+@pytest.mark.parametrize("value", ["inf", "-inf", "nan", "Infinity", True])
+def test_parse_record_rejects_non_finite_and_booleans(diamonds, value):
+    record = good_records(diamonds, 1)[0]
+    record['carat'] = value
+
+    parsed, error = parse_record(lambda key: record.get(key, ''))
+
+    assert parsed is None
+    assert error.startswith("Invalid input")
+
+
+def test_parse_record_accepts_a_valid_diamond(diamonds):
+    record = good_records(diamonds, 1)[0]
+
+    parsed, error = parse_record(lambda key: str(record.get(key, '')))
+
+    assert error is None
+    assert parsed['carat'] == record['carat'] and parsed['cut'] == record['cut']
+
+
+def test_bad_row_only_fails_its_own_request(pipeline, diamonds):
+    records = good_records(diamonds, 4)
+    records[2] = {key: value for key, value in records[2].items() if key != 'carat'}
+    expected = pipeline.predict_records([records[0], records[1], records[3]])
+
+    batcher = MicroBatcher(lambda: pipeline, max_batch_size=4, max_wait_ms=2000)
+    results = submit_batch(batcher, records)
+
+    assert isinstance(results[2], ValueError)
+    assert [results[0], results[1], results[3]] == list(expected)
+    assert batcher.stats()["batches"] == 1
+
+
+def test_batching_does_not_change_the_answer(pipeline, diamonds):
+    records = good_records(diamonds, 4)
+    # the encoder maps categories it was not fitted on to its unknown value, batched or not
+    records[1] = {**records[1], 'cut': 'Excellent'}
+    expected = [float(pipeline.predict_records([record])[0]) for record in records]
+
+    batcher = MicroBatcher(lambda: pipeline, max_batch_size=4, max_wait_ms=2000)
+
+    assert submit_batch(batcher, records) == expected
+
+
+def test_failed_batch_is_retried_row_by_row(pipeline, diamonds):
+    records = good_records(diamonds, 4)
+    records[1] = {**records[1], 'carat': 999}
+    expected = pipeline.predict_records([records[0], records[2], records[3]])
+
+    batcher = MicroBatcher(lambda: FailingPipeline(pipeline), max_batch_size=4, max_wait_ms=2000)
+    results = submit_batch(batcher, records)
+
+    assert isinstance(results[1], RuntimeError)
+    assert [results[0], results[2], results[3]] == list(expected)
+
+
+def test_full_queue_rejects_instead_of_growing(pipeline, diamonds):
+    record = good_records(diamonds, 1)[0]
+    release = threading.Event()
+    batcher = MicroBatcher(lambda: release.wait() and pipeline, max_batch_size=1, max_wait_ms=0, max_queue_size=2)
+
+    # the worker holds the first row while it waits for the pipeline, two more fill the queue
+    futures = [batcher.submit(record)]
+    time.sleep(0.1)
+    futures += [batcher.submit(record), batcher.submit(record)]
+    with pytest.raises(BatcherFull):
+        batcher.submit(record)
+    release.set()
+
+    assert len({future.result(timeout=10) for future in futures}) == 1
+    assert batcher.stats()["rejected"] == 1
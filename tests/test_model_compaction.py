@@ -0,0 +1,97 @@
+import os
+import joblib
+import pytest
+from pathlib import Path
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from mlProject.entity.config_entity import ModelCompactionConfig
+from mlProject.components.flat_forest import FlatForest
+from mlProject.components.model_compaction import ModelCompaction, get_out_of_bag_rows
+from mlProject.utils.common import save_array
+
+def write_split(base_dir, diamonds, n_test=400, bootstrap=True):
+    X = np.column_stack([diamonds['carat'], diamonds['depth'], diamonds['table']])
+    y = diamonds['price'].to_numpy(dtype=np.float64)
+    paths = {name: os.path.join(base_dir, f'{name}.npy') for name in ('X_train', 'y_train', 'X_test', 'y_test')}
+    for name, data in (('X_train', X[n_test:]), ('y_train', y[n_test:]), ('X_test', X[:n_test]), ('y_test', y[:n_test])):
+        save_array(Path(paths[name]), data)
+
+    model = RandomForestRegressor(n_estimators=20, max_depth=8, bootstrap=bootstrap, random_state=0).fit(X[n_test:], y[n_test:])
+    paths['model'] = os.path.join(base_dir, 'model.joblib')
+    joblib.dump(model, paths['model'])
+    return paths
+
+
+def compaction_config(base_dir, paths):
+    return ModelCompactionConfig(
+        root_dir=base_dir,
+        model_path=paths['model'],
+        X_train_transformed_path=paths['X_train'],
+        y_train_path=paths['y_train'],
+        X_test_transformed_path=paths['X_test'],
+        y_test_path=paths['y_test'],
+        compact_model_file=os.path.join(base_dir, 'forest_compact.npz'),
+        report_file=os.path.join(base_dir, 'report.json'),
+        enabled=True,
+        max_depth=None,
+        max_leaf_nodes=None,
+        max_rmse_increase=0.05,
+        validation_fraction=0.25,
+        random_state=0
+    )
+
+
+def test_tree_count_is_chosen_without_the_test_set(tmp_path, diamonds):
+    paths = write_split(str(tmp_path), diamonds)
+    report = ModelCompaction(compaction_config(str(tmp_path), paths)).compact()
+
+    # shuffled test prices change the reported RMSE, not the trees kept
+    y_test = np.load(paths['y_test'])
+    save_array(Path(paths['y_test']), np.random.default_rng(0).permutation(y_test))
+    shuffled = ModelCompaction(compaction_config(str(tmp_path), paths)).compact()
+
+    assert report['validation']['out_of_bag']
+    assert shuffled['compact']['n_trees'] == report['compact']['n_trees']
+    assert shuffled['compact']['rmse'] != report['compact']['rmse']
+    assert report['rmse_delta'] == report['compact']['rmse'] - report['source']['rmse']
+
+
+def test_validation_rows_are_only_scored_by_trees_that_did_not_train_on_them(tmp_path, diamonds):
+    paths = write_split(str(tmp_path), diamonds)
+    compaction = ModelCompaction(compaction_config(str(tmp_path), paths))
+    model = joblib.load(paths['model'])
+
+    X_val, y_val, out_of_bag = compaction.get_validation_slice(model)
+    in_sample = compaction.get_rmse_curve(FlatForest.from_sklearn(model), X_val, y_val)
+    held_out = compaction.get_rmse_curve(FlatForest.from_sklearn(model), X_val, y_val, out_of_bag)
+
+    assert out_of_bag[0].all() and out_of_bag.shape == (20, len(y_val))
+    assert held_out[-1] > in_sample[-1]
+
+
+def test_forest_without_bootstrap_is_swept_on_every_tree(tmp_path, diamonds):
+    paths = write_split(str(tmp_path), diamonds, bootstrap=False)
+    report = ModelCompaction(compaction_config(str(tmp_path), paths)).compact()
+
+    assert not report['validation']['out_of_bag']
+    assert report['validation']['rows'] == round(0.25 * (len(diamonds) - 400))
+
+
+# max_samples=300 leaves some rows in every tree's sample, sklearn warns about those
+@pytest.mark.filterwarnings("ignore:Some inputs do not have OOB scores")
+def test_out_of_bag_rows_match_the_forest_oob_predictions(diamonds):
+    X = np.column_stack([diamonds['carat'], diamonds['depth'], diamonds['table']])
+    y = diamonds['price'].to_numpy(dtype=np.float64)
+
+    for max_samples in (None, 0.5, 300):
+        model = RandomForestRegressor(n_estimators=10, max_depth=6, oob_score=True, max_samples=max_samples,
+                                      random_state=0).fit(X, y)
+        total, counts = np.zeros(len(y)), np.zeros(len(y))
+        for estimator in model.estimators_:
+            rows = get_out_of_bag_rows(estimator, len(y), max_samples)
+            total[rows] += estimator.predict(X[rows])
+            counts[rows] += 1
+
+        # the same rows sklearn used for oob_prediction_, averaged the same way
+        scored = counts > 0
+        np.testing.assert_allclose(total[scored] / counts[scored], model.oob_prediction_[scored])
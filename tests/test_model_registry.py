@@ -0,0 +1,73 @@
+import os
+import pytest
+from mlProject.pipeline.model_registry import ModelRegistry, publish_artifacts, read_version_stamp, SERVING_DIR, KEEP_PUBLISHED
+from mlProject.pipeline.training_jobs import training_lock, get_training_lock_path
+from tests.conftest import write_artifacts
+
+@pytest.fixture
+def base_dir(tmp_path, diamonds):
+    write_artifacts(str(tmp_path), diamonds)
+    return str(tmp_path)
+
+
+def sample(diamonds):
+    return diamonds.drop(columns=['price']).head(3).to_dict(orient='records')
+
+
+def test_registry_serves_the_published_snapshot(base_dir, diamonds):
+    version = publish_artifacts(base_dir)
+    registry = ModelRegistry(base_dir=base_dir, check_interval=0)
+    expected = registry.get().predict_records(sample(diamonds))
+
+    # the next training run rewrites artifacts/ in place
+    with open(os.path.join(base_dir, 'model_trainer', 'model.joblib'), 'wb') as f:
+        f.write(b'partial')
+
+    assert registry.get().version == version
+    assert list(ModelRegistry(base_dir=base_dir).get().predict_records(sample(diamonds))) == list(expected)
+
+
+def test_registry_switches_when_a_new_version_is_published(base_dir):
+    registry = ModelRegistry(base_dir=base_dir, check_interval=0)
+    publish_artifacts(base_dir)
+    registry.get()
+
+    version = publish_artifacts(base_dir)
+
+    assert registry.get().version == version
+
+
+def test_publish_with_a_missing_artifact_keeps_the_previous_version(base_dir):
+    version = publish_artifacts(base_dir)
+    os.remove(os.path.join(base_dir, 'data_transformation', 'scaler.pkl'))
+
+    with pytest.raises(FileNotFoundError):
+        publish_artifacts(base_dir)
+
+    assert read_version_stamp(base_dir)["version"] == version
+    assert os.listdir(os.path.join(base_dir, SERVING_DIR)) == [version]
+
+
+def test_only_the_newest_snapshots_are_kept(base_dir):
+    versions = [publish_artifacts(base_dir) for _ in range(KEEP_PUBLISHED + 2)]
+
+    assert sorted(os.listdir(os.path.join(base_dir, SERVING_DIR))) == sorted(versions[-KEEP_PUBLISHED:])
+
+
+def test_unpublished_artifacts_are_not_loaded_during_training(base_dir):
+    registry = ModelRegistry(base_dir=base_dir)
+
+    with training_lock(get_training_lock_path(base_dir)):
+        with pytest.raises(RuntimeError):
+            registry.get()
+
+    assert registry.get() is not None
+
+
+def test_training_lock_is_exclusive(tmp_path):
+    lock_path = str(tmp_path / '.training.lock')
+
+    with training_lock(lock_path):
+        with pytest.raises(RuntimeError):
+            with training_lock(lock_path):
+                pass
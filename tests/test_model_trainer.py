@@ -0,0 +1,41 @@
+import os
+import joblib
+from pathlib import Path
+import numpy as np
+from mlProject.entity.config_entity import ModelTrainerConfig
+from mlProject.components.model_trainer import ModelTrainer
+from mlProject.utils.common import save_array, get_array_blocks
+
+def trainer_config(base_dir, diamonds, n_estimators, chunk_rows):
+    X = np.column_stack([diamonds['carat'], diamonds['depth'], diamonds['table']])
+    y = diamonds['price'].to_numpy(dtype=np.float64)
+    X_path, y_path = os.path.join(base_dir, 'X_train.npy'), os.path.join(base_dir, 'y_train.npy')
+    save_array(Path(X_path), X)
+    save_array(Path(y_path), y)
+
+    return ModelTrainerConfig(
+        root_dir=base_dir,
+        X_train_transformed_path=X_path,
+        y_train_path=y_path,
+        model_name='model.joblib',
+        n_estimators=n_estimators,
+        random_state=0,
+        n_jobs=1,
+        backend='threading',
+        max_samples=None,
+        max_features=1.0,
+        chunked=True,
+        chunk_rows=chunk_rows,
+        max_leaf_nodes=32,
+        best_params_file=None
+    )
+
+
+def test_chunked_training_grows_exactly_n_estimators(tmp_path, diamonds):
+    config = trainer_config(str(tmp_path), diamonds, n_estimators=100, chunk_rows=700)
+    assert len(get_array_blocks(len(diamonds), 700, seed=0)) == 3
+
+    ModelTrainer(config).train()
+
+    model = joblib.load(os.path.join(str(tmp_path), 'model.joblib'))
+    assert len(model.estimators_) == 100
@@ -0,0 +1,13 @@
+from mlProject.pipeline.prediction_cache import PredictionCache
+
+def test_only_identically_priced_records_share_an_entry(pipeline, diamonds):
+    cache = PredictionCache()
+    record = diamonds.drop(columns=['price']).iloc[0].to_dict()
+    nudged = dict(record, carat=record['carat'] + 1e-9)
+    padded = dict(record, cut=f" {record['cut']}")
+
+    cache.put(cache.make_key(record, "v1"), float(pipeline.predict_records([record])[0]))
+
+    assert cache.get(cache.make_key(dict(record, carat=str(record['carat'])), "v1")) is not None
+    assert cache.get(cache.make_key(nudged, "v1")) is None
+    assert cache.get(cache.make_key(padded, "v1")) is None
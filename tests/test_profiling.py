@@ -0,0 +1,14 @@
+import os
+from mlProject.utils import profiling
+
+def test_profiles_started_in_the_same_second_do_not_overwrite_each_other(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "profile_dir", str(tmp_path))
+
+    paths = []
+    for name in ["stage-Model Trainer Stage"] * 2 + ["request-" + "x" * 200] * 2:
+        with profiling.profile(name) as path:
+            sum(range(1000))
+        paths.append(path)
+
+    assert len(set(paths)) == 4
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(path) + ".prof" for path in paths)
@@ -0,0 +1,73 @@
+import os
+import joblib
+import pytest
+from mlProject.entity.config_entity import QuoteGridConfig
+from mlProject.components.quote_grid_builder import QuoteGridBuilder
+from mlProject.pipeline.prediction_pipeline import PredictionPipeline
+from tests.conftest import write_artifacts
+
+def grid_config(base_dir, enabled=True):
+    return QuoteGridConfig(
+        root_dir=os.path.join(base_dir, 'quote_grid'),
+        data_path=os.path.join(base_dir, 'diamonds.csv'),
+        test_data_path=os.path.join(base_dir, 'data_transformation', 'X_test.csv'),
+        model_path=os.path.join(base_dir, 'model_trainer', 'model.joblib'),
+        scaler_path=os.path.join(base_dir, 'data_transformation', 'scaler.pkl'),
+        encoder_path=os.path.join(base_dir, 'data_transformation', 'encoder.pkl'),
+        grid_file=os.path.join(base_dir, 'quote_grid', 'quote_grid.npz'),
+        report_file=os.path.join(base_dir, 'quote_grid', 'report.json'),
+        enabled=enabled,
+        axes={'carat': 16, 'depth': 3, 'table': 3},
+        lower_quantile=0.01,
+        upper_quantile=0.99,
+        derived_quantile=0.99
+    )
+
+
+@pytest.fixture
+def grid_dir(tmp_path, diamonds):
+    base_dir = str(tmp_path)
+    write_artifacts(base_dir, diamonds)
+    diamonds.to_csv(os.path.join(base_dir, 'diamonds.csv'), index=False)
+    os.makedirs(os.path.join(base_dir, 'quote_grid'))
+    QuoteGridBuilder(grid_config(base_dir)).build()
+    return base_dir
+
+
+def typical_diamond(diamonds):
+    record = diamonds.drop(columns=['price']).iloc[0].to_dict()
+    return {**record, 'carat': 1.0, 'depth': 61.7, 'table': 57.4, 'x': 6.5, 'y': 6.5, 'z': 4.03}
+
+
+def test_quotes_typical_diamonds(grid_dir, diamonds):
+    pipeline = PredictionPipeline(base_dir=grid_dir)
+
+    price, max_error = pipeline.quote(typical_diamond(diamonds))
+
+    assert abs(price - pipeline.predict_records([typical_diamond(diamonds)])[0]) <= max_error
+
+
+def test_untypical_dimensions_fall_through_to_the_model(grid_dir, diamonds):
+    pipeline = PredictionPipeline(base_dir=grid_dir)
+
+    assert pipeline.quote({**typical_diamond(diamonds), 'x': 9.5, 'y': 9.5}) is None
+
+
+def test_grid_of_an_older_model_is_ignored(grid_dir):
+    model_path = os.path.join(grid_dir, 'model_trainer', 'model.joblib')
+    joblib.dump(joblib.load(model_path), model_path)
+
+    assert PredictionPipeline(base_dir=grid_dir).quote_grid is None
+
+
+def test_disabled_stage_removes_the_grid(grid_dir, monkeypatch):
+    from mlProject.pipeline import quote_grid_pipeline
+
+    class Configuration:
+        def get_quote_grid_config(self):
+            return grid_config(grid_dir, enabled=False)
+
+    monkeypatch.setattr(quote_grid_pipeline, 'ConfigurationManager', Configuration)
+    quote_grid_pipeline.QuoteGridPipeline().main()
+
+    assert not os.path.exists(grid_config(grid_dir).grid_file)
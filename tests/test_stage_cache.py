@@ -0,0 +1,36 @@
+from mlProject.pipeline.stage_cache import StageCache, StageSpec
+
+def make_cache(tmp_path):
+    package_dir = tmp_path / 'package'
+    (package_dir / 'utils').mkdir(parents=True)
+    (package_dir / 'component.py').write_text("def run(): pass\n")
+    (package_dir / 'utils' / 'common.py').write_text("def helper(): return 1\n")
+    (tmp_path / 'input.csv').write_text("a,b\n1,2\n")
+    (tmp_path / 'output.csv').write_text("c\n3\n")
+
+    cache = StageCache(manifest_path=str(tmp_path / 'manifest.json'), package_dir=str(package_dir))
+    spec = StageSpec(inputs=[str(tmp_path / 'input.csv')], params={"k": 1}, outputs=[str(tmp_path / 'output.csv')])
+    cache.record("stage", spec, 1.0)
+    return cache, spec, package_dir
+
+
+def test_unchanged_stage_is_fresh(tmp_path):
+    cache, spec, _ = make_cache(tmp_path)
+
+    assert StageCache(manifest_path=cache.manifest_path, package_dir=cache.package_dir).is_fresh("stage", spec)
+
+
+def test_editing_a_helper_module_reruns_the_stage(tmp_path):
+    cache, spec, package_dir = make_cache(tmp_path)
+
+    (package_dir / 'utils' / 'common.py').write_text("def helper(): return 2\n")
+
+    assert not cache.is_fresh("stage", spec)
+
+
+def test_changed_params_or_inputs_rerun_the_stage(tmp_path):
+    cache, spec, _ = make_cache(tmp_path)
+
+    assert not cache.is_fresh("stage", StageSpec(inputs=spec.inputs, params={"k": 2}, outputs=spec.outputs))
+    (tmp_path / 'input.csv').write_text("a,b\n1,3\n")
+    assert not cache.is_fresh("stage", spec)
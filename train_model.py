@@ -6,13 +6,21 @@ from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, OrdinalEncoder
 from pathlib import Path
+from mlProject.components.flat_forest import FlatForest
+from mlProject.components.fused_model import FusedModel, file_stamp
+from mlProject.constants import ORDINAL_CATEGORIES
+from mlProject.utils.common import save_array
+from mlProject.pipeline.model_registry import publish_artifacts
+from mlProject.pipeline.training_jobs import training_lock
 
 # Create necessary directories
 artifacts_dir = "artifacts"
 model_dir = os.path.join(artifacts_dir, "model_trainer")
 transform_dir = os.path.join(artifacts_dir, "data_transformation")
+package_dir = os.path.join(artifacts_dir, "model_packaging")
 os.makedirs(model_dir, exist_ok=True)
 os.makedirs(transform_dir, exist_ok=True)
+os.makedirs(package_dir, exist_ok=True)
 
 # Load the data
 data_path = os.path.join("artifacts", "data_ingestion", "diamonds.csv")
@@ -25,21 +33,13 @@ y = df['price']
 # Split the data
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-# Save the test data for later use
-X_test.to_csv(os.path.join(transform_dir, "X_test.csv"), index=False)
-y_test.to_csv(os.path.join(transform_dir, "y_test.csv"), index=False)
-
-# Define categorical and numerical columns
-categorical_cols = ['cut', 'color', 'clarity']
-numerical_cols = ['carat', 'depth', 'table', 'x', 'y', 'z']
+# Define categorical and numerical columns, in file order like DataTransformation
+categorical_cols = [col for col in X.columns if col in ORDINAL_CATEGORIES]
+numerical_cols = [col for col in X.columns if col not in ORDINAL_CATEGORIES]
 
 # Initialize transformers
 scaler = StandardScaler()
-encoder = OrdinalEncoder(categories=[
-    ['Fair', 'Good', 'Very Good', 'Premium', 'Ideal'],  # cut
-    ['J', 'I', 'H', 'G', 'F', 'E', 'D'],  # color
-    ['I1', 'SI2', 'SI1', 'VS2', 'VS1', 'VVS2', 'VVS1', 'IF']  # clarity
-])
+encoder = OrdinalEncoder(categories=[ORDINAL_CATEGORIES[col] for col in categorical_cols])
 
 # Apply transformations
 X_train_num = X_train[numerical_cols]
@@ -60,30 +60,54 @@ X_test_cat_encoded = encoder.transform(X_test_cat)
 X_train_processed = np.hstack((X_train_num_scaled, X_train_cat_encoded))
 X_test_processed = np.hstack((X_test_num_scaled, X_test_cat_encoded))
 
-# Save the transformed data
-pd.DataFrame(X_train_processed).to_csv(os.path.join(transform_dir, "X_train_transformed.csv"), index=False)
-pd.DataFrame(X_test_processed).to_csv(os.path.join(transform_dir, "X_test_transformed.csv"), index=False)
-y_train.to_csv(os.path.join(transform_dir, "y_train.csv"), index=False)
-y_test.to_csv(os.path.join(transform_dir, "y_test.csv"), index=False)
-
-# Save the transformers
-joblib.dump(scaler, os.path.join(transform_dir, "scaler.pkl"))
-joblib.dump(encoder, os.path.join(transform_dir, "encoder.pkl"))
-
-# Train the model
-print("Training the model...")
-model = RandomForestRegressor(n_estimators=100, random_state=42)
-model.fit(X_train_processed, y_train)
-
-# Save the model
-model_path = os.path.join(model_dir, "model.joblib")
-joblib.dump(model, model_path)
-print(f"Model saved to {model_path}")
-
-# Print model performance
-train_score = model.score(X_train_processed, y_train)
-test_score = model.score(X_test_processed, y_test)
-print(f"Training R² score: {train_score:.4f}")
-print(f"Testing R² score: {test_score:.4f}")
+# Everything below writes to artifacts/, under the same lock as main.py and /train, so no training run
+# or publish interleaves with this one
+with training_lock():
+    # Save the test data for later use
+    X_test.to_csv(os.path.join(transform_dir, "X_test.csv"), index=False)
+
+    # Save the transformed data as binary arrays
+    feature_names = numerical_cols + categorical_cols
+    save_array(Path(os.path.join(transform_dir, "X_train_transformed.npy")), X_train_processed, columns=feature_names)
+    save_array(Path(os.path.join(transform_dir, "X_test_transformed.npy")), X_test_processed, columns=feature_names)
+    save_array(Path(os.path.join(transform_dir, "y_train.npy")), y_train)
+    save_array(Path(os.path.join(transform_dir, "y_test.npy")), y_test)
+
+    # Save the transformers
+    joblib.dump(scaler, os.path.join(transform_dir, "scaler.pkl"))
+    joblib.dump(encoder, os.path.join(transform_dir, "encoder.pkl"))
+
+    # Train the model
+    print("Training the model...")
+    model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
+    model.fit(X_train_processed, y_train)
+
+    # every core for fitting only, the served model predicts on one thread as before
+    model.set_params(n_jobs=None)
+
+    # Save the model
+    model_path = os.path.join(model_dir, "model.joblib")
+    joblib.dump(model, model_path)
+    print(f"Model saved to {model_path}")
+
+    # Export the flattened forest for the fast inference engine
+    flat_forest = FlatForest.from_sklearn(model)
+    flat_forest.meta = {"source_model": file_stamp(model_path)}
+    flat_forest.save(os.path.join(model_dir, "forest.npz"))
+
+    # Package the transformers and the forest into the single file serving loads
+    scaler_path, encoder_path = os.path.join(transform_dir, "scaler.pkl"), os.path.join(transform_dir, "encoder.pkl")
+    flat_forest.meta = {"source_model": file_stamp(model_path), "source_scaler": file_stamp(scaler_path),
+                        "source_encoder": file_stamp(encoder_path), "forest": "flat"}
+    FusedModel.from_sklearn(scaler, encoder, flat_forest).save(os.path.join(package_dir, "model.npz"))
+
+    # Print model performance
+    train_score = model.score(X_train_processed, y_train)
+    test_score = model.score(X_test_processed, y_test)
+    print(f"Training R² score: {train_score:.4f}")
+    print(f"Testing R² score: {test_score:.4f}")
+
+    # Publish the new artifacts as the version to serve
+    publish_artifacts()
 
 print("\nModel training and data transformation completed successfully!")